@@ -7,6 +7,7 @@ from hashlib import md5
 from dotenv import load_dotenv
 from app.abilities.image.provider_registry import get_registry
 from app.utils.file_storage import upload_file, copy_generated_image, get_file_url
+from app.utils import cassettes
 import logging
 import time
 import uuid
@@ -131,7 +132,12 @@ class ImageAbility(BaseAbility):
             
             # Generate the image
             start_time = time.time()
-            result = await provider.generate(prompt, model, generation_params)
+            result = await cassettes.through(
+                "image",
+                f"{provider_name}:{model}",
+                {"prompt": prompt, "params": generation_params},
+                lambda: provider.generate(prompt, model, generation_params)
+            )
             duration = time.time() - start_time
             
             # Check if generation was successful
@@ -1,6 +1,9 @@
 import logging
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Any, Dict, Optional, Sequence
+from uuid import UUID
 import asyncio
+import bisect
+import time
 from contextlib import asynccontextmanager
 import asyncpg
 from couchbase.cluster import Cluster
@@ -11,22 +14,72 @@ from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as rest
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy import text
 from sqlalchemy.engine.url import make_url
+from tenacity import retry, stop_after_attempt, wait_exponential
 from app.config.settings import settings
 from datetime import timedelta
 
 # Use the app.database logger
 logger = logging.getLogger("app.database")
 
+# Checkout wait buckets in seconds: waits should be well under 10ms when the pool is sized right
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class LatencyHistogram:
+    """Cumulative fixed-bucket histogram (Prometheus style: each bucket counts observations <= its bound)"""
+
+    def __init__(self, buckets: Sequence[float] = CHECKOUT_WAIT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": cumulative
+        }
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """The default async engine pool, timing every checkout (waiting for a free connection or opening one)"""
+
+    checkout_wait = LatencyHistogram()
+    checkout_timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            # Only pool_timeout expiring; connect errors are not checkout timeouts
+            InstrumentedAsyncQueuePool.checkout_timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
 class Database:
     def __init__(self):
         logger.debug("Initializing Database class")
         self._pg_pool = None
         self._cb_cluster = None
         self._qdrant_client = None
-        self._async_engine = None
-        self._async_session_factory = None
         
         # Get Qdrant URL with fallback
         try:
@@ -36,34 +89,71 @@ class Database:
             self._qdrant_url = f"http://{settings.QDRANT_HOST}:{settings.QDRANT_PORT}"
             logger.warning(f"QDRANT_URL not found, using constructed URL: {self._qdrant_url}")
         
-        # Create engine with explicit asyncpg driver
-        url = settings.POSTGRES_DSN_POSEY.replace('postgresql://', 'postgresql+asyncpg://')
-        
-        self.engine = create_async_engine(
-            url,
+        # The one SQLAlchemy engine (and connection pool) for this worker. Creating it opens no connections.
+        self._async_engine = self._create_engine()
+        self._async_session_factory = sessionmaker(
+            self._async_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        # Kept for code that used the old attribute names
+        self.engine = self._async_engine
+        self.SessionLocal = self._async_session_factory
+        self._pg_pool_wait = LatencyHistogram()
+
+    @staticmethod
+    def _asyncpg_dsn() -> str:
+        return settings.POSTGRES_DSN_POSEY.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+    @staticmethod
+    def _create_engine():
+        dsn = settings.POSTGRES_DSN_POSEY
+        if dsn.startswith("postgresql://"):
+            dsn = dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+        elif not dsn.startswith("postgresql+asyncpg://"):
+            raise ValueError(f"Invalid PostgreSQL DSN format: {dsn}")
+
+        return create_async_engine(
+            dsn,
             echo=settings.DEBUG,
+            poolclass=InstrumentedAsyncQueuePool,
             pool_pre_ping=True,
             pool_size=settings.POSTGRES_POOL_SIZE,
             max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+            pool_timeout=settings.POSTGRES_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.POSTGRES_POOL_RECYCLE_SECONDS,
             connect_args={
+                "statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+                "command_timeout": settings.POSTGRES_COMMAND_TIMEOUT_SECONDS,
+                "timeout": settings.POSTGRES_CONNECT_TIMEOUT_SECONDS,
                 "server_settings": {
                     "application_name": "posey-agents"
                 }
             }
         )
-        self.SessionLocal = sessionmaker(
-            self.engine,
-            class_=AsyncSession,
-            expire_on_commit=False
+
+    async def _create_pg_pool(self) -> Optional[asyncpg.Pool]:
+        """Raw asyncpg pool over the same DSN, if enabled in settings"""
+        if not settings.POSTGRES_RAW_POOL_ENABLED:
+            return None
+        return await asyncpg.create_pool(
+            dsn=self._asyncpg_dsn(),
+            min_size=settings.POSTGRES_RAW_POOL_MIN_SIZE,
+            max_size=settings.POSTGRES_RAW_POOL_MAX_SIZE,
+            statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+            command_timeout=settings.POSTGRES_COMMAND_TIMEOUT_SECONDS,
+            timeout=settings.POSTGRES_CONNECT_TIMEOUT_SECONDS,
+            server_settings={"application_name": "posey-agents-raw"}
         )
-        self._async_session_factory = self.SessionLocal
 
     @property
-    def pool(self):
-        """Getter for PostgreSQL connection pool"""
-        if not self._pool:
-            raise RuntimeError("PostgreSQL pool not initialized. Call connect_all() first.")
-        return self._pool
+    def pool(self) -> Optional[asyncpg.Pool]:
+        """Raw asyncpg pool (None if disabled or not connected yet)"""
+        return self._pg_pool
+
+    @pool.setter
+    def pool(self, value):
+        self._pg_pool = value
 
     @property
     def pg_pool(self):
@@ -107,9 +197,9 @@ class Database:
     @property
     def postgres_pool(self):
         """Getter for PostgreSQL connection pool"""
-        if not self._pool:
+        if not self._pg_pool:
             raise RuntimeError("PostgreSQL pool not initialized. Call connect_all() first.")
-        return self._pool
+        return self._pg_pool
     
     @property
     def couchbase(self):
@@ -119,9 +209,9 @@ class Database:
 
     @property
     def postgres(self):
-        if not self._pool:
+        if not self._pg_pool:
             raise RuntimeError("PostgreSQL connection not initialized")
-        return self._pool
+        return self._pg_pool
 
     @property
     def collection(self):
@@ -146,60 +236,15 @@ class Database:
 
     @property
     def async_session(self):
-        """Getter for SQLAlchemy async session"""
-        if not self._async_session:
-            raise RuntimeError("SQLAlchemy session not initialized. Call connect_all() first.")
-        return self._async_session
+        """Session factory of the shared engine"""
+        return self._async_session_factory
 
     async def connect_all(self):
         """Initializes all database connections."""
         logger.info("Initializing database connections...")
 
-        # Initialize SQLAlchemy first (often less problematic)
-        try:
-            # Ensure the DSN uses the correct asyncpg driver
-            sqlalchemy_dsn = settings.POSTGRES_DSN_POSEY
-            if sqlalchemy_dsn.startswith("postgresql://"):
-                sqlalchemy_dsn = sqlalchemy_dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
-            elif not sqlalchemy_dsn.startswith("postgresql+asyncpg://"):
-                 raise ValueError(f"Invalid PostgreSQL DSN format: {sqlalchemy_dsn}")
-
-            self._async_engine = create_async_engine(
-                sqlalchemy_dsn,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True
-            )
-            self._async_session_factory = sessionmaker(
-                self._async_engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
-            # Test SQLAlchemy connection by creating a session
-            async with self.get_session() as session:
-                await session.execute(text("SELECT 1"))
-            logger.info("SQLAlchemy Engine/Session initialized successfully.")
-        except Exception as e:
-            logger.error(f"SQLAlchemy Engine/Session initialization failed: {e}")
-            self._async_engine = None
-            self._async_session_factory = None
-
-        # Initialize asyncpg Pool (Separate from SQLAlchemy)
-        try:
-            self._pg_pool = await asyncpg.create_pool(
-                dsn=settings.POSTGRES_DSN_POSEY,
-                min_size=1,
-                max_size=10,
-                timeout=5
-            )
-            # Test the pool
-            async with self.get_pg_connection() as conn:
-                 await conn.fetchval("SELECT 1")
-            logger.info("asyncpg Pool initialized successfully.")
-        except Exception as e:
-            logger.error(f"asyncpg Pool initialization failed: {e}")
-            self._pg_pool = None
-            # Decide if we should raise or continue
+        # Postgres: verify the engine, then open the optional raw pool
+        await self._connect_postgres()
 
         # Initialize Couchbase
         try:
@@ -252,23 +297,40 @@ class Database:
         if not self._qdrant_client:
             logger.critical("Qdrant client failed to initialize. Application cannot start.")
             raise RuntimeError("Qdrant client failed to initialize during startup.")
-        elif not all([self._async_engine, self._pg_pool, self._cb_cluster]):
+        elif not all([self._async_engine, self._pg_pool or not settings.POSTGRES_RAW_POOL_ENABLED, self._cb_cluster]):
              logger.warning("One or more non-critical database connections failed to initialize.")
         else:
             logger.info("All required database connections initialized successfully.")
 
+    async def _connect_postgres(self) -> None:
+        """Check the engine can reach Postgres and open the raw pool; failures are logged, not raised"""
+        try:
+            async with self.get_session() as session:
+                await session.execute(text("SELECT 1"))
+            logger.info(
+                f"SQLAlchemy engine ready (pool_size={settings.POSTGRES_POOL_SIZE}, "
+                f"max_overflow={settings.POSTGRES_MAX_OVERFLOW})"
+            )
+        except Exception as e:
+            logger.error(f"SQLAlchemy engine connection check failed: {e}")
+
+        if self._pg_pool is None:
+            try:
+                self._pg_pool = await self._create_pg_pool()
+                if self._pg_pool:
+                    async with self.get_pg_connection() as conn:
+                        await conn.fetchval("SELECT 1")
+                    logger.info(f"asyncpg pool ready (max_size={settings.POSTGRES_RAW_POOL_MAX_SIZE})")
+            except Exception as e:
+                logger.error(f"asyncpg pool initialization failed: {e}")
+                self._pg_pool = None
+
     @property
     def async_engine(self):
         if not self._async_engine:
             raise RuntimeError("Database engine not initialized. Call connect_all() first.")
         return self._async_engine
 
-    @property
-    def async_session(self):
-        if not self._async_session:
-            raise RuntimeError("SQLAlchemy session not initialized")
-        return self._async_session
-
     async def test_connections(self) -> bool:
         """Test all database connections"""
         success = True
@@ -306,22 +368,12 @@ class Database:
             logger.info(f"  User: {settings.POSTGRES_USER}")
             logger.info(f"  DSN: {settings.POSTGRES_DSN_POSEY}")
             
-            def connect():
-                self._pg_pool = asyncpg.create_pool(
-                    dsn=settings.POSTGRES_DSN_POSEY,
-                    min_size=1,
-                    max_size=10,
-                    timeout=5
-                )
-            
-            # Run the sync code in a thread pool
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, connect)
+            async with self.get_session() as session:
+                await session.execute(text("SELECT 1"))
             logger.info("PostgreSQL connection established successfully")
         except Exception as e:
             logger.error(f"PostgreSQL connection failed: {type(e).__name__} - {str(e)}")
             logger.error(f"PostgreSQL DSN: {settings.POSTGRES_DSN_POSEY}")
-            self._pg_pool = None
             raise
 
     async def _test_couchbase_connection(self):
@@ -381,9 +433,10 @@ class Database:
     async def close_all(self):
         """Close all database connections"""
         try:
-            if self.pg_pool:
+            if self._pg_pool:
                 logger.info("Closing PostgreSQL connection pool")
-                await self.pg_pool.close()
+                await self._pg_pool.close()
+                self._pg_pool = None
             
             if self._cb_cluster:
                 logger.info("Closing Couchbase connection")
@@ -410,36 +463,97 @@ class Database:
         """Get a PostgreSQL connection from the pool"""
         if not self._pg_pool:
             raise RuntimeError("PostgreSQL connection pool not initialized")
-        conn = await self._pg_pool.acquire()
+        started = time.perf_counter()
+        conn = await self._pg_pool.acquire(timeout=settings.POSTGRES_POOL_TIMEOUT_SECONDS)
+        self._pg_pool_wait.observe(time.perf_counter() - started)
         try:
             yield conn
         finally:
-            await self._pg_pool.release(conn) 
+            await self._pg_pool.release(conn)
+
+    # Names used by scripts that were written against app.db.connection
+    get_pg_conn = get_pg_connection
 
     async def get_db(self) -> AsyncGenerator[AsyncSession, None]:
         """Get database session"""
-        async with self._async_session() as session:
+        async with self.session() as session:
+            yield session
+
+    @asynccontextmanager
+    async def session(self) -> AsyncGenerator[AsyncSession, None]:
+        """Session that is rolled back if the block raises"""
+        async with self.get_session() as session:
             try:
                 yield session
-            finally:
-                await session.close()
+            except Exception:
+                await session.rollback()
+                raise
 
+    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1))
     async def connect(self):
-        """Connect to database"""
-        # Create tables if they don't exist
-        # Note: In production, use alembic migrations instead
-        from app.models.db import Base
-        async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        """Connect to Postgres only (for scripts); retried while the database starts up"""
+        async with self.get_session() as session:
+            await session.execute(text("SELECT 1"))
+        if self._pg_pool is None:
+            self._pg_pool = await self._create_pg_pool()
 
     async def disconnect(self):
-        """Disconnect from database"""
-        await self.engine.dispose()
+        """Close the Postgres pools"""
+        if self._pg_pool:
+            await self._pg_pool.close()
+            self._pg_pool = None
+        await self._async_engine.dispose()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Utilization and checkout wait histograms for the engine pool and the raw asyncpg pool"""
+        pool = self._async_engine.pool
+        capacity = settings.POSTGRES_POOL_SIZE + settings.POSTGRES_MAX_OVERFLOW
+        checked_out = pool.checkedout()
+        stats: Dict[str, Any] = {
+            "sqlalchemy": {
+                "size": pool.size(),
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "capacity": capacity,
+                "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+                "checkout_timeouts": InstrumentedAsyncQueuePool.checkout_timeouts,
+                "checkout_wait_seconds": InstrumentedAsyncQueuePool.checkout_wait.snapshot()
+            },
+            "asyncpg": None
+        }
+        if self._pg_pool:
+            size = self._pg_pool.get_size()
+            in_use = size - self._pg_pool.get_idle_size()
+            max_size = self._pg_pool.get_max_size()
+            stats["asyncpg"] = {
+                "size": size,
+                "in_use": in_use,
+                "max_size": max_size,
+                "utilization": round(in_use / max_size, 3) if max_size else 0.0,
+                "checkout_wait_seconds": self._pg_pool_wait.snapshot()
+            }
+        return stats
+
+    async def increment_media_usage(
+        self,
+        agent_id: UUID,
+        media_type: str,
+        prompt: str,
+        result_url: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Increment media usage and log history (buffered, see app.utils.media_quota)"""
+        from app.utils.media_quota import media_quota
+        await media_quota.record_usage(agent_id, media_type, prompt, result_url, metadata)
+
+    async def check_media_quota(self, agent_id: UUID, media_type: str) -> bool:
+        """Check if agent has exceeded media quota (served from leased in-process counters)"""
+        from app.utils.media_quota import media_quota
+        return await media_quota.check(agent_id, media_type)
 
     def get_session(self):
         """Get an async session"""
-        if not self._async_session_factory:
-            raise RuntimeError("Database not initialized. Call connect_all() first.")
         return self._async_session_factory()
 
     async def connect_qdrant(self) -> bool:
@@ -465,7 +579,8 @@ class Database:
             logger.debug("AsyncQdrantClient.get_collections() health check successful.")
             
             # Assign to self._qdrant_client ONLY after successful health check
-            self._qdrant_client = client 
+            from app.utils.telemetry import TimedQdrantClient
+            self._qdrant_client = TimedQdrantClient(client)
             logger.info(f"Async Qdrant Client initialized and health check successful.")
             return True # Indicate success
 
@@ -486,4 +601,4 @@ class Database:
 db = Database()
 
 # Export the database instance
-__all__ = ['db']
+__all__ = ['db', 'Database', 'LatencyHistogram']
@@ -0,0 +1,220 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import logger, db
+from app.config.settings import settings
+import asyncio
+import time
+
+# One cheap round trip that changes whenever a provider, model or minion config is added, edited or removed
+FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT count(*) FROM llm_providers),
+        (SELECT max(updated_at) FROM llm_providers),
+        (SELECT count(*) FROM llm_models),
+        (SELECT max(updated_at) FROM llm_models),
+        (SELECT count(*) FROM minion_llm_configs),
+        (SELECT max(COALESCE(updated_at, created_at)) FROM minion_llm_configs)
+""")
+
+PROVIDERS_SQL = text("SELECT id, name, slug, base_url, is_active FROM llm_providers")
+MODELS_SQL = text("""
+    SELECT id, provider_id, name, model_id, context_window, max_tokens, is_active,
+           capabilities, supports_tool_use, config
+    FROM llm_models
+""")
+MINION_CONFIGS_SQL = text("""
+    SELECT id, config_key, llm_model_id, temperature, max_tokens, top_p,
+           frequency_penalty, presence_penalty, additional_settings
+    FROM minion_llm_configs
+""")
+
+def _frozen(value: Optional[Mapping[str, Any]]) -> Optional[Mapping[str, Any]]:
+    return MappingProxyType(dict(value)) if value else None
+
+@dataclass(frozen=True)
+class CatalogProvider:
+    id: Any
+    name: str
+    slug: str
+    api_base_url: Optional[str] = None
+    is_active: bool = True
+
+@dataclass(frozen=True)
+class CatalogModel:
+    id: Any
+    name: str
+    model_id: str
+    provider: Optional[CatalogProvider]
+    context_window: int = 0
+    max_tokens: Optional[int] = None
+    is_active: bool = False
+    capabilities: Tuple[str, ...] = ()
+    supports_tool_use: bool = False
+    config: Optional[Mapping[str, Any]] = None
+
+@dataclass(frozen=True)
+class CatalogMinionConfig:
+    """Read-only stand-in for a MinionLLMConfig row with its model and provider loaded.
+
+    Exposes the same attributes (``config_key``, ``llm_model.model_id``,
+    ``llm_model.provider.slug`` ...) so it can be passed wherever the ORM
+    object was.
+    """
+    id: Any
+    config_key: str
+    llm_model: Optional[CatalogModel]
+    temperature: float = 0.7
+    max_tokens: int = 1000
+    top_p: float = 0.95
+    frequency_penalty: float = 0.0
+    presence_penalty: float = 0.0
+    additional_settings: Optional[Mapping[str, Any]] = None
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    fingerprint: Tuple[Any, ...]
+    minion_configs: Mapping[str, CatalogMinionConfig] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.time)
+
+class LLMConfigCatalog:
+    """In-memory snapshot of minion LLM configs with their models and providers.
+
+    The whole catalog is loaded with three plain selects and replaced, never
+    mutated, so lookups need no database access and callers can hold on to
+    the objects they get. Every snapshot gets a new version number.
+
+    The admin routers call ``invalidate()`` after writes, which makes this
+    worker reload on its next lookup. Other workers compare a fingerprint of
+    the three tables at most every LLM_CATALOG_CHECK_SECONDS and reload when
+    it changed.
+    """
+
+    def __init__(self, check_interval: float = None):
+        self.check_interval = settings.LLM_CATALOG_CHECK_SECONDS if check_interval is None else check_interval
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self._stale = True
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    def invalidate(self) -> None:
+        """Reload on the next lookup (call after committing LLM provider/model/config changes)"""
+        self._stale = True
+
+    async def _load(self, session: AsyncSession, fingerprint: Tuple[Any, ...]) -> CatalogSnapshot:
+        providers = {
+            row.id: CatalogProvider(
+                id=row.id,
+                name=row.name,
+                slug=row.slug,
+                api_base_url=row.base_url,
+                is_active=row.is_active
+            )
+            for row in (await session.execute(PROVIDERS_SQL)).fetchall()
+        }
+        models = {
+            row.id: CatalogModel(
+                id=row.id,
+                name=row.name,
+                model_id=row.model_id,
+                provider=providers.get(row.provider_id),
+                context_window=row.context_window or 0,
+                max_tokens=row.max_tokens,
+                is_active=row.is_active,
+                capabilities=tuple(row.capabilities or ()),
+                supports_tool_use=row.supports_tool_use,
+                config=_frozen(row.config)
+            )
+            for row in (await session.execute(MODELS_SQL)).fetchall()
+        }
+        configs = {
+            row.config_key: CatalogMinionConfig(
+                id=row.id,
+                config_key=row.config_key,
+                llm_model=models.get(row.llm_model_id),
+                temperature=row.temperature if row.temperature is not None else 0.7,
+                max_tokens=row.max_tokens if row.max_tokens is not None else 1000,
+                top_p=row.top_p if row.top_p is not None else 0.95,
+                frequency_penalty=row.frequency_penalty if row.frequency_penalty is not None else 0.0,
+                presence_penalty=row.presence_penalty if row.presence_penalty is not None else 0.0,
+                additional_settings=_frozen(row.additional_settings)
+            )
+            for row in (await session.execute(MINION_CONFIGS_SQL)).fetchall()
+        }
+
+        self._version += 1
+        snapshot = CatalogSnapshot(
+            version=self._version,
+            fingerprint=fingerprint,
+            minion_configs=MappingProxyType(configs)
+        )
+        logger.info(f"Loaded LLM config catalog v{snapshot.version}: {len(providers)} providers, {len(models)} models, {len(configs)} minion configs")
+        return snapshot
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        result = await session.execute(FINGERPRINT_SQL)
+        fingerprint = tuple(result.fetchone())
+        self._checked_at = time.monotonic()
+        if self._stale or self._snapshot is None or fingerprint != self._snapshot.fingerprint:
+            self._snapshot = await self._load(session, fingerprint)
+        self._stale = False
+
+    async def snapshot(self, session: Optional[AsyncSession] = None) -> Optional[CatalogSnapshot]:
+        """Current snapshot, reloading first if invalidated or the tables changed.
+
+        If a reload fails the previous snapshot keeps being served.
+        """
+        due = self._stale or self._snapshot is None or time.monotonic() - self._checked_at >= self.check_interval
+        if not due:
+            return self._snapshot
+
+        async with self._lock:
+            due = self._stale or self._snapshot is None or time.monotonic() - self._checked_at >= self.check_interval
+            if due:
+                try:
+                    if session is not None:
+                        await self._refresh(session)
+                    else:
+                        async with db.get_session() as new_session:
+                            await self._refresh(new_session)
+                except Exception as e:
+                    # Don't retry on every lookup while the database is struggling
+                    self._checked_at = time.monotonic()
+                    logger.error(f"Failed to refresh LLM config catalog (serving v{self.version}): {e}")
+        return self._snapshot
+
+    async def get_minion_config(
+        self,
+        config_key: str,
+        fallback_to_default: bool = True,
+        session: Optional[AsyncSession] = None
+    ) -> Optional[CatalogMinionConfig]:
+        """Minion LLM config for ``config_key``, or the 'default' config when allowed"""
+        snapshot = await self.snapshot(session)
+        if snapshot is None:
+            return None
+        config = snapshot.minion_configs.get(config_key)
+        if config is None and fallback_to_default and config_key != "default":
+            logger.debug(f"No LLM config for key '{config_key}', using 'default'")
+            config = snapshot.minion_configs.get("default")
+        return config
+
+# Shared instance for this worker
+llm_catalog = LLMConfigCatalog()
+
+__all__ = [
+    'LLMConfigCatalog',
+    'CatalogProvider',
+    'CatalogModel',
+    'CatalogMinionConfig',
+    'CatalogSnapshot',
+    'llm_catalog'
+]
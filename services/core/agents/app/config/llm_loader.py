@@ -1,12 +1,8 @@
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
 
-from app.db.models.minion_llm_config import MinionLLMConfig
-from app.db.models.llm_model import LLMModel
-from app.db.models.llm_provider import LLMProvider
+from app.config.llm_catalog import llm_catalog
 from app.config import logger
 from app.config.defaults import LLM_CONFIG
 
@@ -29,11 +25,11 @@ class LLMDatabaseConfig(BaseModel):
 
 async def get_llm_config_from_db(db: AsyncSession, config_key: str) -> Optional[LLMDatabaseConfig]:
     """
-    Fetch LLM configuration from database by key
+    Look up LLM configuration by key in the LLM config catalog
     Falls back to 'default' key if specified key not found
     
     Args:
-        db: Database session
+        db: Database session (only used if the catalog needs reloading)
         config_key: Configuration key to look up
         
     Returns:
@@ -41,34 +37,10 @@ async def get_llm_config_from_db(db: AsyncSession, config_key: str) -> Optional[
     """
     
     try:
-        # Try to fetch specified key, with joins for provider/model relationships
-        stmt = (
-            select(MinionLLMConfig)
-            .options(
-                joinedload(MinionLLMConfig.llm_model).joinedload(LLMModel.provider)
-            )
-            .where(MinionLLMConfig.config_key == config_key)
-        )
-        
-        result = await db.execute(stmt)
-        config = result.scalar_one_or_none()
-        
-        # If not found and key wasn't already 'default', try the 'default' key
-        if not config and config_key != 'default':
+        config = await llm_catalog.get_minion_config(config_key, fallback_to_default=True, session=db)
+        if config and config.config_key != config_key:
             logger.warning(f"LLM config key '{config_key}' not found. Falling back to 'default'.")
             
-            # Re-query with 'default' key
-            stmt = (
-                select(MinionLLMConfig)
-                .options(
-                    joinedload(MinionLLMConfig.llm_model).joinedload(LLMModel.provider)
-                )
-                .where(MinionLLMConfig.config_key == 'default')
-            )
-            
-            result = await db.execute(stmt)
-            config = result.scalar_one_or_none()
-            
         # If config is found, convert to pydantic model
         if config:
             # --- Add validation checks --- 
@@ -86,7 +58,7 @@ async def get_llm_config_from_db(db: AsyncSession, config_key: str) -> Optional[
                  return None
             # --- End validation checks ---
             
-            logger.info(f"Loaded LLM config for key: '{config.config_key}' -> Model: {config.llm_model.provider.name}/{config.llm_model.model_id}")
+            logger.debug(f"Resolved LLM config for key: '{config.config_key}' -> Model: {config.llm_model.provider.name}/{config.llm_model.model_id} (catalog v{llm_catalog.version})")
             
             # Create and return Pydantic model, ensuring provider/model info is properly included
             return LLMDatabaseConfig(
@@ -96,12 +68,12 @@ async def get_llm_config_from_db(db: AsyncSession, config_key: str) -> Optional[
                 top_p=config.top_p,
                 frequency_penalty=config.frequency_penalty,
                 presence_penalty=config.presence_penalty,
-                additional_settings=config.additional_settings,
+                additional_settings=dict(config.additional_settings) if config.additional_settings else None,
                 # Important: Set provider and model fields correctly
                 provider_slug=config.llm_model.provider.slug,
                 provider_name=config.llm_model.provider.name,
                 model_id=config.llm_model.model_id,
-                api_base_url=config.llm_model.provider.base_url
+                api_base_url=config.llm_model.provider.api_base_url
             )
             
         # No config found for this key or 'default'
@@ -1,19 +1,100 @@
+import json
 import logging
 import logging.config
+import pprint
+import random
 import sys
-from typing import Optional
+from typing import Any, Dict, Optional
 
 # Create logger
 logger = logging.getLogger("app")
 
+# Hot-path modules log through their own child loggers (logging.getLogger(__name__)), so their
+# level can be set per module with LOG_LEVELS; records still go out through the "app" handlers.
+
+MAX_FIELD_CHARS = 2000
+
+# Pass as ``extra=SAMPLED`` on high-volume records; only LOG_SAMPLE_RATE of them are emitted
+SAMPLED = {"sampled": True}
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+def _cap(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+class LogPayload:
+    """Log argument that renders (and size-caps) its value only if the record is emitted.
+
+    Use with %-style arguments, never inside an f-string:
+    ``logger.debug("Deps:\\n%s", LogPayload(deps, pretty=True))``
+    """
+
+    __slots__ = ("value", "limit", "pretty")
+
+    def __init__(self, value: Any, limit: Optional[int] = None, pretty: bool = False):
+        self.value = value
+        self.limit = limit
+        self.pretty = pretty
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, str):
+            text = value
+        elif self.pretty:
+            text = pprint.pformat(value, indent=2, width=120)
+        else:
+            text = repr(value)
+        return _cap(text, self.limit or MAX_FIELD_CHARS)
+
+    __repr__ = __str__
+
+class SamplingFilter(logging.Filter):
+    """Keeps ``rate`` of the records marked with extra=SAMPLED and all unmarked ones"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not getattr(record, "sampled", False) or random.random() < self.rate
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields become top-level keys, capped like payloads"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": _cap(record.getMessage(), MAX_FIELD_CHARS * 4),
+            "location": f"{record.filename}:{record.lineno}"
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRIBUTES or key == "sampled":
+                continue
+            data[key] = value if isinstance(value, (int, float, bool, type(None))) else _cap(str(value), MAX_FIELD_CHARS)
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
 def setup_logging(log_level: Optional[str] = None) -> None:
     """
     Setup logging configuration with specific logger levels and formatters
+
+    Module levels come from settings.LOG_LEVELS; nothing is forced to DEBUG.
     """
+    global MAX_FIELD_CHARS
+    from app.config.settings import settings
+
     if log_level:
         level = getattr(logging, log_level.upper())
     else:
         level = logging.INFO
+    MAX_FIELD_CHARS = settings.LOG_MAX_FIELD_CHARS
+    formatter = "json" if settings.LOG_JSON else "default"
 
     # Define logging configuration
     logging_config = {
@@ -24,20 +105,21 @@ def setup_logging(log_level: Optional[str] = None) -> None:
                 "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
-            "detailed": {
-                "format": "%(asctime)s [%(levelname)s] %(name)s (%(filename)s:%(lineno)d): %(message)s",
-                "datefmt": "%Y-%m-%d %H:%M:%S",
+            "json": {
+                "()": StructuredFormatter,
+            }
+        },
+        "filters": {
+            "sampling": {
+                "()": SamplingFilter,
+                "rate": settings.LOG_SAMPLE_RATE,
             }
         },
         "handlers": {
             "console": {
                 "class": "logging.StreamHandler",
-                "formatter": "default",
-                "stream": "ext://sys.stdout",
-            },
-            "detailed_console": {
-                "class": "logging.StreamHandler",
-                "formatter": "detailed",
+                "formatter": formatter,
+                "filters": ["sampling"],
                 "stream": "ext://sys.stdout",
             }
         },
@@ -46,47 +128,17 @@ def setup_logging(log_level: Optional[str] = None) -> None:
                 "handlers": ["console"],
                 "level": level,
             },
-            "app": {  # Main app logger
+            "app": {  # Main app logger; module loggers (app.*) propagate to it
                 "handlers": ["console"],
                 "level": level,
                 "propagate": False,
             },
-            "app.orchestrators": {  # Orchestrator-specific logger
-                "handlers": ["detailed_console"],
-                "level": logging.DEBUG,
-                "propagate": False,
-            },
-            "app.utils.agent": {  # Agent utilities logger
-                "handlers": ["detailed_console"],
-                "level": logging.DEBUG,
-                "propagate": False,
-            },
-            "app.utils.message_handler": {  # Message handler logger
-                "handlers": ["detailed_console"],
-                "level": logging.DEBUG,
-                "propagate": False,
-            },
-            "app.llm": {  # LLM-specific logger
-                "handlers": ["detailed_console"],
-                "level": logging.DEBUG,
-                "propagate": False,
-            },
-            "app.llm.adapters": {  # LLM adapters logger
-                "handlers": ["console"],
-                "level": logging.INFO,
-                "propagate": False,
-            },
-            "app.config": {  # Config logger
-                "handlers": ["console"],
-                "level": logging.INFO,
-                "propagate": False,
-            },
-            "sqlalchemy.engine": {  # SQL logging
+            "sqlalchemy": {  # All SQLAlchemy components
                 "handlers": ["console"],
                 "level": logging.ERROR,
                 "propagate": False,
             },
-            "sqlalchemy": {  # All SQLAlchemy components
+            "sqlalchemy.engine": {  # SQL logging
                 "handlers": ["console"],
                 "level": logging.ERROR,
                 "propagate": False,
@@ -104,26 +156,15 @@ def setup_logging(log_level: Optional[str] = None) -> None:
         }
     }
 
+    # Per-module overrides, e.g. {"app.orchestrators": "DEBUG"}
+    for name, name_level in settings.LOG_LEVELS.items():
+        logging_config["loggers"].setdefault(name, {})["level"] = name_level.upper()
+
     # Apply configuration
     logging.config.dictConfig(logging_config)
 
-    # Set specific module loggers to DEBUG level regardless of overall level
-    critical_modules = ["app.orchestrators.posey", "app.utils.agent", "app.utils.message_handler"]
-    for module in critical_modules:
-        module_logger = logging.getLogger(module)
-        module_logger.setLevel(logging.DEBUG)
-        if module_logger.level != logging.DEBUG:
-            logger.warning(f"Failed to set {module} logger level to DEBUG, current level: {module_logger.level}")
-        else:
-            logger.info(f"Successfully set {module} logger level to DEBUG")
-
     # Log startup message
-    logger.info(f"Logging configured with level: {log_level or 'INFO'}")
-    
-    # Print logging levels for key modules
-    for module_name in ["app", "app.orchestrators", "app.utils.agent"]:
-        module_logger = logging.getLogger(module_name)
-        logger.info(f"Logger '{module_name}' level: {logging.getLevelName(module_logger.level)}")
+    logger.info(f"Logging configured with level: {log_level or 'INFO'}, module levels: {settings.LOG_LEVELS or 'none'}")
 
 # Export logger and setup function
-__all__ = ["logger", "setup_logging"] 
+__all__ = ["logger", "setup_logging", "LogPayload", "SamplingFilter", "StructuredFormatter", "SAMPLED"]
@@ -11,7 +11,7 @@ import asyncio
 import json
 from datetime import datetime
 
-from typing import Optional, List, Annotated, ClassVar, TypedDict
+from typing import Optional, List, Dict, Any, Annotated, ClassVar, TypedDict
 from pathlib import Path
 from functools import lru_cache
 
@@ -107,8 +107,19 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str
     POSTGRES_PORT: str
     POSTGRES_DSN_POSEY: str = ""
+    # Connection pools (see app/config/database.py). One SQLAlchemy engine per worker;
+    # the raw asyncpg pool is only for code that needs asyncpg connections directly. Off by
+    # default: /migrations/run is the only such code and opens a temporary pool without it.
     POSTGRES_POOL_SIZE: int = 5
     POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT_SECONDS: float = 30.0
+    POSTGRES_POOL_RECYCLE_SECONDS: int = 1800
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    POSTGRES_COMMAND_TIMEOUT_SECONDS: float = 60.0
+    POSTGRES_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    POSTGRES_RAW_POOL_ENABLED: bool = False
+    POSTGRES_RAW_POOL_MIN_SIZE: int = 1
+    POSTGRES_RAW_POOL_MAX_SIZE: int = 5
 
     # Feature flags
     run_migrations: bool = True
@@ -119,8 +130,13 @@ class Settings(BaseSettings):
     # CORS settings
     ALLOWED_ORIGINS: list = ["*"]
 
-    # Logging
+    # Logging (app/config/logging.py)
     LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False # One JSON object per line instead of plain text
+    # Per-logger levels, e.g. {"app.orchestrators": "DEBUG", "app.minions.voyager": "WARNING"}
+    LOG_LEVELS: Dict[str, str] = Field(default_factory=dict)
+    LOG_MAX_FIELD_CHARS: int = 2000 # Cap for payloads rendered into log lines
+    LOG_SAMPLE_RATE: float = 0.05 # Share of high-volume records (extra=SAMPLED) that are kept
 
     class Config:
         """Configuration for Pydantic settings."""
@@ -229,15 +245,121 @@ class Settings(BaseSettings):
         }
     }
 
+    # Media quota leasing (see app/utils/media_quota.py)
+    MEDIA_QUOTA_LEASE_SIZE: int = 5
+    MEDIA_QUOTA_FLUSH_SECONDS: int = 30
+    MEDIA_QUOTA_IDLE_RELEASE_SECONDS: int = 300
+    MEDIA_QUOTA_RESERVATION_SECONDS: int = 600
+
+    # User preferences cache (see app/utils/preferences_cache.py)
+    USER_PREFERENCES_CACHE_TTL_SECONDS: int = 300
+    USER_PREFERENCES_CACHE_SIZE: int = 10000
+
+    # LLM config catalog (see app/config/llm_catalog.py): how often each worker checks for changes
+    LLM_CATALOG_CHECK_SECONDS: float = 5.0
+
     # Add to existing settings
     VOYAGER_URL: str = "http://posey-voyager:7777"
 
+    # Source credibility cache (per domain)
+    CREDIBILITY_CACHE_TTL_HOURS: int = 24 * 7
+    CREDIBILITY_MEMORY_CACHE_SIZE: int = 2048
+
     EMBEDDING_DIMENSIONS: int = 1536  # Default dimension for text embeddings
+    EMBEDDING_MODEL: str = "thenlper/gte-large"
+    EMBEDDING_BATCH_SIZE: int = 32
+
+    # Scraped content index (Qdrant)
+    SCRAPED_CONTENT_COLLECTION: str = "scraped_content"
+    SCRAPED_CONTENT_MAX_AGE_HOURS: int = 72
+    SCRAPED_CONTENT_CHUNK_SIZE: int = 1200
+    SCRAPED_CONTENT_CHUNK_OVERLAP: int = 200
+    SCRAPED_CONTENT_MIN_SCORE: float = 0.75
+
+    # Conversation message search (app/utils/conversation_search.py)
+    CONVERSATION_SEARCH_MAX_PAGE_SIZE: int = 100
+    CONVERSATION_SEARCH_MEMORY_LIMIT: int = 5
+    CONVERSATION_SEARCH_MEMORY_MIN_SCORE: float = 0.5
 
     # Add the missing setting for the Auth Service URL
     AUTH_API_DOMAIN: str = "http://localhost:9999"
     AUTH_SERVICE_INTERNAL_URL: str = "http://posey-auth:9999"
 
+    # Rate limiting (token buckets, see app/middleware/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE: str = "memory" # "memory" or "redis"
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_POLICIES: List[Dict[str, Any]] = Field(default_factory=lambda: [
+        # LLM-backed orchestration is the expensive path
+        {"name": "orchestrator", "path_prefix": "/orchestrator", "methods": ["POST"], "key": "user", "requests_per_minute": 30, "burst": 10},
+        {"name": "default", "path_prefix": "/", "key": "user", "requests_per_minute": 600, "burst": 100},
+    ])
+
+    # Session verification (AuthMiddleware)
+    AUTH_SESSION_CACHE_TTL_SECONDS: int = 60
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS: int = 5
+    AUTH_PROFILE_CACHE_SECONDS: int = 900
+    AUTH_SESSION_CACHE_SIZE: int = 10000
+    AUTH_LOCAL_JWT_VERIFY: bool = True
+    AUTH_JWKS_PATH: str = "/auth/jwt/jwks.json"
+    AUTH_JWKS_CACHE_SECONDS: int = 3600
+    AUTH_JWT_ALGORITHMS: List[str] = ["RS256"]
+
+    # Prometheus metrics (app/utils/telemetry.py, served at /metrics)
+    METRICS_ENABLED: bool = True
+
+    # Per-request timing trees (app/utils/spans.py)
+    TIMINGS_DEBUG_HEADER: str = "X-Posey-Timings" # Send "1" to get metadata.timings in the response
+    TIMINGS_LOG_SAMPLE_RATE: float = 0.01
+    TIMINGS_LOG_SLOW_SECONDS: float = 30.0
+
+    # Event loop stall detection (app/utils/loop_monitor.py, reported at /health/loop)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_STALL_THRESHOLD_SECONDS: float = 0.25
+    LOOP_MONITOR_MAX_OFFENDERS: int = 50
+    LOOP_MONITOR_STACK_DEPTH: int = 15
+
+    # Record/replay of LLM, voyager and image provider calls (app/utils/cassettes.py)
+    CASSETTE_MODE: str = "off" # off, record or replay
+    CASSETTE_PATH: str = "cassettes/recording.jsonl"
+    CASSETTE_LATENCY_SCALE: float = 1.0 # Replay waits recorded latency times this; 0 answers immediately
+    CASSETTE_STRICT: bool = False # Replay only exact request matches
+    CASSETTE_FLUSH_EVERY: int = 20 # Recordings buffered before appending to the file
+
+    # Logfire tracing (app/config/tracing.py)
+    TRACING_ENABLED: bool = True
+    TRACE_HEAD_SAMPLE_RATE: float = 1.0 # Fraction of traces recorded at all
+    TRACE_TAIL_SAMPLE_RATE: float = 0.1 # Fraction of fast, error-free recorded traces that are exported
+    TRACE_KEEP_SLOW_SECONDS: float = 5.0 # Traces at least this long are always exported
+    TRACE_KEEP_LEVEL: str = "warn" # Traces with a span at this level or above are always exported
+    TRACE_MAX_ATTRIBUTE_CHARS: int = 2048 # Longer span attribute values are truncated
+    TRACE_MAX_ATTRIBUTES: int = 128
+    TRACE_HTTPX_CAPTURE_HEADERS: bool = False
+    TRACE_HTTPX_CAPTURE_BODIES: bool = False
+    # Prompts, completions and tool arguments on agent spans. Only honoured by pydantic-ai versions with
+    # InstrumentationSettings(include_content=...); on the pinned 0.0.55 content is always recorded.
+    TRACE_AGENT_CAPTURE_CONTENT: bool = False
+
+    # Background health probes (app/utils/health_prober.py, served from /health)
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 15.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    HEALTH_LLM_PROBE_INTERVAL_SECONDS: float = 60.0
+    HEALTH_EMBEDDING_WARM_TIMEOUT_SECONDS: float = 600.0 # First load of the embedding model
+    HEALTH_STALE_SECONDS: float = 120.0 # /health/live fails when a probe hasn't finished in this long
+    # Probes that must pass for /health/ready; any other failing probe only reports the pod as degraded.
+    # Chat needs nothing but Postgres, so a Qdrant outage must not take every pod out of the Service.
+    HEALTH_READINESS_CHECKS: List[str] = ["postgres"]
+
+    # On-demand sampling profiler (app/utils/profiler.py, POST /admin/profiler)
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_DEFAULT_INTERVAL_MS: float = 10.0
+    PROFILER_MIN_INTERVAL_MS: float = 1.0
+    PROFILER_MAX_OVERHEAD: float = 0.05 # Fraction of wall time the sampler may hold the GIL before it backs off
+    PROFILER_MAX_DEPTH: int = 128
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.POSTGRES_DSN_POSEY:
@@ -0,0 +1,100 @@
+import os
+from typing import Any, Dict
+
+from app.config.logging import logger
+
+def _limit_span_attributes() -> None:
+    """Cap attribute sizes on every span through the OpenTelemetry SDK's span limits.
+
+    Logfire builds its TracerProvider with default SpanLimits, which read
+    these variables, so they must be set before ``logfire.configure``. An
+    explicit OTEL_* value in the environment wins.
+    """
+    from app.config.settings import settings
+    os.environ.setdefault("OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT", str(settings.TRACE_MAX_ATTRIBUTE_CHARS))
+    os.environ.setdefault("OTEL_SPAN_ATTRIBUTE_VALUE_LENGTH_LIMIT", str(settings.TRACE_MAX_ATTRIBUTE_CHARS))
+    os.environ.setdefault("OTEL_SPAN_ATTRIBUTE_COUNT_LIMIT", str(settings.TRACE_MAX_ATTRIBUTES))
+
+def _sampling_options() -> Any:
+    """Head sampling, then tail sampling that keeps every slow or errored trace, or None if unsupported"""
+    import logfire
+    from app.config.settings import settings
+
+    sampling = getattr(logfire, "SamplingOptions", None)
+    if sampling is None:
+        logger.warning("This logfire version has no SamplingOptions; every trace is kept")
+        return None
+    return sampling.level_or_duration(
+        head=settings.TRACE_HEAD_SAMPLE_RATE,
+        level_threshold=settings.TRACE_KEEP_LEVEL,
+        duration_threshold=settings.TRACE_KEEP_SLOW_SECONDS,
+        background_rate=settings.TRACE_TAIL_SAMPLE_RATE
+    )
+
+def _instrument_agents() -> bool:
+    """Instrument all pydantic-ai agents; returns whether message content ends up on agent spans
+
+    Leaving content out needs InstrumentationSettings(include_content=...),
+    which the pinned pydantic-ai 0.0.55 doesn't have: there
+    TRACE_AGENT_CAPTURE_CONTENT=False has no effect and full prompts are
+    recorded, bounded only by TRACE_MAX_ATTRIBUTE_CHARS.
+    """
+    from pydantic_ai import Agent
+    from app.config.settings import settings
+
+    if settings.TRACE_AGENT_CAPTURE_CONTENT:
+        Agent.instrument_all()
+        return True
+    try:
+        from pydantic_ai.models.instrumented import InstrumentationSettings
+        Agent.instrument_all(InstrumentationSettings(include_content=False))
+        return False
+    except (ImportError, TypeError):
+        # Expected on the pinned version; setup_tracing runs once per process, so this is logged once
+        logger.warning(
+            "TRACE_AGENT_CAPTURE_CONTENT=false has no effect with this pydantic-ai version: agent spans "
+            f"record full prompts and completions, capped at {settings.TRACE_MAX_ATTRIBUTE_CHARS} chars per attribute"
+        )
+        Agent.instrument_all()
+        return True
+
+def setup_tracing() -> Dict[str, Any]:
+    """
+    Configure Logfire and instrument httpx and pydantic-ai agents from settings
+
+    Returns the effective configuration, for the startup log.
+    """
+    import logfire
+    from app.config.settings import settings
+
+    if not settings.TRACING_ENABLED:
+        logger.info("Tracing disabled (TRACING_ENABLED=false)")
+        return {"enabled": False}
+
+    _limit_span_attributes()
+    sampling = _sampling_options()
+    if sampling is not None:
+        logfire.configure(sampling=sampling)
+    else:
+        logfire.configure()
+
+    logfire.instrument_httpx(
+        capture_headers=settings.TRACE_HTTPX_CAPTURE_HEADERS,
+        capture_request_body=settings.TRACE_HTTPX_CAPTURE_BODIES,
+        capture_response_body=settings.TRACE_HTTPX_CAPTURE_BODIES
+    )
+    agent_content = _instrument_agents()
+
+    return {
+        "enabled": True,
+        "head_sample_rate": settings.TRACE_HEAD_SAMPLE_RATE,
+        "tail_sample_rate": settings.TRACE_TAIL_SAMPLE_RATE if sampling is not None else 1.0,
+        "keep_slow_seconds": settings.TRACE_KEEP_SLOW_SECONDS,
+        "keep_level": settings.TRACE_KEEP_LEVEL,
+        "max_attribute_chars": settings.TRACE_MAX_ATTRIBUTE_CHARS,
+        "httpx_headers": settings.TRACE_HTTPX_CAPTURE_HEADERS,
+        "httpx_bodies": settings.TRACE_HTTPX_CAPTURE_BODIES,
+        "agent_content": agent_content
+    }
+
+__all__ = ["setup_tracing"]
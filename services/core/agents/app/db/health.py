@@ -1,7 +1,6 @@
 from typing import Dict, Any
 import asyncpg
-from app.config import settings, logger
-from app.db.connection import DatabaseConnection
+from app.config import settings, logger, db
 
 async def check_database_health() -> Dict[str, Any]:
     """Check database connectivity and basic functionality"""
@@ -32,9 +31,9 @@ async def check_database_health() -> Dict[str, Any]:
         status["migrations"]["applied_count"] = result
         
         # Check connection pool
-        pool = await DatabaseConnection.get_pool()
-        status["postgres"]["pool_size"] = pool.get_size()
-        status["postgres"]["active_connections"] = pool.get_used_size()
+        pool_stats = db.pool_stats()["sqlalchemy"]
+        status["postgres"]["pool_size"] = pool_stats["size"]
+        status["postgres"]["active_connections"] = pool_stats["checked_out"]
         
         await conn.close()
     except Exception as e:
@@ -0,0 +1,12 @@
+-- Add source_credibility table: per-domain credibility scores shared across requests
+
+CREATE TABLE IF NOT EXISTS source_credibility (
+    domain VARCHAR(255) PRIMARY KEY,
+    score DOUBLE PRECISION NOT NULL,
+    reasoning TEXT,
+    evaluator VARCHAR(50) NOT NULL DEFAULT 'llm',
+    evaluated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_source_credibility_expires_at ON source_credibility (expires_at);
@@ -0,0 +1,9 @@
+-- Composite indexes for keyset pagination of conversations per user and messages per conversation.
+-- Row comparisons on (created_at, id) after an equality on the leading column are served directly
+-- from these indexes, in either direction.
+
+CREATE INDEX IF NOT EXISTS idx_conversations_user_created_id
+    ON conversations (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_messages_conversation_created_id
+    ON conversation_messages (conversation_id, created_at, id);
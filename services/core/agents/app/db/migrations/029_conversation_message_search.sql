@@ -0,0 +1,11 @@
+-- Full-text search over conversation messages.
+-- The tsvector is a stored generated column so it can never drift from content, and the GIN index
+-- serves @@ matches. The text search configuration here must match CONVERSATION_SEARCH_CONFIG in
+-- app/utils/conversation_search.py, otherwise queries can't use the index.
+
+ALTER TABLE conversation_messages
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_conversation_messages_search_vector
+    ON conversation_messages USING GIN (search_vector);
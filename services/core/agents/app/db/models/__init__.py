@@ -46,6 +46,7 @@ from .llm_api_key import LLMApiKey
 from .seed_version import SeedVersion
 from .agent_training_history import AgentTrainingHistory
 from .migration import Migration
+from .source_credibility import SourceCredibility
 
 # Import other models (add any missing ones here)
 # Example: from .conversation import ConversationMessage
@@ -121,4 +122,7 @@ __all__ = [
     "SeedVersion",
     "Migration",
     "AgentTrainingHistory",
+
+    # Source Credibility Models
+    "SourceCredibility",
 ] 
\ No newline at end of file
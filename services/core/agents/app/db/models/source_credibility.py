@@ -0,0 +1,18 @@
+from sqlalchemy import (
+    Column, String, Float, DateTime, Text, func
+)
+from app.db.base import Base
+
+class SourceCredibility(Base):
+    __tablename__ = "source_credibility"
+
+    # Domain as returned by app.utils.source_utils.get_domain (lowercased, no 'www.')
+    domain = Column(String(255), primary_key=True)
+    score = Column(Float, nullable=False)
+    reasoning = Column(Text, nullable=True)
+    evaluator = Column(String(50), nullable=False, server_default='llm')
+    evaluated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<SourceCredibility(domain='{self.domain}', score={self.score})>"
@@ -1,31 +1,29 @@
 import asyncpg
-from app.config import logger, settings
+from app.config import logger, db, settings
 
 async def get_pool():
-    """Create and return a connection pool"""
+    """Return the shared asyncpg pool, or a short-lived one when POSTGRES_RAW_POOL_ENABLED is off
+
+    Pass the result to close_pool() when done; only the short-lived pool is closed there.
+    """
     try:
-        logger.info(f"Creating database pool with DSN: {settings.POSTGRES_DSN_POSEY}")
-        
-        pool = await asyncpg.create_pool(
-            dsn=settings.POSTGRES_DSN_POSEY,
-            min_size=2,
-            max_size=10,
-            command_timeout=60,
-            # Optional: Add SSL context if needed
-            # ssl=ssl_context,
+        if not db.pool:
+            await db.connect()
+        if db.pool:
+            return db.pool
+        logger.info("Raw asyncpg pool is disabled, opening a temporary one")
+        return await asyncpg.create_pool(
+            dsn=db._asyncpg_dsn(),
+            min_size=1,
+            max_size=2,
+            command_timeout=settings.POSTGRES_COMMAND_TIMEOUT_SECONDS,
+            timeout=settings.POSTGRES_CONNECT_TIMEOUT_SECONDS
         )
-        
-        # Test the connection
-        async with pool.acquire() as conn:
-            await conn.execute('SELECT 1')
-            logger.info("Database connection successful")
-            
-        return pool
     except Exception as e:
         logger.error(f"Error creating database pool: {str(e)}")
         raise
 
 async def close_pool(pool):
-    """Close the connection pool"""
-    if pool:
-        await pool.close() 
+    """Close a temporary pool from get_pool(); the shared pool is closed by db.close_all() at shutdown"""
+    if pool and pool is not db.pool:
+        await pool.close()
@@ -2,23 +2,28 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
-import logging
-import logfire
-from pydantic_ai import Agent
 from contextlib import asynccontextmanager
 import json
 
 from app.config import logger, db, Base
 from app.config.defaults import LLM_CONFIG
 from app.config.logging import setup_logging
+from app.config.tracing import setup_tracing
 from app.config.settings import settings
-from app.middleware.auth import AuthMiddleware
+from app.middleware.auth import AuthMiddleware, session_verifier
+from app.middleware.timing import TimingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware, create_rate_limit_store
+from app.utils.media_quota import media_quota
+from app.utils.loop_monitor import loop_monitor
+from app.utils.health_prober import health_prober
+from app.utils import cassettes
 from app.routers import (
     conversations_router,
     docs_router,
     embeddings_router,
     health_router,
     mcp_router,
+    metrics_router,
     projects_router,
     users_router,
     admin_router,
@@ -37,11 +42,6 @@ setup_logging(settings.LOG_LEVEL)
 # logger.info(f"[POST-SETUP CHECK] sqlalchemy.engine effective level: {logging.getLevelName(sqlalchemy_engine_logger.getEffectiveLevel())}")
 # --- End Debugging Check ---
 logger.info(f"Starting Posey Agents API with log level: {settings.LOG_LEVEL}")
-logger.info("Setting package loggers to DEBUG level")
-
-# Set specific loggers to DEBUG level
-for module in ["app.orchestrators", "app.utils.agent", "app.utils.message_handler"]:
-    logging.getLogger(module).setLevel(logging.DEBUG)
 
 # Parse JSON strings if needed
 def parse_json_env(value, default=None):
@@ -54,6 +54,9 @@ def parse_json_env(value, default=None):
 ALLOWED_ORIGINS = parse_json_env(settings.ALLOWED_ORIGINS, ["*"])
 ALLOWED_HOSTS = parse_json_env(settings.ALLOWED_HOSTS, ["*"])
 
+# Token buckets for RateLimitMiddleware; created here so the lifespan can close the Redis connection
+rate_limit_store = create_rate_limit_store() if settings.RATE_LIMIT_ENABLED else None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     
@@ -62,15 +65,19 @@ async def lifespan(app: FastAPI):
         
         # --- Logfire Configuration ---
         try:
-            logfire.configure()
-            logfire.instrument_httpx(capture_all=True) # Instrument httpx for LLM calls
-            Agent.instrument_all() # Instrument all Pydantic AI agents globally
-            logger.info("[LIFESPAN] Logfire configured and instrumentation enabled.")
+            # Sampling, attribute caps and body capture come from the TRACE_* settings
+            tracing = setup_tracing()
+            logger.info(f"[LIFESPAN] Logfire configured: {tracing}")
         except Exception as logfire_err:
             logger.error(f"[LIFESPAN] Failed to configure Logfire: {logfire_err}", exc_info=True)
             # Decide if this is fatal or just a warning
         # --- End Logfire --- 
         
+        # Record or replay LLM and external calls (before minions build their agents); a
+        # cassette installed by a benchmark or load test takes precedence over settings
+        if cassettes.active is None:
+            cassettes.install(cassettes.from_settings())
+
         # --- Debugging Log Level Check #2 ---
         # sqlalchemy_engine_logger_lifespan = logging.getLogger('sqlalchemy.engine')
         # logger.info(f"[LIFESPAN CHECK] sqlalchemy.engine effective level: {logging.getLevelName(sqlalchemy_engine_logger_lifespan.getEffectiveLevel())}")
@@ -145,6 +152,17 @@ async def lifespan(app: FastAPI):
             
         # ---> END: Pre-initialize active minions <---
 
+        # Periodically flush media usage history and hand back idle quota leases
+        media_quota.start()
+
+        # Watch for synchronous calls that block the event loop
+        if settings.LOOP_MONITOR_ENABLED:
+            loop_monitor.start()
+
+        # Check backends in the background; /health serves the latest results and /health/ready
+        # turns ready once the probes pass and the embedding model is warm
+        health_prober.start()
+
         logger.info("[LIFESPAN] Startup sequence fully completed. Ready for requests.")
         
         yield
@@ -163,6 +181,17 @@ async def lifespan(app: FastAPI):
             if hasattr(app.state, 'initialized_minions'):
                 del app.state.initialized_minions
                 
+            await session_verifier.close()
+            await loop_monitor.shutdown()
+            await health_prober.shutdown()
+            if rate_limit_store is not None:
+                await rate_limit_store.close()
+            if cassettes.active is not None:
+                await cassettes.active.close()
+
+            # Before closing the database: unflushed history and unused quota leases are written back
+            await media_quota.shutdown()
+
             await db.close_all()
             logger.info("Database connections closed")
         except Exception as e:
@@ -176,11 +205,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add debug middleware first
-@app.middleware("http")
-async def debug_request(request: Request, call_next):
-    response = await call_next(request)
-    return response
+# Custom middleware is pure ASGI (no BaseHTTPMiddleware) so responses stream through unbuffered.
+# add_middleware wraps, so the last one added runs first: Timing -> TrustedHost -> CORS -> Auth -> RateLimit.
+
+# Rate limiting runs just after auth so per-user buckets see request.state.user
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, store=rate_limit_store)
 
 # Add auth middleware before CORS
 app.add_middleware(AuthMiddleware)
@@ -202,8 +232,8 @@ app.add_middleware(
     allowed_hosts=ALLOWED_HOSTS
 )
 
-# Then add rate limiting (if needed)
-# app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
+# Outermost, so the measured time includes the other middleware
+app.add_middleware(TimingMiddleware)
 
 # Add exception handlers
 @app.exception_handler(Exception)
@@ -233,5 +263,7 @@ app.include_router(users_router)
 app.include_router(projects_router)
 app.include_router(conversations_router)
 app.include_router(mcp_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 app.include_router(admin_router) # Include the admin router
 # --- End Include Routers --- 
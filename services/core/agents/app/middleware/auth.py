@@ -1,111 +1,272 @@
 from fastapi import Request, Depends, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import HTTPConnection
 from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.config.settings import settings
 from app.config import logger
+from app.utils.ttl_cache import TTLCache
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from jose import jwt, JWTError, ExpiredSignatureError
 from pydantic import BaseModel
+import asyncio
+import hashlib
 import httpx
 import json
+import time
 
 
 AUTH_SERVICE_URL = settings.AUTH_SERVICE_INTERNAL_URL # Use the internal Docker service URL
 SESSION_VERIFY_ENDPOINT = "/auth/session"
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        excluded_paths = ["/health", "/docs", "/openapi.json", "/openapi.json/", "/metrics"]
-        if request.method == "OPTIONS" or request.url.path in excluded_paths:
-            logger.debug(f"Skipping auth for path: {request.url.path}")
-            return await call_next(request)
+class SessionVerifier:
+    """Verifies session cookies without calling the auth service on every request.
 
-        logger.debug(f"AuthMiddleware running for: {request.url.path}")
+    Order of checks:
+    1. Positive cache keyed by a hash of the access token (short TTL, never
+       past the token's own expiry).
+    2. Negative cache of NO_SESSION / 401 results (a few seconds).
+    3. Local JWT verification against the auth service's cached JWKS, for
+       users whose profile /auth/session returned before.
+    4. The auth service's /auth/session endpoint over a shared pooled client.
+    """
 
-        # --- Call Auth Service for Verification ---
-        session_verify_url = f"{AUTH_SERVICE_URL}{SESSION_VERIFY_ENDPOINT}"
-        
-        # Forward relevant cookies from the incoming request
-        cookies_to_forward = {}
-        if "sAccessToken" in request.cookies:
-            cookies_to_forward["sAccessToken"] = request.cookies["sAccessToken"]
-        if "sIdRefreshToken" in request.cookies: # Forward refresh token if present
-             cookies_to_forward["sIdRefreshToken"] = request.cookies["sIdRefreshToken"]
-        # Add any other necessary cookies (e.g., anti-csrf? check ST docs/auth service)
-        
-        if not cookies_to_forward:
-             logger.warning(f"No session cookies found for request: {request.url.path}")
-             return JSONResponse(status_code=401, content={"detail": "Authentication required"})
+    def __init__(self):
+        self._sessions = TTLCache(settings.AUTH_SESSION_CACHE_SIZE)
+        self._rejections = TTLCache(settings.AUTH_SESSION_CACHE_SIZE)
+        # User profile by id, so a refreshed token for a known user verifies locally
+        self._profiles = TTLCache(settings.AUTH_SESSION_CACHE_SIZE)
+        self._jwks: Dict[str, Dict[str, Any]] = {}
+        self._jwks_fetched_at = 0.0
+        self._jwks_lock = asyncio.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=AUTH_SERVICE_URL,
+                timeout=5.0, # Add a reasonable timeout
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # Never keep raw tokens in memory longer than the request
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _user_state(user_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Ensure keys match what get_current_user expects
+        return {
+            "id": user_data.get("id"),
+            "email": user_data.get("email"),
+            "username": user_data.get("username"),
+            "role": user_data.get("role"),
+        }
+
+    def _session_ttl(self, claims: Optional[Dict[str, Any]]) -> float:
+        ttl = settings.AUTH_SESSION_CACHE_TTL_SECONDS
+        exp = (claims or {}).get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        return ttl
 
+    async def _get_signing_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the JWK for ``kid``, refreshing the JWKS when stale or when the kid is unknown"""
+        stale = time.time() - self._jwks_fetched_at > settings.AUTH_JWKS_CACHE_SECONDS
+        if kid in self._jwks and not stale:
+            return self._jwks[kid]
+
+        async with self._jwks_lock:
+            # Re-check after waiting; also throttle refreshes triggered by unknown kids
+            stale = time.time() - self._jwks_fetched_at > settings.AUTH_JWKS_CACHE_SECONDS
+            recently_fetched = time.time() - self._jwks_fetched_at < 60
+            if (kid in self._jwks and not stale) or (recently_fetched and not stale):
+                return self._jwks.get(kid)
+            try:
+                response = await self.client.get(settings.AUTH_JWKS_PATH)
+                response.raise_for_status()
+                self._jwks = {k["kid"]: k for k in response.json().get("keys", []) if k.get("kid")}
+                logger.debug(f"Refreshed JWKS: {len(self._jwks)} keys")
+            except Exception as e:
+                logger.warning(f"Failed to fetch JWKS from auth service: {e}")
+            # Record the attempt even on failure so an outage doesn't turn into a fetch per request
+            self._jwks_fetched_at = time.time()
+            return self._jwks.get(kid)
+
+    async def _verify_locally(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return verified claims, or None when the token can't be checked locally"""
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self._get_signing_key(header.get("kid"))
+            if not key:
+                return None
+            # The algorithm comes from our settings and the key, never from the token
+            algorithms = [alg for alg in settings.AUTH_JWT_ALGORITHMS if alg == key.get("alg", alg)]
+            if header.get("alg") not in algorithms:
+                logger.warning(f"Rejecting token signed with {header.get('alg')}, expected one of {algorithms}")
+                return None
+            return jwt.decode(
+                token,
+                key,
+                algorithms=algorithms,
+                options={"verify_aud": False}
+            )
+        except ExpiredSignatureError:
+            # Let the auth service answer: it knows whether a refresh is possible
+            return None
+        except JWTError as e:
+            logger.debug(f"Local token verification failed, falling back to auth service: {e}")
+            return None
+
+    async def verify(self, cookies: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Return (200, user_state) or (error status, {"detail": ...})"""
+        access_token = cookies.get("sAccessToken")
+        key = self._token_key(access_token) if access_token else None
+
+        if key:
+            cached_user = self._sessions.get(key)
+            if cached_user:
+                return 200, cached_user
+            rejection = self._rejections.get(key)
+            if rejection:
+                return rejection
+
+            if settings.AUTH_LOCAL_JWT_VERIFY:
+                claims = await self._verify_locally(access_token)
+                if claims and claims.get("sub"):
+                    # Only a full profile from /auth/session; claims alone don't carry role
+                    profile = self._profiles.get(claims["sub"])
+                    if profile:
+                        self._sessions.set(key, profile, self._session_ttl(claims))
+                        return 200, profile
+
+        status, payload = await self._verify_remotely(cookies)
+        if key:
+            if status == 200:
+                claims = None
+                try:
+                    claims = jwt.get_unverified_claims(access_token)
+                except JWTError:
+                    pass
+                self._sessions.set(key, payload, self._session_ttl(claims))
+            elif status == 401:
+                self._rejections.set(key, (status, payload), settings.AUTH_NEGATIVE_CACHE_TTL_SECONDS)
+        if status == 200 and payload.get("id"):
+            self._profiles.set(payload["id"], payload, settings.AUTH_PROFILE_CACHE_SECONDS)
+        return status, payload
+
+    async def _verify_remotely(self, cookies: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
         headers = {
             'Accept': 'application/json'
             # Forward other relevant headers? (e.g., origin?)
         }
-
         try:
-            async with httpx.AsyncClient() as client:
-                logger.debug(f"Calling auth service: GET {session_verify_url}")
-                response = await client.get(
-                    session_verify_url,
-                    cookies=cookies_to_forward,
-                    headers=headers,
-                    timeout=5.0 # Add a reasonable timeout
-                )
-                logger.debug(f"Auth service response status: {response.status_code}")
+            logger.debug(f"Calling auth service: GET {AUTH_SERVICE_URL}{SESSION_VERIFY_ENDPOINT}")
+            response = await self.client.get(SESSION_VERIFY_ENDPOINT, cookies=cookies, headers=headers)
+            logger.debug(f"Auth service response status: {response.status_code}")
 
             if response.status_code == 200:
                 auth_data = response.json()
                 if auth_data.get("status") == "OK" and auth_data.get("user"):
-                    user_data = auth_data["user"]
-                    # Map received user data to request state
-                    # Ensure keys match what get_current_user expects
-                    user_state = {
-                        "id": user_data.get("id"),
-                        "email": user_data.get("email"),
-                        "username": user_data.get("username"),
-                        "role": user_data.get("role"),
-                        # Add other fields if needed/provided by /auth/session
-                        # "session": None, # We don't get the handle/payload here
-                        # "tId": None,
-                        # "rsub": None,
-                    }
-                    request.state.user = user_state
-                    logger.debug(f"Auth successful via auth service. User: {user_state.get('id')}")
-                    return await call_next(request)
+                    return 200, self._user_state(auth_data["user"])
                 elif auth_data.get("status") == "NO_SESSION":
-                    logger.info(f"No active session reported by auth service for {request.url.path}")
-                    return JSONResponse(status_code=401, content={"detail": "No active session"})
+                    logger.info("No active session reported by auth service")
+                    return 401, {"detail": "No active session"}
                 else:
                     logger.error(f"Auth service returned 200 but unexpected payload: {auth_data}")
-                    return JSONResponse(status_code=500, content={"detail": "Invalid auth response"})
-            
+                    return 500, {"detail": "Invalid auth response"}
+
             elif response.status_code == 401:
-                 logger.warning(f"Auth service returned 401 (Unauthorized) for {request.url.path}")
-                 # Try parsing error detail from auth service
-                 detail = "Unauthorized"
-                 try:
-                     error_data = response.json()
-                     detail = error_data.get("message", detail)
-                 except json.JSONDecodeError:
-                     pass # Use default detail
-                 return JSONResponse(status_code=401, content={"detail": detail})
+                logger.warning("Auth service returned 401 (Unauthorized)")
+                # Try parsing error detail from auth service
+                detail = "Unauthorized"
+                try:
+                    error_data = response.json()
+                    detail = error_data.get("message", detail)
+                except json.JSONDecodeError:
+                    pass # Use default detail
+                return 401, {"detail": detail}
 
             else:
                 # Handle other potential errors from auth service
-                logger.error(f"Auth service call failed with status {response.status_code} for {request.url.path}. Response: {response.text[:500]}")
-                return JSONResponse(status_code=503, content={"detail": "Auth service unavailable or failed"})
+                logger.error(f"Auth service call failed with status {response.status_code}. Response: {response.text[:500]}")
+                return 503, {"detail": "Auth service unavailable or failed"}
 
         except httpx.RequestError as e:
-            logger.error(f"HTTP error contacting auth service at {session_verify_url}: {e}", exc_info=True)
-            return JSONResponse(status_code=503, content={"detail": "Failed to contact authentication service"})
+            logger.error(f"HTTP error contacting auth service at {AUTH_SERVICE_URL}{SESSION_VERIFY_ENDPOINT}: {e}", exc_info=True)
+            return 503, {"detail": "Failed to contact authentication service"}
+
+# Shared across requests (and middleware instances) in this worker
+session_verifier = SessionVerifier()
+
+EXCLUDED_PATHS = frozenset(["/health", "/health/live", "/health/ready", "/docs", "/openapi.json", "/openapi.json/", "/metrics"])
+
+class AuthMiddleware:
+    """Pure ASGI auth middleware: verifies the session and sets ``request.state.user``.
+
+    Unlike BaseHTTPMiddleware this doesn't wrap the response in an extra task
+    and stream, so streaming responses pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if scope["method"] == "OPTIONS" or path in EXCLUDED_PATHS:
+            logger.debug(f"Skipping auth for path: {path}")
+            await self.app(scope, receive, send)
+            return
+
+        logger.debug(f"AuthMiddleware running for: {path}")
+
+        # Forward relevant cookies from the incoming request
+        cookies = HTTPConnection(scope).cookies
+        cookies_to_forward = {}
+        if "sAccessToken" in cookies:
+            cookies_to_forward["sAccessToken"] = cookies["sAccessToken"]
+        if "sIdRefreshToken" in cookies: # Forward refresh token if present
+             cookies_to_forward["sIdRefreshToken"] = cookies["sIdRefreshToken"]
+        # Add any other necessary cookies (e.g., anti-csrf? check ST docs/auth service)
+
+        if not cookies_to_forward:
+             logger.warning(f"No session cookies found for request: {path}")
+             await JSONResponse(status_code=401, content={"detail": "Authentication required"})(scope, receive, send)
+             return
+
+        try:
+            status_code, payload = await session_verifier.verify(cookies_to_forward)
         except Exception as e:
             # Ensure correct logging format and exception string conversion
-            logger.error(f"AuthMiddleware: Unexpected error calling auth service: {str(e)}", exc_info=True)
-            return JSONResponse(
+            logger.error(f"AuthMiddleware: Unexpected error verifying session: {str(e)}", exc_info=True)
+            await JSONResponse(
                 status_code=500,
                 content={"detail": "Internal server error during authentication check"}
-            )
+            )(scope, receive, send)
+            return
+
+        if status_code != 200:
+            logger.info(f"Session verification failed with {status_code} for {path}")
+            await JSONResponse(status_code=status_code, content=payload)(scope, receive, send)
+            return
+
+        # request.state is backed by scope["state"]
+        scope.setdefault("state", {})["user"] = payload
+        logger.debug(f"Auth successful. User: {payload.get('id')}")
+        await self.app(scope, receive, send)
 
 # --- User Model and Dependency (No change needed if it reads from request.state.user) ---
 
@@ -142,3 +303,9 @@ async def get_current_user(
             status_code=401,
             detail="Invalid user data in state"
         )
+
+async def require_admin_user(user: User = Depends(get_current_user)) -> User:
+    """Dependency for admin-only routes"""
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
@@ -1,7 +1,7 @@
 from fastapi import Request, HTTPException
 from uuid import UUID
-from app.db import db
 from app.config import settings
+from app.utils.media_quota import media_quota
 
 async def check_media_quota(request: Request, agent_id: UUID, media_type: str):
     """Check if agent has exceeded media generation quota"""
@@ -14,8 +14,8 @@ async def check_media_quota(request: Request, agent_id: UUID, media_type: str):
                 detail=f"Unsupported media type: {media_type}"
             )
 
-        # Check database quota
-        has_quota = await db.check_media_quota(agent_id, media_type)
+        # Check quota (in-process counters; the database is only hit to lease more)
+        has_quota = await media_quota.check(agent_id, media_type)
         if not has_quota:
             raise HTTPException(
                 status_code=429,
@@ -1,26 +1,218 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_minute=60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.requests = defaultdict(list)
-    
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        now = datetime.now()
-        
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < timedelta(minutes=1)
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import logger
+from app.config.settings import settings
+import math
+import time
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Token bucket: ``requests_per_minute`` sustained, bursts of up to ``burst``.
+
+    ``key`` selects what a bucket belongs to: "user" (falls back to the client
+    IP for anonymous requests), "ip", or "route" (one bucket shared by all
+    callers of the matching path prefix).
+    """
+    name: str
+    requests_per_minute: float
+    burst: int
+    key: str = "user"
+    path_prefix: str = "/"
+    methods: Optional[Tuple[str, ...]] = None
+
+    @property
+    def rate(self) -> float:
+        return self.requests_per_minute / 60.0
+
+    def matches(self, path: str, method: str) -> bool:
+        return path.startswith(self.path_prefix) and (not self.methods or method in self.methods)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RateLimitPolicy":
+        """Build a policy from RATE_LIMIT_POLICIES; raises ValueError for a rate or burst that isn't positive"""
+        methods = data.get("methods")
+        requests_per_minute = float(data["requests_per_minute"])
+        if requests_per_minute <= 0:
+            # A bucket that never refills has no Retry-After; block the route some other way
+            raise ValueError(f"Rate limit policy '{data['name']}': requests_per_minute must be > 0")
+        burst = int(data.get("burst") or max(1, math.ceil(requests_per_minute / 6)))
+        if burst < 1:
+            raise ValueError(f"Rate limit policy '{data['name']}': burst must be >= 1")
+        return cls(
+            name=data["name"],
+            requests_per_minute=requests_per_minute,
+            burst=burst,
+            key=data.get("key", "user"),
+            path_prefix=data.get("path_prefix", "/"),
+            methods=tuple(m.upper() for m in methods) if methods else None
+        )
+
+class RateLimitStore(ABC):
+    """Storage for token buckets. ``take`` returns (allowed, seconds until a token is available)"""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> Tuple[bool, float]:
+        ...
+
+    @abstractmethod
+    async def refund(self, key: str, capacity: int, cost: float = 1.0) -> None:
+        """Give back tokens taken for a request that was rejected by another bucket"""
+
+    async def close(self) -> None:
+        pass
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process buckets: two floats per key, least recently used keys evicted past ``max_keys``"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(capacity), now))
+        tokens = min(float(capacity), tokens + (now - updated) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            # An evicted bucket was idle the longest; re-creating it full is what a refill would do anyway
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    async def refund(self, key: str, capacity: int, cost: float = 1.0) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            tokens, updated = bucket
+            self._buckets[key] = (min(float(capacity), tokens + cost), updated)
+
+class RedisRateLimitStore(RateLimitStore):
+    """Buckets shared by all workers, updated atomically with a Lua script"""
+
+    _SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+    local updated = tonumber(redis.call('HGET', KEYS[1], 'u'))
+    local rate, capacity, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    if tokens == nil then tokens = capacity; updated = now end
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    if tokens >= cost then tokens = tokens - cost; allowed = 1 end
+    redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    _REFUND_SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+    if tokens ~= nil then
+        redis.call('HSET', KEYS[1], 't', math.min(tonumber(ARGV[1]), tokens + tonumber(ARGV[2])))
+    end
+    return 0
+    """
+
+    def __init__(self, url: str):
+        # Optional dependency: only needed when a shared store is configured
+        import redis.asyncio as redis_asyncio
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(self._SCRIPT)
+        self._refund_script = self._redis.register_script(self._REFUND_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: int, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[rate, capacity, cost, time.time()])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (cost - tokens) / rate
+
+    async def refund(self, key: str, capacity: int, cost: float = 1.0) -> None:
+        await self._refund_script(keys=[f"ratelimit:{key}"], args=[capacity, cost])
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Build the store selected by settings, falling back to in-process buckets"""
+    if settings.RATE_LIMIT_STORAGE == "redis":
+        if settings.RATE_LIMIT_REDIS_URL:
+            try:
+                return RedisRateLimitStore(settings.RATE_LIMIT_REDIS_URL)
+            except Exception as e:
+                logger.error(f"Failed to create Redis rate limit store, using in-memory buckets: {e}")
+        else:
+            logger.warning("RATE_LIMIT_STORAGE is 'redis' but RATE_LIMIT_REDIS_URL is not set, using in-memory buckets")
+    return InMemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+
+class RateLimitMiddleware:
+    """Pure ASGI token-bucket rate limiting.
+
+    Every policy whose path prefix and method match the request takes one
+    token from its bucket; the request is rejected with 429 and a
+    Retry-After header if any bucket is empty, and the tokens already taken
+    by the other policies are given back. Add it before AuthMiddleware
+    (so it runs after it) for "user" policies to see the authenticated user.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Optional[List[RateLimitPolicy]] = None,
+        store: Optional[RateLimitStore] = None
+    ):
+        self.app = app
+        self.policies = policies if policies is not None else [
+            RateLimitPolicy.from_dict(p) for p in settings.RATE_LIMIT_POLICIES
         ]
-        
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
-            raise HTTPException(status_code=429, detail="Too many requests")
-            
-        self.requests[client_ip].append(now)
-        return await call_next(request)
+        self.store = store or create_rate_limit_store()
+
+    @staticmethod
+    def _bucket_key(policy: RateLimitPolicy, scope: Scope) -> str:
+        if policy.key == "route":
+            return f"{policy.name}:route"
+        if policy.key == "user":
+            user = (scope.get("state") or {}).get("user") or {}
+            if user.get("id"):
+                return f"{policy.name}:user:{user['id']}"
+        client = scope.get("client")
+        return f"{policy.name}:ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path, method = scope["path"], scope["method"]
+        taken: List[Tuple[RateLimitPolicy, str]] = []
+        for policy in self.policies:
+            if not policy.matches(path, method):
+                continue
+            key = self._bucket_key(policy, scope)
+            try:
+                allowed, retry_after = await self.store.take(key, policy.rate, policy.burst)
+            except Exception as e:
+                # Fail open: the limiter must never take the API down with it
+                logger.error(f"Rate limit store error for policy '{policy.name}': {e}")
+                continue
+            if allowed:
+                taken.append((policy, key))
+            else:
+                logger.info(f"Rate limit '{policy.name}' exceeded for {method} {path}")
+                # A rejected request doesn't count against the policies that allowed it
+                for earlier, earlier_key in taken:
+                    try:
+                        await self.store.refund(earlier_key, earlier.burst)
+                    except Exception as e:
+                        logger.error(f"Rate limit store error refunding policy '{earlier.name}': {e}")
+                await JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests", "policy": policy.name},
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
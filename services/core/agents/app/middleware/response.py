@@ -3,7 +3,10 @@ from typing import Any, Dict, Optional
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.responses import Response
-from app.config import logger # Import logger
+from app.config.logging import LogPayload
+import logging
+
+logger = logging.getLogger(__name__)
 
 def standardize_response(func):
     @wraps(func)
@@ -11,7 +14,7 @@ def standardize_response(func):
         try:
             result = await func(*args, **kwargs)
             # --- Add Logging --- 
-            logger.debug(f"[Decorator] Result from function '{func.__name__}': {result!r}") 
+            logger.debug("[Decorator] Result from function '%s': %s", func.__name__, LogPayload(result))
             # --- End Logging --- 
             response_data = {}
             status_code = 200
@@ -30,7 +33,7 @@ def standardize_response(func):
                     "data": result
                 }
             # --- Add Logging --- 
-            logger.debug(f"[Decorator] Response data being sent: {response_data!r}")
+            logger.debug("[Decorator] Response data being sent: %s", LogPayload(response_data))
             # --- End Logging ---
             return JSONResponse(content=response_data, status_code=status_code)
 
@@ -0,0 +1,48 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import logger
+from app.utils.telemetry import HTTP_REQUEST_DURATION, route_label
+import time
+
+class TimingMiddleware:
+    """Pure ASGI request timing.
+
+    Adds an ``X-Process-Time`` header (seconds until the response started) and
+    logs requests slower than ``slow_request_seconds``. The full duration is
+    recorded in the request latency histogram, labelled with the router that
+    matched. The response body is never buffered, so streaming responses are
+    unaffected.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_seconds: float = 5.0):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", f"{time.perf_counter() - start:.4f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            # The router stores the matched route in the shared scope
+            HTTP_REQUEST_DURATION.labels(
+                router=route_label(scope),
+                method=scope["method"],
+                status=str(status_code)
+            ).observe(elapsed)
+            if elapsed >= self.slow_request_seconds:
+                logger.warning(f"Slow request: {scope['method']} {scope['path']} -> {status_code} in {elapsed:.2f}s")
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable
 from pydantic_ai import RunContext, Agent
 from pydantic import BaseModel, Field
 from app.config import logger
@@ -13,7 +13,11 @@ from app.config.prompts.base import (
 )
 from app.config.defaults import LLM_CONFIG
 from app.utils.ability_utils import use_ability
+from app.utils.source_utils import SourceCollector
+from app.utils.content_index import content_index
 from datetime import datetime
+import asyncio
+import inspect
 import time
 from app.minions.base import BaseMinion
 import traceback
@@ -41,6 +45,40 @@ class ResearchStrategy(BaseModel):
         default=5,
         description="Maximum number of sources to analyze"
     )
+    breadth: int = Field(
+        default=3,
+        ge=1,
+        description="Maximum number of planned search queries to run concurrently"
+    )
+    gather_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        description="Deadline in seconds for the information gathering stage"
+    )
+    min_source_quality: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Sources scoring below this only fill gaps and never end gathering early"
+    )
+    use_content_index: bool = Field(
+        default=True,
+        description="Seed sources from previously scraped pages before searching the web"
+    )
+    streaming: bool = Field(
+        default=False,
+        description="Analyze sources in small batches as they arrive instead of in one pass"
+    )
+    analysis_batch_size: int = Field(
+        default=2,
+        ge=1,
+        description="Number of sources per incremental analysis call in streaming mode"
+    )
+    queue_size: int = Field(
+        default=8,
+        ge=1,
+        description="Bound on sources waiting for analysis in streaming mode"
+    )
 
 class ResearchRequest(BaseModel):
     """Model for research requests"""
@@ -181,59 +219,99 @@ class ResearchMinion(BaseMinion):
                 "error": str(e)
             }
     
+    async def _search_sources(self, search_query: str, strategy: ResearchStrategy) -> List[Dict[str, Any]]:
+        """Run a single search query through the internet_research ability"""
+        logger.info(f"Searching for: {search_query}")
+        search_result = await use_ability(
+            "internet_research",
+            operation="search",
+            query=search_query,
+            max_results=strategy.max_sources
+        )
+
+        if search_result and search_result.get("status") == "success":
+            new_sources = (search_result.get("data") or {}).get("sources", [])
+            logger.info(f"Found {len(new_sources)} sources for query: {search_query}")
+            return new_sources
+
+        logger.warning(f"Search failed for query: {search_query}")
+        return []
+
+    async def _indexed_sources(self, query: str, strategy: ResearchStrategy) -> List[Dict[str, Any]]:
+        """Fresh, relevant pages already in the scraped content index"""
+        if not strategy.use_content_index:
+            return []
+        sources = await content_index.search(query, limit=strategy.max_sources)
+        if sources:
+            logger.info(f"Content index supplied {len(sources)} sources for '{query}'")
+        return sources
+
     async def gather_information(self, query: str, strategy: ResearchStrategy, context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Gather information from various sources"""
+        """Gather information from various sources
+
+        All planned queries (up to ``strategy.breadth``) run concurrently under a
+        shared ``strategy.gather_timeout`` deadline. Sources are deduplicated as
+        they arrive and gathering stops as soon as ``strategy.max_sources``
+        distinct high-quality sources have been collected.
+        """
         start_time = time.time()
         context = context or {}
-        
+        tasks: List[asyncio.Task] = []
+        collector = SourceCollector(strategy.max_sources, strategy.min_source_quality)
+
         try:
+            # Previously scraped pages cover repeat research; only search the web for the gap
+            collector.add_many(await self._indexed_sources(query, strategy))
+            if collector.is_full():
+                logger.info(f"Content index covered all {strategy.max_sources} sources, skipping web search")
+                return collector.results()
+
             # First develop a research plan
             plan = await self.plan_research(query, "Gather comprehensive information", strategy, context)
-            
-            # Use search queries from the plan
-            search_queries = plan.get("search_queries", [query])
-            
-            # Use voyager minion to search for information
-            sources = []
-            for search_query in search_queries[:3]:  # Limit to top 3 queries
-                logger.info(f"Searching for: {search_query}")
-                
-                # Use ability_utils to call voyager
-                search_result = await use_ability(
-                    "internet_research",
-                    {
-                        "operation": "search",
-                        "query": search_query,
-                        "max_results": strategy.max_sources
-                    }
-                )
-                
-                if search_result and search_result.get("status") == "success":
-                    new_sources = search_result.get("data", {}).get("sources", [])
-                    logger.info(f"Found {len(new_sources)} sources for query: {search_query}")
-                    sources.extend(new_sources)
-                else:
-                    logger.warning(f"Search failed for query: {search_query}")
-            
-            # Remove duplicates and limit to max_sources
-            unique_sources = []
-            urls_seen = set()
-            for source in sources:
-                url = source.get("url")
-                if url and url not in urls_seen:
-                    urls_seen.add(url)
-                    unique_sources.append(source)
-                    if len(unique_sources) >= strategy.max_sources:
+
+            # Use search queries from the plan, dropping blanks and repeats
+            search_queries = list(dict.fromkeys(
+                q.strip() for q in (plan.get("search_queries") or [query]) if isinstance(q, str) and q.strip()
+            ))[:strategy.breadth] or [query]
+
+            async def search(search_query: str) -> List[Dict[str, Any]]:
+                # A failed or timed-out search only loses its own results; as_completed's
+                # TimeoutError below is then always the shared deadline
+                try:
+                    return await self._search_sources(search_query, strategy)
+                except Exception as search_err:
+                    logger.warning(f"Search task for '{search_query}' failed: {type(search_err).__name__}: {search_err}")
+                    return []
+
+            tasks = [asyncio.create_task(search(q)) for q in search_queries]
+
+            try:
+                for next_done in asyncio.as_completed(tasks, timeout=strategy.gather_timeout):
+                    collector.add_many(await next_done)
+                    if collector.is_full():
+                        logger.info(f"Collected {strategy.max_sources} distinct high-quality sources, stopping early")
                         break
-            
+            except asyncio.TimeoutError:
+                logger.warning(f"Information gathering hit its {strategy.gather_timeout:.1f}s deadline, using partial results")
+
+            unique_sources = collector.results()
+
             execution_time = time.time() - start_time
-            logger.info(f"Information gathering completed in {execution_time:.2f}s, found {len(unique_sources)} sources")
-            
+            logger.info(
+                f"Information gathering completed in {execution_time:.2f}s across {len(search_queries)} queries, "
+                f"found {len(unique_sources)} sources ({collector.duplicates_dropped} duplicates dropped)"
+            )
+
             return unique_sources
-            
+
         except Exception as e:
             logger.error(f"Error gathering information: {str(e)}")
-            return []
+            return collector.results()
+        finally:
+            # Don't leave slow searches running once we have what we need
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
     
     async def analyze_sources(self, sources: List[Dict[str, Any]], query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Analyze gathered sources for relevance and credibility"""
@@ -287,6 +365,159 @@ class ResearchMinion(BaseMinion):
                 "error": str(e)
             }
     
+    @staticmethod
+    def _merge_analysis(accumulated: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one batch analysis into the running analysis (lists extend, dicts update)"""
+        for key, value in (partial or {}).items():
+            if key == "error":
+                accumulated.setdefault("batch_errors", []).append(value)
+            elif isinstance(value, list):
+                accumulated.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                accumulated.setdefault(key, {}).update(value)
+            else:
+                accumulated[key] = value
+        return accumulated
+
+    async def stream_research(
+        self,
+        query: str,
+        objective: str,
+        strategy: ResearchStrategy,
+        context: Dict[str, Any] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run research as a streaming pipeline, yielding progress events.
+
+        Search queries feed a bounded source queue; an analyzer drains it in
+        batches of ``strategy.analysis_batch_size`` so LLM analysis overlaps
+        with outstanding searches. Events are dicts with an ``event`` key:
+        ``plan``, ``source``, ``batch_analyzed``, ``synthesis_started`` and a
+        final ``complete`` event carrying the ``ResearchResponse``.
+        """
+        start_time = time.time()
+        context = context or {}
+        events: asyncio.Queue = asyncio.Queue()
+        source_queue: asyncio.Queue = asyncio.Queue(maxsize=strategy.queue_size)
+        collector = SourceCollector(strategy.max_sources, strategy.min_source_quality)
+        done_marker = object()
+
+        def emit(event: str, **data) -> None:
+            events.put_nowait({"event": event, "elapsed": round(time.time() - start_time, 3), **data})
+
+        async def produce(search_query: str) -> None:
+            for source in await self._search_sources(search_query, strategy):
+                if collector.is_full():
+                    return
+                if collector.add(source):
+                    emit("source", url=source.get("url"), title=source.get("title"), query=search_query)
+                    await source_queue.put(source)
+
+        async def gather_stage() -> None:
+            producers: List[asyncio.Task] = []
+            try:
+                for source in await self._indexed_sources(query, strategy):
+                    if collector.add(source):
+                        emit("source", url=source.get("url"), title=source.get("title"), query=query, from_index=True)
+                        await source_queue.put(source)
+                if collector.is_full():
+                    return
+
+                plan = await self.plan_research(query, objective, strategy, context)
+                search_queries = list(dict.fromkeys(
+                    q.strip() for q in (plan.get("search_queries") or [query]) if isinstance(q, str) and q.strip()
+                ))[:strategy.breadth] or [query]
+                emit("plan", search_queries=search_queries)
+
+                producers = [asyncio.create_task(produce(q)) for q in search_queries]
+                pending = set(producers)
+                deadline = start_time + strategy.gather_timeout
+                while pending and not collector.is_full():
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        logger.warning(f"Streaming research hit its {strategy.gather_timeout:.1f}s gather deadline")
+                        break
+                    _, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in producers:
+                    if not task.done():
+                        task.cancel()
+                # When cancelled the analyzer is gone and nothing would drain a full queue
+                if not asyncio.current_task().cancelling():
+                    await source_queue.put(done_marker)
+
+        async def analyze_stage() -> Dict[str, Any]:
+            accumulated: Dict[str, Any] = {}
+            analyzed: List[Dict[str, Any]] = []
+            batch: List[Dict[str, Any]] = []
+            batch_number = 0
+            finished = False
+            while not finished:
+                item = await source_queue.get()
+                if item is done_marker:
+                    finished = True
+                else:
+                    batch.append(item)
+                    # Take whatever else is already waiting, up to the batch size
+                    while len(batch) < strategy.analysis_batch_size and not source_queue.empty():
+                        item = source_queue.get_nowait()
+                        if item is done_marker:
+                            finished = True
+                            break
+                        batch.append(item)
+
+                if batch and (finished or len(batch) >= strategy.analysis_batch_size):
+                    batch_number += 1
+                    partial = await self.analyze_sources(batch, query, context)
+                    self._merge_analysis(accumulated, partial)
+                    analyzed.extend(batch)
+                    emit(
+                        "batch_analyzed",
+                        batch=batch_number,
+                        sources_analyzed=len(analyzed),
+                        partial_findings=partial.get("key_information", {}) if isinstance(partial, dict) else {}
+                    )
+                    batch = []
+
+            accumulated.setdefault("analyzed_sources", [])
+            if not accumulated["analyzed_sources"]:
+                accumulated["analyzed_sources"] = analyzed
+            accumulated["source_count"] = len(analyzed)
+            return accumulated
+
+        async def pipeline() -> None:
+            gatherer = asyncio.create_task(gather_stage())
+            analyzer = asyncio.create_task(analyze_stage())
+            try:
+                _, analysis = await asyncio.gather(gatherer, analyzer)
+                if not analysis.get("source_count"):
+                    response = self._no_sources_response(query)
+                else:
+                    emit("synthesis_started", sources_analyzed=analysis["source_count"])
+                    response = await self.synthesize_findings(analysis, query, objective, context)
+                response.metadata.setdefault("streaming", True)
+                response.metadata.setdefault("execution_time", time.time() - start_time)
+                emit("complete", response=response)
+            except Exception as e:
+                logger.error(f"Error in streaming research pipeline: {str(e)}")
+                emit("error", error=str(e))
+            finally:
+                # If one stage failed, stop the other (a gatherer blocked on the full queue would never finish)
+                for task in (gatherer, analyzer):
+                    if not task.done():
+                        task.cancel()
+                events.put_nowait(done_marker)
+
+        runner = asyncio.create_task(pipeline())
+        try:
+            while True:
+                event = await events.get()
+                if event is done_marker:
+                    break
+                yield event
+        finally:
+            if not runner.done():
+                runner.cancel()
+
     async def synthesize_findings(self, analysis: Dict[str, Any], query: str, objective: str, context: Dict[str, Any] = None) -> ResearchResponse:
         """Synthesize findings into a coherent response"""
         start_time = time.time()
@@ -374,6 +605,52 @@ class ResearchMinion(BaseMinion):
                 metadata={}
             )
     
+    @staticmethod
+    def _no_sources_response(query: str) -> ResearchResponse:
+        """Error response used when gathering produced nothing to analyze"""
+        return ResearchResponse(
+            status="error",
+            findings=[],
+            synthesis=f"No sources found for query: {query}",
+            confidence=0.0,
+            sources=[],
+            gaps=["No information available"],
+            next_steps=["Try a different search query", "Expand search parameters"],
+            error="No sources found for query",
+            error_type="research_planning_exception",
+            attempted_operation="research_planning",
+            metadata={}
+        )
+
+    async def _conduct_streaming_research(
+        self,
+        query: str,
+        objective: str,
+        strategy: ResearchStrategy,
+        context: Dict[str, Any],
+        progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> ResearchResponse:
+        """Drive stream_research to completion, forwarding events to an optional callback"""
+        response: Optional[ResearchResponse] = None
+        error: Optional[str] = None
+        async for event in self.stream_research(query, objective, strategy, context):
+            if event["event"] == "complete":
+                response = event["response"]
+            elif event["event"] == "error":
+                error = event.get("error")
+
+            if progress_callback:
+                try:
+                    outcome = progress_callback(event)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                except Exception as callback_err:
+                    logger.warning(f"Research progress callback failed: {callback_err}")
+
+        if response is None:
+            raise RuntimeError(error or "Streaming research finished without a result")
+        return response
+
     async def conduct_research(self, params: Dict[str, Any]) -> ResearchResponse:
         """Conduct full research process"""
         start_time = time.time()
@@ -401,23 +678,16 @@ class ResearchMinion(BaseMinion):
                     metadata={}
                 )
             
+            if strategy.streaming:
+                return await self._conduct_streaming_research(
+                    query, objective, strategy, context, params.get("progress_callback")
+                )
+
             # Step 1: Gather information from sources
             sources = await self.gather_information(query, strategy, context)
             
             if not sources:
-                return ResearchResponse(
-                    status="error",
-                    findings=[],
-                    synthesis=f"No sources found for query: {query}",
-                    confidence=0.0,
-                    sources=[],
-                    gaps=["No information available"],
-                    next_steps=["Try a different search query", "Expand search parameters"],
-                    error="No sources found for query",
-                    error_type="research_planning_exception",
-                    attempted_operation="research_planning",
-                    metadata={}
-                )
+                return self._no_sources_response(query)
             
             # Step 2: Analyze sources
             analysis = await self.analyze_sources(sources, query, context)
@@ -450,7 +720,7 @@ class ResearchMinion(BaseMinion):
                     "error_traceback": traceback.format_exc().split("\n")[-3:],
                     "execution_time": execution_time,
                     "minion": "research",
-                    "parameters": {k: v for k, v in params.items() if k != "query"}
+                    "parameters": {k: v for k, v in params.items() if k not in ("query", "progress_callback")}
                 }
             )
     
@@ -487,6 +757,6 @@ class ResearchMinion(BaseMinion):
                     "error_traceback": error_traceback.split("\n")[-3:],
                     "execution_time": time.time() - start_time,
                     "minion": "research",
-                    "parameters": {k: v for k, v in params.items() if k != "query"} # Exclude query to avoid leaking sensitive info
+                    "parameters": {k: v for k, v in params.items() if k not in ("query", "progress_callback")} # Exclude query to avoid leaking sensitive info
                 }
             }
@@ -9,7 +9,8 @@ from datetime import datetime
 import uuid
 
 from app.minions.base import BaseMinion
-from app.config import logger
+from app.config.logging import LogPayload
+import logging
 from pydantic_ai.agent import AgentRunResult
 from app.config.prompts.base import (
     generate_base_prompt,
@@ -22,6 +23,8 @@ from app.config.prompts.base import (
 from app.models.analysis import ContentAnalysis # Needed for type hinting
 from app.db.models.minion_llm_config import MinionLLMConfig
 
+logger = logging.getLogger(__name__)
+
 
 # Define a basic response structure, although the primary output is a string
 class SynthesisResponse(BaseModel):
@@ -206,7 +209,7 @@ class SynthesisMinion(BaseMinion):
         user_message_content = "\n".join(user_message_parts)
         
         # Log the prepared user message for debugging
-        logger.debug(f"[SYNTHESIS_PREPARE] Prepared User Message Content:\n{user_message_content}")
+        logger.debug("[SYNTHESIS_PREPARE] Prepared User Message Content:\n%s", LogPayload(user_message_content))
         
         return system_prompt, user_message_content
 
@@ -252,7 +255,7 @@ class SynthesisMinion(BaseMinion):
         ]
         
         logger.info("Calling synthesis agent...")
-        logger.debug(f"[SYNTHESIS_EXEC] Messages passed to agent.run_with_messages:\n{pprint.pformat(messages_for_agent)}")
+        logger.debug("[SYNTHESIS_EXEC] Messages passed to agent.run_with_messages:\n%s", LogPayload(messages_for_agent, pretty=True))
 
         synthesis_run_result = None
         final_response = ""
@@ -265,32 +268,32 @@ class SynthesisMinion(BaseMinion):
             
             # --- DETAILED LOGGING OF RESULT --- 
             logger.debug(f"[SYNTHESIS_RESULT] Raw result object type: {type(synthesis_run_result)}")
-            logger.debug(f"[SYNTHESIS_RESULT] Raw result repr():\n{repr(synthesis_run_result)}")
+            logger.debug("[SYNTHESIS_RESULT] Raw result repr():\n%s", LogPayload(synthesis_run_result))
             
             # Log attributes if it's an AgentRunResult
             if isinstance(synthesis_run_result, AgentRunResult):
                 data_attr = getattr(synthesis_run_result, 'data', '<MISSING>')
                 output_attr = getattr(synthesis_run_result, 'output', '<MISSING>')
-                logger.debug(f"[SYNTHESIS_RESULT] AgentRunResult.data (type: {type(data_attr)}): {repr(data_attr)}")
-                logger.debug(f"[SYNTHESIS_RESULT] AgentRunResult.output (type: {type(output_attr)}): {repr(output_attr)}")
+                logger.debug("[SYNTHESIS_RESULT] AgentRunResult.data (type: %s): %s", type(data_attr), LogPayload(data_attr))
+                logger.debug("[SYNTHESIS_RESULT] AgentRunResult.output (type: %s): %s", type(output_attr), LogPayload(output_attr))
                 # --- Attempt to find source of the logging error --- 
                 try:
                     # Log the structure that might be causing issues
                     # Check if raw_input exists and what it contains
                     if hasattr(synthesis_run_result, 'raw_input'):
                          logger.debug(f"[SYNTHESIS_RESULT_DEBUG] raw_input type: {type(synthesis_run_result.raw_input)}")
-                         logger.debug(f"[SYNTHESIS_RESULT_DEBUG] raw_input repr: {repr(synthesis_run_result.raw_input)}")
+                         logger.debug("[SYNTHESIS_RESULT_DEBUG] raw_input repr: %s", LogPayload(synthesis_run_result.raw_input))
                          # If raw_input is a list, check elements
                          if isinstance(synthesis_run_result.raw_input, list) and synthesis_run_result.raw_input:
                               logger.debug(f"[SYNTHESIS_RESULT_DEBUG] First element of raw_input type: {type(synthesis_run_result.raw_input[0])}")
-                              logger.debug(f"[SYNTHESIS_RESULT_DEBUG] First element of raw_input repr: {repr(synthesis_run_result.raw_input[0])}")
+                              logger.debug("[SYNTHESIS_RESULT_DEBUG] First element of raw_input repr: %s", LogPayload(synthesis_run_result.raw_input[0]))
                     else:
                          logger.debug("[SYNTHESIS_RESULT_DEBUG] AgentRunResult has no 'raw_input' attribute.")
 
                     # Check if raw_output exists
                     if hasattr(synthesis_run_result, 'raw_output'):
                          logger.debug(f"[SYNTHESIS_RESULT_DEBUG] raw_output type: {type(synthesis_run_result.raw_output)}")
-                         logger.debug(f"[SYNTHESIS_RESULT_DEBUG] raw_output repr: {repr(synthesis_run_result.raw_output)}")
+                         logger.debug("[SYNTHESIS_RESULT_DEBUG] raw_output repr: %s", LogPayload(synthesis_run_result.raw_output))
                     else:
                         logger.debug("[SYNTHESIS_RESULT_DEBUG] AgentRunResult has no 'raw_output' attribute.")
                 except Exception as log_debug_err:
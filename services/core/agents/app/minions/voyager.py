@@ -3,6 +3,7 @@ from pydantic_ai import RunContext, Agent
 from pydantic import BaseModel, HttpUrl, Field
 import httpx
 
+from app.config.logging import LogPayload
 from app.config.prompts.base import (
     BasePromptContext,
     UserContext,
@@ -15,6 +16,11 @@ from datetime import datetime
 import time
 import json
 from app.minions.base import BaseMinion
+from app.utils.credibility_cache import credibility_cache
+from app.utils.content_index import content_index
+from app.utils.telemetry import observe_external
+from app.utils.cassettes import CassetteTransport
+from app.utils.source_utils import get_domain
 import traceback
 import re
 from urllib.parse import urlparse
@@ -23,7 +29,6 @@ import asyncio
 import logging
 from threading import Semaphore
 from sqlalchemy.ext.asyncio import AsyncSession
-import pprint
 
 logger = logging.getLogger(__name__)
 
@@ -66,11 +71,22 @@ class WebResponse(BaseModel):
     confidence: float = 0.0
     analysis_metadata: Dict[str, Any] = {}
 
+class SourceCredibilityAssessment(BaseModel):
+    """LLM credibility assessment for a single source"""
+    url: str
+    domain_score: float = Field(..., ge=0.0, le=1.0, description="Credibility of the site as a whole")
+    credibility_score: float = Field(..., ge=0.0, le=1.0, description="Credibility of this specific page")
+    reasoning: str = ""
+
+class BatchCredibilityResult(BaseModel):
+    """Structured result of one credibility call covering several sources"""
+    assessments: List[SourceCredibilityAssessment] = Field(default_factory=list)
+
 class WebContentExtractor:
     """Class for extracting content from web pages"""
     
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+        self.client = httpx.AsyncClient(timeout=30.0, follow_redirects=True, transport=CassetteTransport("web"))
         self.cache = {}  # Simple in-memory cache
     
     async def extract_content(self, url: str, cache_policy: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -90,7 +106,8 @@ class WebContentExtractor:
         
         # Fetch content
         try:
-            response = await self.client.get(url)
+            with observe_external("voyager", "fetch_page"):
+                response = await self.client.get(url)
             if response.status_code != 200:
                 return {
                     "error": f"HTTP error: {response.status_code}",
@@ -184,6 +201,9 @@ class VoyagerMinion(BaseMinion):
     available_tools = ["web_search", "web_crawling", "content_scraping"]
     client: Optional[httpx.AsyncClient] = None # Initialize in setup
     scrape_semaphore: asyncio.Semaphore = asyncio.Semaphore(5)
+    _index_tasks: set = set() # Keeps background indexing tasks alive until they finish
+    _credibility_tasks: set = set() # Keeps background credibility scoring alive until it finishes
+    _domains_being_scored: set = set() # Unknown domains already queued for LLM scoring
     search_provider: str = os.environ.get("SEARCH_PROVIDER", "duckduckgo") # Default, may be overridden by voyager service itself
     search_api_key: str = os.environ.get("SEARCH_API_KEY", "") # May be needed if directly calling API, less likely if using service
     browser: WebContentExtractor = WebContentExtractor() # Instantiate here
@@ -208,7 +228,7 @@ class VoyagerMinion(BaseMinion):
     async def setup(self, *args, **kwargs) -> None:
         """Initialize the httpx client, accepting extra args."""
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            self.client = httpx.AsyncClient(timeout=30.0, transport=CassetteTransport("voyager"))
             logger.info("VoyagerMinion httpx client initialized.")
         else:
             logger.info("VoyagerMinion httpx client already initialized.")
@@ -387,6 +407,128 @@ class VoyagerMinion(BaseMinion):
                 }
             }
     
+    async def evaluate_sources_credibility(self, sources: List[Dict[str, Any]], context: Dict[str, Any] = None) -> Dict[str, Dict[str, Any]]:
+        """Evaluate credibility for all sources of a request, keyed by URL.
+
+        Every source gets the content heuristics from
+        evaluate_source_credibility; where its domain has a cached score the
+        two are blended. Nothing here waits on an LLM: sources on unknown
+        domains keep the heuristic score and are queued for one batched
+        structured call in the background, which fills the domain cache for
+        later requests.
+        """
+        start_time = time.time()
+        results: Dict[str, Dict[str, Any]] = {}
+        if not sources:
+            return results
+
+        # Heuristic pass first: no I/O, and the whole score for domains not cached yet
+        sources = [source for source in sources if source.get("url")]
+        heuristics = {}
+        domains = {}
+        for source in sources:
+            url = source["url"]
+            heuristics[url] = await self.evaluate_source_credibility(url, source.get("content") or {}, context or {})
+            domains[url] = get_domain(url)
+
+        cached = await credibility_cache.get_many([d for d in domains.values() if d])
+
+        unknown = []
+        for source in sources:
+            url = source["url"]
+            heuristic = heuristics[url]
+            domain_entry = cached.get(domains[url])
+            if domain_entry:
+                # Known domain: the domain score dominates, page heuristics adjust it
+                score = 0.7 * domain_entry["score"] + 0.3 * heuristic.get("score", 0.5)
+                results[url] = {
+                    **heuristic,
+                    "score": round(max(0.0, min(1.0, score)), 3),
+                    "domain_score": domain_entry["score"],
+                    "reasoning": domain_entry.get("reasoning"),
+                    "evaluation_source": "domain_cache"
+                }
+            else:
+                results[url] = {**heuristic, "evaluation_source": "heuristic"}
+                unknown.append(source)
+
+        if unknown:
+            self._schedule_domain_scoring(unknown, context or {})
+
+        logger.info(
+            f"Credibility evaluated for {len(results)} sources in {time.time() - start_time:.2f}s "
+            f"({len(results) - len(unknown)} from domain cache, {len(unknown)} unknown)"
+        )
+        return results
+
+    def _schedule_domain_scoring(self, sources: List[Dict[str, Any]], context: Dict[str, Any]) -> None:
+        """Score unknown domains in the background so search latency is unaffected"""
+        pending = []
+        for source in sources:
+            domain = get_domain(source["url"])
+            if domain and domain not in self._domains_being_scored:
+                self._domains_being_scored.add(domain)
+                pending.append(source)
+        if not pending:
+            return
+        task = asyncio.create_task(self._score_domains(pending, context))
+        self._credibility_tasks.add(task)
+        task.add_done_callback(self._credibility_tasks.discard)
+
+    async def _score_domains(self, sources: List[Dict[str, Any]], context: Dict[str, Any]) -> None:
+        """Fill the credibility cache for the sources' domains from one structured LLM call"""
+        try:
+            assessments = await self._assess_credibility_batch(sources, context)
+            new_domain_scores = {}
+            for source in sources:
+                assessment = assessments.get(source["url"])
+                domain = get_domain(source["url"])
+                if assessment and domain:
+                    new_domain_scores[domain] = {
+                        "score": assessment.domain_score,
+                        "reasoning": assessment.reasoning
+                    }
+            await credibility_cache.set_many(new_domain_scores)
+        except Exception as e:
+            logger.error(f"Background credibility scoring failed for {len(sources)} sources: {e}", exc_info=True)
+        finally:
+            for source in sources:
+                self._domains_being_scored.discard(get_domain(source["url"]))
+
+    async def _assess_credibility_batch(self, sources: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, SourceCredibilityAssessment]:
+        """Score several sources in one structured LLM call. Returns {} if no agent is available or the call fails"""
+        agent = self.credibility_agent or self.agent
+        if not agent:
+            return {}
+
+        try:
+            source_entries = []
+            for source in sources:
+                content = source.get("content") or {}
+                text = content.get("text", "") if isinstance(content, dict) else str(content)
+                source_entries.append({
+                    "url": source["url"],
+                    "title": content.get("title", "") if isinstance(content, dict) else "",
+                    "excerpt": text[:1500]
+                })
+
+            user_prompt = self.get_task_prompt("batch_credibility_evaluation", sources=source_entries)
+            if not user_prompt:
+                return {}
+
+            llm_result = await agent.run(user_prompt, result_type=BatchCredibilityResult)
+            data = llm_result.data if hasattr(llm_result, "data") else llm_result
+            if isinstance(data, str):
+                data = BatchCredibilityResult.model_validate_json(data)
+            elif isinstance(data, dict):
+                data = BatchCredibilityResult.model_validate(data)
+
+            requested = {source["url"] for source in sources}
+            return {a.url: a for a in data.assessments if a.url in requested}
+        except Exception as e:
+            logger.error(f"Batch credibility evaluation failed for {len(sources)} sources: {e}", exc_info=True)
+            return {}
+
     def _estimate_reading_level(self, text: str) -> str:
         """Estimate the reading level of text based on simple heuristics"""
         if not text:
@@ -530,12 +672,13 @@ class VoyagerMinion(BaseMinion):
             logger.info(f"[VOYAGER_SERVICE_CALL] Attempting POST to {self.voyager_service_url}")
             logger.debug(f"[VOYAGER_SERVICE_CALL] Payload: {json.dumps(payload)}")
 
-            response = await self.client.post(self.voyager_service_url, json=payload, timeout=60.0)
+            with observe_external("voyager", "search"):
+                response = await self.client.post(self.voyager_service_url, json=payload, timeout=60.0)
 
             logger.info(f"[VOYAGER_SERVICE_CALL] Response Status Code: {response.status_code}")
             raw_response_text = response.text
             try:
-                logger.debug(f"[VOYAGER_SERVICE_CALL] Raw Response Text: {raw_response_text[:1000]}...")
+                logger.debug("[VOYAGER_SERVICE_CALL] Raw Response Text: %s", LogPayload(raw_response_text, limit=1000))
                 service_results = json.loads(raw_response_text)
                 # --- Store the raw response data --- 
                 raw_response_data = service_results 
@@ -626,9 +769,40 @@ class VoyagerMinion(BaseMinion):
             # Default cache policy
             if cache_policy is None:
                 cache_policy = {"use_cache": True, "max_age_hours": 24}
-            
+            use_cache = cache_policy.get("use_cache", True)
+
+            # Pages fetched recently (by any worker or earlier session) are served from the content index
+            if use_cache:
+                indexed_page = await content_index.get_page(url, cache_policy.get("max_age_hours", 24))
+                if indexed_page:
+                    execution_time = time.time() - start_time
+                    logger.info(f"URL served from content index in {execution_time:.2f}s")
+                    return {
+                        "status": "success",
+                        "url": url,
+                        "content": {"text": indexed_page["text"]},
+                        "metadata": {
+                            "title": indexed_page.get("title", ""),
+                            "description": "",
+                            "execution_time": execution_time,
+                            "cache_hit": True,
+                            "index_hit": True,
+                            "fetched_at": indexed_page.get("fetched_at"),
+                            "text_length": len(indexed_page["text"]),
+                            "minion": "voyager"
+                        }
+                    }
+
             # Extract content using web scraper
             result = await self.browser.extract_content(url, cache_policy)
+
+            page_text = result.get("content", {}).get("text", "")
+            if use_cache and page_text and not result.get("cache_hit"):
+                self._schedule_indexing([{
+                    "url": url,
+                    "text": page_text,
+                    "title": result.get("metadata", {}).get("title", "")
+                }])
             
             # Create scrape-specific context data
             scrape_data = {
@@ -676,6 +850,12 @@ class VoyagerMinion(BaseMinion):
                 }
             }
     
+    def _schedule_indexing(self, pages: List[Dict[str, Any]]) -> None:
+        """Index freshly scraped pages in the background so scraping latency is unaffected"""
+        task = asyncio.create_task(content_index.index_pages(pages, source="voyager"))
+        self._index_tasks.add(task)
+        task.add_done_callback(self._index_tasks.discard)
+
     async def analyze_search_results(self, results: List[Dict[str, Any]], query: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze search results for relevance and organization"""
         start_time = time.time()
@@ -788,9 +968,28 @@ class VoyagerMinion(BaseMinion):
                  # Proceed without rich prompt context if creation fails, but log it
                  prompt_context = None # Or create a minimal default context
 
-            # Step 1: Perform web search (pass full_context defensively)
-            # search_web now handles query enhancement internally and defensively
-            search_result = await self.search_web(query, strategy, full_context or {}) # Pass empty dict if None
+            # Step 1: Serve from the scraped content index when it already covers the query,
+            # otherwise perform a web search (pass full_context defensively)
+            indexed_pages = []
+            if params.get("use_index", True):
+                indexed_pages = await content_index.search(query, limit=max_results)
+            served_from_index = len(indexed_pages) >= max_results
+
+            if served_from_index:
+                logger.info(f"Serving '{query}' from content index ({len(indexed_pages)} fresh pages)")
+                search_result = {
+                    "status": "success",
+                    "results": [{
+                        "url": page["url"],
+                        "title": page["title"],
+                        "snippet": page["content"][:300],
+                        "source_type": "indexed",
+                        "relevance_score": page["relevance_score"]
+                    } for page in indexed_pages]
+                }
+            else:
+                # search_web now handles query enhancement internally and defensively
+                search_result = await self.search_web(query, strategy, full_context or {}) # Pass empty dict if None
 
             search_results_list = search_result.get("results")
             if search_result.get("status") == "error" or not isinstance(search_results_list, list) or not search_results_list:
@@ -848,26 +1047,24 @@ class VoyagerMinion(BaseMinion):
                         continue # Skip failed scrapes
 
                     if scrape_result and scrape_result.get("status") == "success":
-                        # Get credibility assessment (optional, depends on context)
-                        credibility = {"score": 0.5, "error": "Evaluation skipped or failed"} # Default
-                        try:
-                            # Pass full_context defensively
-                            credibility = await self.evaluate_source_credibility(
-                                source_url,
-                                scrape_result.get("content", {}),
-                                full_context or {}
-                            )
-                        except Exception as cred_err:
-                            logger.error(f"Error evaluating credibility for {source_url}: {cred_err}", exc_info=True)
-
                         scraped_content.append({
                             "url": source_url,
-                            "content": scrape_result.get("content"),
-                            "credibility": credibility
+                            "content": scrape_result.get("content")
                         })
                     elif scrape_result:
                          logger.warning(f"Scraping failed for {source_url}: {scrape_result.get('error')}")
 
+                # Get credibility assessments for all scraped sources in one pass
+                credibility_by_url = {}
+                try:
+                    credibility_by_url = await self.evaluate_sources_credibility(scraped_content, full_context or {})
+                except Exception as cred_err:
+                    logger.error(f"Error evaluating credibility for scraped sources: {cred_err}", exc_info=True)
+                for item in scraped_content:
+                    item["credibility"] = credibility_by_url.get(
+                        item["url"], {"score": 0.5, "error": "Evaluation skipped or failed"}
+                    )
+
             execution_time = time.time() - start_time
             logger.info(f"Search and analysis completed in {execution_time:.2f}s")
 
@@ -894,6 +1091,7 @@ class VoyagerMinion(BaseMinion):
                     "sources_scraped": len(scraped_content),
                     "total_results_found": len(search_results_list), # Original count from search
                     "analysis_performed": bool(hasattr(self, 'analysis_agent') and self.analysis_agent),
+                    "served_from_index": served_from_index,
                     "analysis_error": analysis.get("error")
                 }
             )
@@ -920,12 +1118,9 @@ class VoyagerMinion(BaseMinion):
     async def execute(self, params: Dict[str, Any], context: RunContext) -> Dict[str, Any]:
         """Execute web research operations"""
         operation = params.get("operation", "search")
-        # Use pprint for better readability of complex dicts
-        params_repr = pprint.pformat(params, indent=2, width=120)
-        context_deps_repr = pprint.pformat(getattr(context, 'deps', {}), indent=2, width=120)
         logger.info(f"[VOYAGER] Entering execute method. Operation: '{operation}'")
-        logger.debug(f"[VOYAGER_EXECUTE] Received params:\n{params_repr}")
-        logger.debug(f"[VOYAGER_EXECUTE] Received context.deps:\n{context_deps_repr}")
+        logger.debug("[VOYAGER_EXECUTE] Received params:\n%s", LogPayload(params, pretty=True))
+        logger.debug("[VOYAGER_EXECUTE] Received context.deps:\n%s", LogPayload(getattr(context, 'deps', {}), pretty=True))
         start_time = time.time()
 
         # --- Check for essential 'query' parameter ---
@@ -1008,8 +1203,7 @@ class VoyagerMinion(BaseMinion):
                     }
                 logger.info(f"[VOYAGER] Scrape URL: {url}")
                 scrape_result = await self.scrape_url(url, params.get("config"), run_context)
-                scrape_result_repr = pprint.pformat(scrape_result, indent=2, width=120)
-                logger.debug(f"[VOYAGER_EXECUTE / scrape] scrape_url result:\n{scrape_result_repr}")
+                logger.debug("[VOYAGER_EXECUTE / scrape] scrape_url result:\n%s", LogPayload(scrape_result, pretty=True))
                 logger.info(f"[VOYAGER_EXECUTE] Returning result from 'scrape' operation. Status: {scrape_result.get('status')}")
                 return scrape_result
 
@@ -114,10 +114,20 @@ class ConversationResponse(BaseModel):
     project_id: Optional[UUID] = None
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True)
 
+class ConversationSummary(BaseModel):
+    """List projection of a conversation: no metadata payload"""
+    id: UUID
+    title: Optional[str] = None
+    status: str
+    project_id: Optional[UUID] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
 __all__ = [
     'UserCreate', 'UserResponse',
     'ProjectCreate', 'ProjectResponse', 'ProjectUpdate',
     'AgentCreate', 'AgentUpdate', 'AgentResponse',
-    'ConversationCreate', 'ConversationResponse',
+    'ConversationCreate', 'ConversationResponse', 'ConversationSummary',
     'MessageCreate', 'MessageResponse'
 ] 
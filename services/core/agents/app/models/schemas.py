@@ -1,9 +1,8 @@
 """Database models using SQLAlchemy."""
 
-from sqlalchemy.orm import relationship, declarative_base
-from app.db.base import sync_engine
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, JSON
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship, declarative_base, deferred
+from sqlalchemy import Column, Computed, String, ForeignKey, DateTime, Text, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.sql import func
 from datetime import datetime
 import uuid
@@ -38,6 +37,8 @@ class ConversationMessage(Base):
     sender_type = Column(String(50))
     meta = Column(JSONB, name='metadata', default={})
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Generated by the database (migration 029); deferred so regular loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed("to_tsvector('english', coalesce(content, ''))", persisted=True)))
 
     conversation = relationship("Conversation", back_populates="messages")
 
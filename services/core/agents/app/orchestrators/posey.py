@@ -4,7 +4,6 @@ from pydantic_ai import Agent, Tool, RunContext
 from pydantic_ai.agent import AgentRunResult
 import json
 import time
-import pprint
 import traceback
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,12 +15,16 @@ import re
 from app.utils.agent import create_agent, AgentExecutionResult
 from app.utils.context import RunContext
 from app.utils.message_handler import extract_messages_from_context, get_last_user_message
-from app.config import logger
+from app.config.logging import LogPayload, SAMPLED
+import logging
 from app.utils.minion_registry import MinionRegistry
 from app.utils.ability_registry import AbilityRegistry, AbilityRequest, AbilityResponse
 from app.config.prompts import PromptLoader
 from app.db.models import MinionLLMConfig
 from app.db.utils import get_minion_llm_config_by_key
+from app.utils.preferences_cache import resolve_orchestrator_config
+from app.utils.telemetry import observe_stage
+from app.utils.spans import span
 from app.minions.base import BaseMinion
 from app.minions.voyager import WebResponse
 from app.minions.memory import MemoryMinion, MemoryResponse
@@ -29,6 +32,8 @@ from app.models.analysis import ContentAnalysis, ContentIntent, DelegationConfig
 from app.utils.result_types import AgentExecutionResult
 from pydantic_ai import RunContext
 
+logger = logging.getLogger(__name__)
+
 class MinionDelegationRequest(BaseModel):
     """Schema for requesting delegation to a specific minion."""
     minion_key: str = Field(..., description="The unique key of the minion to delegate to (e.g., 'content_analysis', 'research').")
@@ -50,7 +55,7 @@ class PoseyResponse(BaseModel):
 
         # Handle AgentRunResult directly
         if isinstance(text_or_obj, AgentRunResult):
-            logger.debug(f"[PoseyResponse.from_str] Handling AgentRunResult object: {text_or_obj!r}")
+            logger.debug("[PoseyResponse.from_str] Handling AgentRunResult object: %s", LogPayload(text_or_obj))
             extracted_text = None
             # Prioritize .output if it's a non-empty string
             if hasattr(text_or_obj, 'output') and isinstance(text_or_obj.output, str) and text_or_obj.output.strip():
@@ -192,9 +197,15 @@ class PoseyAgent:
         registry: MinionRegistry,
         initialized_minions: Dict[str, BaseMinion],
         user_preferences: Optional[Dict[str, Any]] = None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        orchestrator_config: Optional[Tuple[Dict[str, Any], str]] = None
     ) -> "PoseyAgent":
-        """Asynchronous factory method to create and initialize PoseyAgent."""
+        """Asynchronous factory method to create and initialize PoseyAgent.
+
+        ``orchestrator_config`` is an already resolved (config, source) pair,
+        e.g. from the user preferences cache; it is derived from
+        ``user_preferences`` when not given.
+        """
         logger.info("Starting async creation of PoseyAgent...")
 
         # First, get the available minions from the database for logging (using registry)
@@ -289,46 +300,15 @@ class PoseyAgent:
 
         # --- Determine Orchestrator Config & Create Agent ---
         logger.info("Determining orchestrator configuration...")
-        orchestrator_final_config: Dict[str, Any] = None
-        orchestrator_config_source: str = "unknown"
-        preferred_provider = user_preferences.get("preferred_provider") if user_preferences else None
-        preferred_model = user_preferences.get("preferred_model") if user_preferences else None
-
-        # --- ADD LOGGING --- 
-        logger.debug(f"[PoseyAgent.create] Checking User Preferences for Orchestrator. Raw prefs received: {user_preferences}")
-        logger.debug(f"[PoseyAgent.create] Extracted preferred_provider: {preferred_provider}")
-        logger.debug(f"[PoseyAgent.create] Extracted preferred_model: {preferred_model}")
-        # --- END LOGGING ---
-
-        if preferred_provider and preferred_model:
-            logger.info(f"Using orchestrator provider '{preferred_provider}' and model '{preferred_model}' from user preferences.")
-            # Reconstruct config similar to create_agent logic
-            from app.config.defaults import LLM_CONFIG # Need import here
-            default_params = LLM_CONFIG.get('default', {})
-            orchestrator_final_config = {
-                'provider': preferred_provider,
-                'model': preferred_model,
-                'model_params': {
-                    'temperature': default_params.get('temperature', 0.7),
-                    'max_tokens': default_params.get('max_tokens', 1000),
-                    'top_p': default_params.get('top_p', 0.95),
-                    'frequency_penalty': default_params.get('frequency_penalty', 0.0),
-                    'presence_penalty': default_params.get('presence_penalty', 0.0),
-                    **(default_params.get('additional_settings') or {})
-                 },
-                 'base_url': LLM_CONFIG.get(preferred_provider, {}).get('base_url') or default_params.get('base_url')
-            }
-            orchestrator_config_source = "user_preferences"
+        if orchestrator_config is not None:
+            orchestrator_final_config, orchestrator_config_source = orchestrator_config
+            logger.debug(f"[PoseyAgent.create] Using pre-resolved orchestrator config (source: {orchestrator_config_source})")
         else:
+            logger.debug("[PoseyAgent.create] Checking User Preferences for Orchestrator. Raw prefs received: %s", LogPayload(user_preferences))
+            orchestrator_final_config, orchestrator_config_source = resolve_orchestrator_config(user_preferences)
+        if orchestrator_config_source != "user_preferences":
             logger.warning("Orchestrator provider/model not found in user preferences. Using hardcoded default.")
-            from app.config.defaults import LLM_CONFIG # Need import here
-            hardcoded_fallback_config = LLM_CONFIG.get('fallback', LLM_CONFIG['default'])
-            orchestrator_final_config = hardcoded_fallback_config.copy()
-            orchestrator_final_config['model_params'] = { k: v for k, v in orchestrator_final_config.items() if k not in ['provider', 'model', 'capabilities', 'base_url'] }
-            if 'base_url' not in orchestrator_final_config and 'base_url' in hardcoded_fallback_config:
-                 orchestrator_final_config['base_url'] = hardcoded_fallback_config['base_url']
-            orchestrator_config_source = "hardcoded_default"
-        
+
         # Get the actual model identifier string
         orchestrator_model_id_str = f"{orchestrator_final_config['provider']}:{orchestrator_final_config['model']}"
         logger.info(f"Resolved orchestrator model identifier: '{orchestrator_model_id_str}' (Source: {orchestrator_config_source})")
@@ -340,8 +320,9 @@ class PoseyAgent:
             config="posey", # Explicitly use the 'posey' prompt config
             abilities=[], # Orchestrator uses delegation tool, not direct abilities
             db=db,
-            user_preferences=user_preferences, # Pass prefs for create_agent to re-evaluate source
-            available_abilities_list=available_abilities_list # Pass fetched list
+            user_preferences=user_preferences,
+            available_abilities_list=available_abilities_list, # Pass fetched list
+            resolved_config=(orchestrator_final_config, orchestrator_config_source)
         )
         logger.info("Orchestrator agent created.")
         # --- End Orchestrator Config & Creation ---
@@ -390,7 +371,15 @@ class PoseyAgent:
         context: RunContext,
         request: MinionDelegationRequest # Use the new model here
     ) -> Dict[str, Any]:
-        """(Internal Logic) Delegate a task based on a MinionDelegationRequest."""
+        """(Internal Logic) Delegate a task based on a MinionDelegationRequest, as one span of the request's timing tree."""
+        with span("delegation", minion=request.minion_key):
+            return await self._run_delegation(context, request)
+
+    async def _run_delegation(
+        self,
+        context: RunContext,
+        request: MinionDelegationRequest
+    ) -> Dict[str, Any]:
         minion_key = request.minion_key
         # Use task_description as a fallback label for logging
         task_label = request.task_description 
@@ -435,7 +424,8 @@ class PoseyAgent:
                     if memory_minion and isinstance(memory_minion, MemoryMinion):
                         memory_params = {"query": minion_prompt, "k": 3}
                         memory_run_context = RunContext(model="memory_retrieval", usage={}, prompt=minion_prompt, deps=merged_deps) # Use merged deps for memory context
-                        memory_response_dict = await memory_minion.execute(memory_params, memory_run_context)
+                        with observe_stage("minion", "memory"):
+                            memory_response_dict = await memory_minion.execute(memory_params, memory_run_context)
                         retrieved_memories = memory_response_dict.get('memories', [])
                         if retrieved_memories:
                             logger.info(f"[ORCHESTRATOR TOOL / {minion_key}] Retrieved {len(retrieved_memories)} memories.")
@@ -498,17 +488,18 @@ class PoseyAgent:
             logger.info(f"[ORCHESTRATOR TOOL] Directly executing '{minion_key}'.execute method.")
             
             # --- ADDED DEBUG LOG --- 
-            logger.debug(f"[ORCHESTRATOR TOOL / {minion_key}] Params being passed to execute():\n{pprint.pformat(params)}")
-            logger.debug(f"[ORCHESTRATOR TOOL / {minion_key}] RunContext being passed to execute():\n{minion_run_context}") # Log the context object
+            logger.debug("[ORCHESTRATOR TOOL / %s] Params being passed to execute():\n%s", minion_key, LogPayload(params, pretty=True))
+            logger.debug("[ORCHESTRATOR TOOL / %s] RunContext being passed to execute():\n%s", minion_key, LogPayload(minion_run_context), extra=SAMPLED)
             # --- END DEBUG LOG --- 
 
             # Directly call the minion's execute method
             # Pass the original params dictionary (which might contain 'query', 'operation', etc.)
             # Pass the constructed RunContext object
-            minion_result = await minion_instance.execute(params=params, context=minion_run_context)
+            with observe_stage("minion", minion_key):
+                minion_result = await minion_instance.execute(params=params, context=minion_run_context)
             
             logger.info(f"[RAW_MINION_RESULT / {minion_key}] Raw result received from {minion_key}.execute. Type: {type(minion_result)}")
-            logger.debug(f"[RAW_MINION_RESULT / {minion_key}] Raw Result repr():\n{repr(minion_result)}")
+            logger.debug("[RAW_MINION_RESULT / %s] Raw Result repr():\n%s", minion_key, LogPayload(minion_result))
             logger.info(f"[ORCHESTRATOR TOOL] Minion '{minion_key}'.execute finished. Result type: {type(minion_result)}")
             
             # Serialize the direct result from the execute method
@@ -666,7 +657,7 @@ class PoseyAgent:
                 # -- End Fetch pre-loaded config --
                 
                 # --- MODIFIED LOGGING: Log the formatted history --- 
-                logger.info(f"[POSEY_RUN / STEP 1] Content Analysis Input (Formatted History):\n---\n{analysis_prompt_input}\n---")
+                logger.debug("[POSEY_RUN / STEP 1] Content Analysis Input (Formatted History):\n---\n%s\n---", LogPayload(analysis_prompt_input))
                 # --- END MODIFIED LOGGING --- 
                 
                 analysis_agent_instance = await create_agent(
@@ -724,27 +715,25 @@ class PoseyAgent:
             logger.debug(f"[{request_id}] Initial dependencies prepared for Content Analysis: {list(analysis_run_deps.keys())}")
             # --- END MODIFIED --- 
 
-            try:
-                content_analysis_schema = ContentAnalysis.model_json_schema()
-                logger.info(">>> MANUALLY GENERATED ContentAnalysis SCHEMA <<< 	")
-                pretty_schema = pprint.pformat(content_analysis_schema, indent=2)
-                logger.info(pretty_schema)
-                logger.info(">>> END MANUALLY GENERATED SCHEMA <<< 	")
-            except Exception as schema_e:
-                logger.error(f"Failed to generate/log ContentAnalysis schema: {schema_e}")
+            # The schema never changes at runtime; generating it is only worth it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    logger.debug("ContentAnalysis schema:\n%s", LogPayload(ContentAnalysis.model_json_schema(), pretty=True), extra=SAMPLED)
+                except Exception as schema_e:
+                    logger.error(f"Failed to generate/log ContentAnalysis schema: {schema_e}")
 
             # --- Enhanced Logging --- 
             logger.info(f"[POSEY_RUN / STEP 1] Preparing to run analysis_agent_instance.run()")
             # logger.debug(f"[POSEY_RUN / STEP 1] Prompt being passed: \n---\n{prompt}\n---\") # Old log
-            # Use pprint for deps for better readability
-            pretty_deps = pprint.pformat(analysis_run_deps, indent=2, width=120)
-            logger.debug(f"[POSEY_RUN / STEP 1] Deps being passed:\n{pretty_deps}")
+            # Rendered (pretty-printed and capped) only if DEBUG is enabled for this module
+            logger.debug("[POSEY_RUN / STEP 1] Deps being passed:\n%s", LogPayload(analysis_run_deps, pretty=True))
             # ------------------------
 
             # Run content analysis
             try:
                 # --- MODIFIED CALL: Pass formatted history as prompt and updated deps --- 
-                raw_analysis_result = await analysis_agent_instance.run(analysis_prompt_input, deps=analysis_run_deps)
+                with observe_stage("content_analysis"):
+                    raw_analysis_result = await analysis_agent_instance.run(analysis_prompt_input, deps=analysis_run_deps)
                 # --- END MODIFIED CALL --- 
                 logger.info(f"[POSEY_RUN / STEP 1] Raw analysis result received. Type: {type(raw_analysis_result)}")
 
@@ -753,24 +742,20 @@ class PoseyAgent:
                 # --- Extract ContentAnalysis object --- 
                 if isinstance(raw_analysis_result, ContentAnalysis):
                     analysis = raw_analysis_result
-                    analysis_repr = pprint.pformat(analysis.model_dump(), indent=2, width=120)
-                    logger.debug(f"[POSEY_RUN / STEP 1] Analysis Result (ContentAnalysis):\n{analysis_repr}")
+                    logger.debug("[POSEY_RUN / STEP 1] Analysis Result (ContentAnalysis):\n%s", LogPayload(analysis, pretty=True))
                 elif isinstance(raw_analysis_result, AgentRunResult):
                     logger.warning(f"[POSEY_RUN / STEP 1] Analysis returned AgentRunResult instead of ContentAnalysis direct.")
                     # Check if the data attribute holds the ContentAnalysis object
                     if hasattr(raw_analysis_result, 'data') and isinstance(raw_analysis_result.data, ContentAnalysis):
                         analysis = raw_analysis_result.data
                         logger.info("[POSEY_RUN / STEP 1] Extracted ContentAnalysis object from AgentRunResult.data")
-                        analysis_repr = pprint.pformat(analysis.model_dump(), indent=2, width=120)
-                        logger.debug(f"[POSEY_RUN / STEP 1] Extracted Analysis Result (ContentAnalysis):\n{analysis_repr}")
+                        logger.debug("[POSEY_RUN / STEP 1] Extracted Analysis Result (ContentAnalysis):\n%s", LogPayload(analysis, pretty=True))
                     else:
                         # Log the full repr if data doesn't contain the expected type
-                        analysis_repr = repr(raw_analysis_result)
-                        logger.warning(f"[POSEY_RUN / STEP 1] AgentRunResult.data did not contain ContentAnalysis. Full object:\n{analysis_repr}")
+                        logger.warning("[POSEY_RUN / STEP 1] AgentRunResult.data did not contain ContentAnalysis. Full object:\n%s", LogPayload(raw_analysis_result))
                 else:
                     # Fallback for unexpected types
-                    analysis_repr = pprint.pformat(raw_analysis_result, indent=2, width=120)
-                    logger.warning(f"[POSEY_RUN / STEP 1] Unexpected Analysis Result Type. Full Object:\n{analysis_repr}")
+                    logger.warning("[POSEY_RUN / STEP 1] Unexpected Analysis Result Type. Full Object:\n%s", LogPayload(raw_analysis_result, pretty=True))
                 
                 # Check if we successfully extracted or received a ContentAnalysis object
                 if analysis is None:
@@ -877,7 +862,7 @@ class PoseyAgent:
 
                     # Convert List[Param] to Dict for easier use
                     target_params_dict = params_to_dict(target.config_params)
-                    logger.info(f"[{request_id}] Processing target ({target.target_type}): '{target.target_key}' with params: {target_params_dict}")
+                    logger.info("[%s] Processing target (%s): '%s' with params: %s", request_id, target.target_type, target.target_key, LogPayload(target_params_dict))
 
                     # Inner try/except for individual target execution
                     try:
@@ -1051,10 +1036,11 @@ class PoseyAgent:
                     logger.info(f"[{request_id}] Delegating to synthesis minion via _delegate_task_to_minion...")
                     # Call the minion's execute method
                     # --- MODIFIED CALL ---
-                    synthesis_result_dict: Dict[str, Any] = await self._delegate_task_to_minion(
-                        context=synthesis_run_context,
-                        request=synthesis_request
-                    )
+                    with observe_stage("synthesis"):
+                        synthesis_result_dict: Dict[str, Any] = await self._delegate_task_to_minion(
+                            context=synthesis_run_context,
+                            request=synthesis_request
+                        )
                     # --- END MODIFIED CALL ---
                     logger.info(f"[{request_id}] SynthesisMinion delegation finished.")
                      
@@ -5,6 +5,7 @@ from .docs import router as docs_router
 from .embeddings import router as embeddings_router
 from .health import router as health_router
 from .mcp import router as mcp_router
+from .metrics import router as metrics_router
 from .projects import router as projects_router
 from .users import router as users_router
 from .admin import router as admin_router
@@ -16,6 +17,7 @@ __all__ = [
     "embeddings_router",
     "health_router",
     "mcp_router",
+    "metrics_router",
     "projects_router",
     "users_router",
     "admin_router",
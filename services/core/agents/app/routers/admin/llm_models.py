@@ -10,6 +10,7 @@ import os # For environment variables
 import httpx # For making external API calls
 
 from app.db import get_db
+from app.config.llm_catalog import llm_catalog
 from app.db.models import LLMProvider, LLMModel, MinionLLMConfig
 from pydantic import BaseModel, Field
 
@@ -317,6 +318,7 @@ async def sync_models_from_provider(provider_id: UUID, db: AsyncSession = Depend
                             if await _add_anthropic_model_if_not_exists(db, provider.id, model_data):
                                 new_models_added += 1
                         await db.commit() # Commit after processing all models for this provider
+                        llm_catalog.invalidate()
                     else:
                         error_message = "Unexpected response format from Anthropic API."
                         status_code = "error"
@@ -359,6 +361,7 @@ async def sync_models_from_provider(provider_id: UUID, db: AsyncSession = Depend
                              if await _add_google_model_if_not_exists(db, provider.id, model_data):
                                 new_models_added += 1
                         await db.commit() 
+                        llm_catalog.invalidate()
                     else:
                         error_message = "Unexpected response format from Google API."
                         status_code = "error"
@@ -409,6 +412,7 @@ async def sync_models_from_provider(provider_id: UUID, db: AsyncSession = Depend
                             if await _add_openai_model_if_not_exists(db, provider.id, model_data):
                                 new_models_added += 1
                         await db.commit()
+                        llm_catalog.invalidate()
                     else:
                         error_message = "Unexpected response format from OpenAI API."
                         status_code = "error"
@@ -460,6 +464,7 @@ async def create_llm_model(model_data: LLMModelCreate, db: AsyncSession = Depend
     )
     db.add(new_model)
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(new_model)
     await db.refresh(new_model, attribute_names=['provider'])
     return new_model
@@ -513,6 +518,7 @@ async def update_llm_model(model_id: UUID, model_update: LLMModelUpdate, db: Asy
         setattr(model, key, value)
 
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(model)
      # Ensure provider is loaded after refresh if it was changed
     await db.refresh(model, attribute_names=['provider'])
@@ -533,4 +539,5 @@ async def delete_llm_model(model_id: UUID, db: AsyncSession = Depends(get_db)):
        )
     await db.delete(model)
     await db.commit()
+    llm_catalog.invalidate()
     return None 
\ No newline at end of file
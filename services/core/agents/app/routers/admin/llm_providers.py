@@ -8,6 +8,7 @@ import uuid
 from datetime import datetime
 
 from app.db import get_db
+from app.config.llm_catalog import llm_catalog
 from app.db.models import LLMProvider, LLMModel
 from pydantic import BaseModel
 
@@ -68,6 +69,7 @@ async def create_llm_provider(provider_data: LLMProviderCreate, db: AsyncSession
     )
     db.add(new_provider)
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(new_provider)
     return new_provider
 
@@ -94,6 +96,7 @@ async def update_llm_provider(provider_id: UUID, provider_update: LLMProviderUpd
     for key, value in update_data.items():
         setattr(provider, key, value)
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(provider)
     return provider
 
@@ -110,4 +113,5 @@ async def delete_llm_provider(provider_id: UUID, db: AsyncSession = Depends(get_
        )
     await db.delete(provider)
     await db.commit()
+    llm_catalog.invalidate()
     return None 
\ No newline at end of file
@@ -10,6 +10,7 @@ import json
 import logging
 
 from app.db import get_db
+from app.config.llm_catalog import llm_catalog
 from app.db.models import MinionLLMConfig, LLMModel, LLMProvider
 from app.db.models.managed_minion import ManagedMinion
 from pydantic import BaseModel, Field
@@ -184,6 +185,7 @@ async def create_minion_config(config_data: MinionLLMConfigCreate, db: AsyncSess
     )
     db.add(new_config)
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(new_config)
     
     # Load relationships for response
@@ -343,6 +345,7 @@ async def update_minion_config(
             logger.info(f"Updated minion {minion.minion_key} activation status to {is_active}")
     
     await db.commit()
+    llm_catalog.invalidate()
     await db.refresh(config)
     
     # Load relationships for response
@@ -394,6 +397,7 @@ async def delete_minion_config(config_id: UUID, db: AsyncSession = Depends(get_d
     
     await db.delete(config)
     await db.commit()
+    llm_catalog.invalidate()
     return None
 
 # Add a dedicated endpoint just for toggling minion status
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from datetime import datetime
+import logging
+
+from app.config.settings import settings
+from app.middleware.auth import require_admin_user
+from app.utils.profiler import ProfilerBusy, profiler
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/profiler",
+    tags=["Admin - Profiler"],
+    dependencies=[Depends(require_admin_user)]
+)
+
+@router.post("", response_class=PlainTextResponse)
+async def run_profile(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS, description="How long to sample"),
+    mode: str = Query("wall", pattern="^(wall|cpu)$", description="wall: all threads and waiting asyncio tasks; cpu: threads using CPU"),
+    interval_ms: float = Query(settings.PROFILER_DEFAULT_INTERVAL_MS, ge=settings.PROFILER_MIN_INTERVAL_MS, le=1000.0)
+):
+    """
+    Profile the worker serving this request and return collapsed stacks
+
+    The body is a flamegraph-compatible folded stack file (flamegraph.pl,
+    speedscope, inferno). Each worker process profiles only itself, and
+    only one profile runs per worker at a time (409 otherwise).
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler is disabled")
+    try:
+        profile = await profiler.profile(seconds, mode, interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    filename = f"profile-{mode}-{profile.pid}-{datetime.fromtimestamp(profile.started_at):%Y%m%d-%H%M%S}.folded"
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Worker": str(profile.pid),
+            "X-Profile-Samples": str(profile.samples),
+            "X-Profile-Overhead": f"{profile.overhead:.4f}"
+        }
+    )
+
+@router.get("/status")
+async def profiler_status():
+    """
+    The running profile in this worker, if any, and the last one it finished
+    """
+    return profiler.status()
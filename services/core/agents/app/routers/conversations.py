@@ -1,53 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from uuid import UUID, uuid4
 from sqlalchemy import select
 from pydantic import ValidationError
 
 from app.db import get_db
-from app.models.api import ConversationCreate, ConversationResponse, MessageCreate, MessageResponse
+from app.models.api import ConversationCreate, ConversationResponse, ConversationSummary, MessageCreate, MessageResponse
 from app.models.schemas import Conversation, ConversationMessage, User
 from app.models.responses import StandardResponse
 from app.config import logger
 from app.middleware.auth import get_current_user
+from app.utils.pagination import NEXT_CURSOR_HEADER, keyset_condition, order_by_keyset, next_cursor
+from app.utils.conversation_export import ConversationExporter, markdown_header, markdown_message
+from app.utils.conversation_search import search_messages, search_memories
+from app.config.settings import settings
+import asyncio
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
+MAX_PAGE_SIZE = 200
+MAX_MESSAGE_PAGE_SIZE = 500
+
+MESSAGE_COLUMNS = (
+    ConversationMessage.id,
+    ConversationMessage.conversation_id,
+    ConversationMessage.content,
+    ConversationMessage.role,
+    ConversationMessage.sender_type,
+    ConversationMessage.meta.label('metadata'),
+    ConversationMessage.created_at
+)
+
+def _message_dict(row) -> Dict[str, Any]:
+    return {
+        'id': row['id'],
+        'conversation_id': row['conversation_id'],
+        'content': row['content'],
+        'role': row['role'],
+        'sender_type': row['sender_type'],
+        'metadata': row['metadata'],
+        'created_at': row['created_at'],
+    }
+
+async def _fetch_messages(
+    db: AsyncSession,
+    conversation_id: UUID,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One keyset page of messages in chronological order.
+
+    With ``after`` the page starts right after that cursor; otherwise it is
+    the ``limit`` messages just before ``before`` (or the latest ones). The
+    returned cursor continues in the same direction, or is None at the end.
+    """
+    descending = after is None
+    stmt = (
+        select(*MESSAGE_COLUMNS)
+        .where(ConversationMessage.conversation_id == conversation_id)
+        .order_by(*order_by_keyset(ConversationMessage.created_at, ConversationMessage.id, descending))
+        .limit(limit + 1)
+    )
+    cursor = after if after is not None else before
+    if cursor:
+        try:
+            stmt = stmt.where(keyset_condition(ConversationMessage.created_at, ConversationMessage.id, cursor, descending))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rows = (await db.execute(stmt)).mappings().all()
+    rows, cursor = next_cursor(list(rows), limit)
+    if descending:
+        rows.reverse()
+    return [_message_dict(row) for row in rows], cursor
+
 logger.info("Conversations router initialized")
 
-@router.get("/", response_model=StandardResponse[List[ConversationResponse]])
+@router.get("/", response_model=StandardResponse[Union[List[ConversationResponse], List[ConversationSummary]]])
 async def list_conversations(
     request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Value of the previous page's X-Next-Cursor header"),
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' leaves out conversation metadata"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List conversations"""
+    """List conversations, newest first, one keyset page at a time"""
     try:
-        logger.info(f"User: {request.state.user['id']}")
-        logger.info(f"Request method: {request.method}")
-        logger.info(f"Request URL: {request.url}")
+        user_id = request.state.user["id"]
+        logger.debug(f"Listing conversations for user {user_id} (limit={limit}, cursor={cursor}, view={view})")
+
+        columns = [
+            Conversation.id,
+            Conversation.user_id,
+            Conversation.title,
+            Conversation.status,
+            Conversation.created_at,
+            Conversation.updated_at,
+            Conversation.project_id
+        ]
+        if view == "full":
+            columns.append(Conversation.meta)
 
         stmt = (
-            select(
-                Conversation.id,
-                Conversation.user_id,
-                Conversation.title,
-                Conversation.status,
-                Conversation.meta,
-                Conversation.created_at,
-                Conversation.updated_at,
-                Conversation.project_id
-            )
-            .where(Conversation.user_id == request.state.user["id"])
-            .order_by(Conversation.created_at.desc())
+            select(*columns)
+            .where(Conversation.user_id == user_id)
+            .order_by(*order_by_keyset(Conversation.created_at, Conversation.id, descending=True))
+            .limit(limit + 1)
         )
-        
-        logger.debug(f"SQL Query: {stmt}")
+        if cursor:
+            try:
+                stmt = stmt.where(keyset_condition(Conversation.created_at, Conversation.id, cursor, descending=True))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         result = await db.execute(stmt)
-        conversations = result.mappings().all()
-        logger.info(f"Found {len(conversations)} conversations")
-        
+        conversations, cursor_out = next_cursor(list(result.mappings().all()), limit)
+        if cursor_out:
+            response.headers[NEXT_CURSOR_HEADER] = cursor_out
+        logger.info(f"Found {len(conversations)} conversations (more: {cursor_out is not None})")
+
+        if view == "summary":
+            return StandardResponse.success_response([
+                ConversationSummary(**conv) for conv in conversations
+            ])
         return StandardResponse.success_response([
             ConversationResponse(
                 id=conv['id'],
@@ -58,6 +137,8 @@ async def list_conversations(
                 project_id=conv['project_id'],
             ) for conv in conversations
         ])
+    except HTTPException:
+        raise
     except AttributeError as e:
         logger.error(f"Table reflection error: {str(e)}")
         return StandardResponse.success_response([])
@@ -66,6 +147,58 @@ async def list_conversations(
         logger.exception("Full traceback:")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Export all of the user's conversations (declared before the /{conversation_id} routes)
+@router.get("/export")
+async def export_all_conversations(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|jsonl|json|markdown)$")
+):
+    """Export every conversation of the current user, streamed oldest first"""
+    user_id = request.state.user['id']
+    exporter = ConversationExporter(format)
+    return StreamingResponse(
+        exporter.export_user_conversations(user_id),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{exporter.filename("conversations")}"'}
+    )
+
+# Search the user's messages (declared before the /{conversation_id} routes)
+@router.get("/search", response_model=StandardResponse[Dict[str, Any]])
+async def search_conversations(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500, description="Words, \"quoted phrases\", OR and -excluded words"),
+    project_id: Optional[UUID] = Query(None),
+    limit: int = Query(20, ge=1, le=settings.CONVERSATION_SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Value of the previous page's X-Next-Cursor header"),
+    sort: str = Query("rank", pattern="^(rank|recent)$"),
+    hybrid: bool = Query(False, description="Also return semantically similar memories (first page only)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over the current user's conversation messages"""
+    user_id = request.state.user["id"]
+    try:
+        search = search_messages(db, user_id, q, limit, project_id=project_id, cursor=cursor, sort=sort)
+        memories = None
+        if hybrid and not cursor:
+            (results, cursor_out), memories = await asyncio.gather(search, search_memories(user_id, q))
+        else:
+            results, cursor_out = await search
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching conversations for user {user_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
+    logger.info(f"Search for user {user_id} returned {len(results)} messages (more: {cursor_out is not None})")
+
+    data: Dict[str, Any] = {"query": q, "results": results}
+    if memories is not None:
+        data["memories"] = memories
+    return StandardResponse.success_response(data)
+
 # Start new conversation
 @router.post("/", response_model=StandardResponse[ConversationResponse])
 async def create_conversation(
@@ -255,72 +388,70 @@ async def analyze_conversation(
 async def get_conversation(
     request: Request,
     conversation_id: UUID,
+    message_limit: int = Query(50, ge=1, le=MAX_MESSAGE_PAGE_SIZE, description="Latest N messages to include"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get a conversation with its messages"""
+    """Get a conversation with its latest messages.
+
+    ``messages_cursor`` is set when older messages exist; pass it as
+    ``before`` to GET /{conversation_id}/messages to load them.
+    """
     logger.info(f"Getting conversation {conversation_id}")
     
-    # Get conversation and its messages in a single query using join
-    stmt = (
-        select(
-            Conversation.id.label('conversation_id'),
-            Conversation.user_id,
-            Conversation.title,
-            Conversation.status,
-            Conversation.meta.label('metadata'),
-            Conversation.project_id,
-            Conversation.created_at,
-            Conversation.updated_at,
-            ConversationMessage.id.label('message_id'),
-            ConversationMessage.conversation_id,
-            ConversationMessage.content,
-            ConversationMessage.role,
-            ConversationMessage.sender_type,
-            ConversationMessage.meta.label('message_metadata'),
-            ConversationMessage.created_at.label('message_created_at')
-        )
-        .outerjoin(
-            ConversationMessage,
-            ConversationMessage.conversation_id == Conversation.id
-        )
-        .where(Conversation.id == conversation_id)
-        .order_by(ConversationMessage.created_at)
-    )
-    
-    result = await db.execute(stmt)
-    rows = result.mappings().all()
+    stmt = select(
+        Conversation.id,
+        Conversation.user_id,
+        Conversation.title,
+        Conversation.status,
+        Conversation.meta.label('metadata'),
+        Conversation.project_id,
+        Conversation.created_at,
+        Conversation.updated_at
+    ).where(Conversation.id == conversation_id)
     
-    if not rows:
+    conversation = (await db.execute(stmt)).mappings().first()
+    if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    logger.debug(f"Keys in rows[0]: {rows[0].keys()}")
+    messages, messages_cursor = await _fetch_messages(db, conversation_id, message_limit)
 
     return {
         'success': True,
         'data': {
-            'id': rows[0]['conversation_id'],
-            'user_id': rows[0]['user_id'],
-            'title': rows[0]['title'],
-            'status': rows[0]['status'],
-            'metadata': rows[0]['metadata'],
-            'project_id': rows[0]['project_id'],
-            'created_at': rows[0]['created_at'],
-            'updated_at': rows[0]['updated_at'],
-            'messages': [
-                {
-                    'id': row['message_id'],
-                    'conversation_id': row['conversation_id'],
-                    'content': row['content'],
-                    'role': row['role'],
-                    'sender_type': row['sender_type'],
-                    'metadata': row['message_metadata'],
-                    'created_at': row['message_created_at'],
-                }
-                for row in rows if row['message_id'] is not None
-            ]
+            **conversation,
+            'messages': messages,
+            'messages_cursor': messages_cursor,
+            'has_more_messages': messages_cursor is not None
         },
     }
 
+@router.get("/{conversation_id}/messages")
+async def list_messages(
+    request: Request,
+    response: Response,
+    conversation_id: UUID,
+    limit: int = Query(100, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    before: Optional[str] = Query(None, description="Page of messages older than this cursor"),
+    after: Optional[str] = Query(None, description="Page of messages newer than this cursor"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Keyset page of a conversation's messages in chronological order.
+
+    Without a cursor this is the latest ``limit`` messages. The next page
+    in the same direction is in the X-Next-Cursor header.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Pass either 'before' or 'after', not both")
+
+    owner = await db.scalar(select(Conversation.user_id).where(Conversation.id == conversation_id))
+    if owner is None or str(owner) != str(request.state.user['id']):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    messages, cursor = await _fetch_messages(db, conversation_id, limit, before=before, after=after)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return StandardResponse.success_response(messages)
+
 # Delete conversation
 @router.delete("/{conversation_id}")
 async def delete_conversation(
@@ -387,36 +518,27 @@ async def branch_conversation(
 async def export_conversation(
     request: Request,
     conversation_id: UUID,
-    format: str = "json",
+    format: str = Query("ndjson", pattern="^(ndjson|jsonl|json|markdown)$"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Export conversation in various formats"""
-    convo = await db.get(Conversation, conversation_id)
-    if not convo:
+    """Export conversation as NDJSON, JSON-lines, JSON or Markdown, streamed"""
+    owner = await db.scalar(select(Conversation.user_id).where(Conversation.id == conversation_id))
+    if owner is None or str(owner) != str(request.state.user['id']):
         raise HTTPException(status_code=404, detail="Conversation not found")
-    
-    messages = await db.query(ConversationMessage).filter(
-        ConversationMessage.conversation_id == conversation_id
-    ).order_by(ConversationMessage.created_at).all()
-    
-    if format == "json":
-        return StandardResponse.success_response({
-            "conversation": ConversationResponse.from_orm(convo),
-            "messages": [MessageResponse.from_orm(m) for m in messages]
-        })
-    elif format == "markdown":
-        return StandardResponse.success_response({
-            "content": generate_markdown(convo, messages)
-        })
+
+    exporter = ConversationExporter(format)
+    return StreamingResponse(
+        exporter.export_conversation(conversation_id),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{exporter.filename(f"conversation-{conversation_id}")}"'}
+    )
 
 # Generate markdown from conversation and messages
 def generate_markdown(conversation, messages):
     """Generate markdown from conversation and messages"""
-    result = f"# {conversation.title}\n\n"
-    for msg in messages:
-        prefix = "🤖 Assistant" if msg.role == "assistant" else "👤 User"
-        result += f"### {prefix}\n{msg.content}\n\n"
-    return result 
+    parts = [markdown_header({"title": conversation.title})]
+    parts.extend(markdown_message(msg.role, msg.content) for msg in messages)
+    return "".join(parts)
 
 async def get_user(db: AsyncSession, user_id: UUID) -> User:
     stmt = select(User).where(User.id == user_id)
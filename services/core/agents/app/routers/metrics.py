@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from app.utils.telemetry import render_metrics
+
+# Served at the root, where Prometheus scrapes by default (AuthMiddleware excludes /metrics)
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition of request, stage, LLM, backing service and pool metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from app.middleware.response import standardize_response
-from app.config import logger, db
+from app.config import logger
 from app.db.migrations import MigrationManager
 from app.db.migrations.qdrant_setup import setup_qdrant
 from app.db.migrations.couchbase_setup import setup_couchbase
-from app.db.postgres import get_pool
+from app.db.postgres import get_pool, close_pool
 
 router = APIRouter(
     prefix="/migrations",
@@ -15,22 +15,13 @@ router = APIRouter(
 @standardize_response
 async def run_migrations():
     """Run all pending migrations"""
+    pool = None
     try:
-        logger.info("Initializing database connection pool...")
-        # Initialize the connection pool if not already done
-        if not db.pool:
-            pool = await get_pool()
-            db.pool = pool  # This should now work with the proper Database class
-
-        if not db.pool:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to initialize database connection pool"
-            )
+        pool = await get_pool()
 
         logger.info("Running migrations...")
         migration_manager = MigrationManager()
-        await migration_manager.apply_migrations(db.pool)
+        await migration_manager.apply_migrations(pool)
         
         logger.info("Setting up Qdrant...")
         await setup_qdrant()
@@ -43,6 +34,4 @@ async def run_migrations():
         logger.error(f"Error running migrations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        if db.pool:
-            await db.pool.close()
-            db.pool = None  # Clear the pool reference after closing
+        await close_pool(pool)
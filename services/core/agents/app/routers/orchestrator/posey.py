@@ -1,21 +1,26 @@
 from fastapi import APIRouter, HTTPException, Request, Depends, Form, UploadFile, File, Body
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Any, Dict
 from pydantic import BaseModel, UUID4, Field, model_validator, ValidationError, ConfigDict
 from datetime import datetime
 from uuid import uuid4
 from ...middleware.response import standardize_response
 from ...orchestrators.posey import PoseyAgent
-from app.config import logger, db, LLM_CONFIG
+from app.config import db, LLM_CONFIG
+from app.config.logging import LogPayload
+import logging
 from app.db import get_db
 import json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 import time
 import traceback
 from app.utils.minion_registry import MinionRegistry
 from app.utils.result_types import AgentExecutionResult
 from app.utils.message_handler import extract_messages_from_context
+from app.utils.preferences_cache import preferences_cache, resolve_image_config, CachedPreferences
+from app.utils.spans import record_spans, timings_requested
 from app.minions.base import BaseMinion
+from app.minions.research import ResearchMinion, ResearchRequest
 from app.config.prompts.base import get_location_from_ip
 from app.models.system import LocationInfo
 import markdown
@@ -24,6 +29,8 @@ from markdown.extensions.tables import TableExtension
 from markdown.extensions.nl2br import Nl2BrExtension
 from markdown.extensions.smarty import SmartyExtension
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/orchestrator/posey",
     tags=["posey", "orchestrator"]
@@ -159,8 +166,9 @@ async def run_posey(
             logger.error(f"[RUN_POSEY / {request_id}] Validation error for payload: {e}")
             raise HTTPException(status_code=400, detail=f"Payload validation failed: {e}")
 
-        # --- Always fetch preferences from DB based on authenticated user --- 
+        # --- Preferences for the authenticated user (cached, see app/utils/preferences_cache.py) --- 
         db_user_prefs = {} # Initialize default
+        cached_prefs: Optional[CachedPreferences] = None
         config_source_log = "none (defaulting)"
         try:
             # Ensure user state and ID exist (should be guaranteed by auth middleware)
@@ -169,20 +177,12 @@ async def run_posey(
                 raise HTTPException(status_code=401, detail="User authentication context missing.")
             
             user_id = request.state.user['id']
-            logger.info(f"[RUN_POSEY / {request_id}] Always fetching preferences from DB for user_id: {user_id}")
-            query_prefs = text("SELECT preferences FROM users WHERE id = :user_id")
-            result_prefs = await db_session.execute(query_prefs, {"user_id": user_id})
-            row_prefs = result_prefs.fetchone()
-            db_prefs_data = row_prefs[0] if row_prefs and row_prefs[0] else None
+            cached_prefs = await preferences_cache.get(user_id, session=db_session)
             
-            if isinstance(db_prefs_data, dict):
-                logger.info(f"[RUN_POSEY / {request_id}] Successfully fetched preferences from database.")
-                logger.debug(f"[RUN_POSEY / {request_id}] Preferences from DB: {db_prefs_data}")
-                db_user_prefs = db_prefs_data # Store fetched prefs
+            if cached_prefs.preferences:
+                logger.debug("[RUN_POSEY / %s] Preferences from DB/cache: %s", request_id, LogPayload(cached_prefs.preferences))
+                db_user_prefs = cached_prefs.preferences
                 config_source_log = "database"
-            elif db_prefs_data is not None:
-                logger.warning(f"[RUN_POSEY / {request_id}] Preferences found in DB for user {user_id} but are not a dictionary (type: {type(db_prefs_data)}). Using empty dict.")
-                # config_source_log remains 'none (defaulting)'
             else:
                 logger.warning(f"[RUN_POSEY / {request_id}] No preferences found in DB for user {user_id}. Using empty dict.")
                 # config_source_log remains 'none (defaulting)'
@@ -199,7 +199,7 @@ async def run_posey(
         
         if payload_prefs and isinstance(payload_prefs, dict):
             logger.info(f"[RUN_POSEY / {request_id}] Found preferences in request payload. Merging with DB preferences (payload takes priority).")
-            logger.debug(f"[RUN_POSEY / {request_id}] Preferences from Payload: {payload_prefs}")
+            logger.debug("[RUN_POSEY / %s] Preferences from Payload: %s", request_id, LogPayload(payload_prefs))
             final_user_prefs.update(payload_prefs) # Merge, payload overwrites duplicates
             if config_source_log == "database":
                 config_source_log = "database_and_payload"
@@ -210,7 +210,17 @@ async def run_posey(
             # config_source_log remains as determined by DB fetch
             
         # Log the final source and content of user_prefs being used
-        logger.debug(f"[RUN_POSEY / {request_id}] Final user_prefs used (source: {config_source_log}): {final_user_prefs}")
+        logger.debug("[RUN_POSEY / %s] Final user_prefs used (source: %s): %s", request_id, config_source_log, LogPayload(final_user_prefs))
+
+        # Reuse the cached orchestrator/image configs unless the payload overrides the keys they derive from
+        payload_keys = set(payload_prefs) if isinstance(payload_prefs, dict) else set()
+        orchestrator_config = None
+        image_config = resolve_image_config(final_user_prefs)
+        if cached_prefs is not None:
+            if not payload_keys & {"preferred_provider", "preferred_model"}:
+                orchestrator_config = (cached_prefs.orchestrator_config, cached_prefs.orchestrator_config_source)
+            if not payload_keys & {"preferred_image_provider", "preferred_image_model"}:
+                image_config = cached_prefs.image_config
 
         # Log file details
         uploaded_file_info = []
@@ -245,7 +255,8 @@ async def run_posey(
             db=db_session, 
             registry=registry, 
             initialized_minions=initialized_minions,
-            user_preferences=final_user_prefs # Pass the potentially merged preferences
+            user_preferences=final_user_prefs, # Pass the potentially merged preferences
+            orchestrator_config=orchestrator_config
         )
 
         # --- Determine Location (Prefs or IP Fallback) --- 
@@ -288,10 +299,7 @@ async def run_posey(
                     "provider": final_user_prefs.get("preferred_provider", LLM_CONFIG["default"]["provider"]),
                     "model": final_user_prefs.get("preferred_model", LLM_CONFIG["default"]["model"])
                 },
-                "image": {
-                    "provider": final_user_prefs.get("preferred_image_provider", "openai"), # Assuming keys like these
-                    "model": final_user_prefs.get("preferred_image_model", "dall-e-3")
-                },
+                "image": dict(image_config),
                  # Include other relevant preferences from user_prefs
                  **{k: v for k, v in final_user_prefs.items() if k not in ['preferred_provider', 'preferred_model', 'preferred_image_provider', 'preferred_image_model', 'location']} # Exclude location here
             },
@@ -319,7 +327,8 @@ async def run_posey(
         start_time = time.time()
         # Pass the prompt derived from messages (or originally provided)
         # --- Use the enhanced context --- 
-        execution_result: AgentExecutionResult = await posey_agent.run(prompt, context)
+        with record_spans("posey_run", request_id=request_id) as timings:
+            execution_result: AgentExecutionResult = await posey_agent.run(prompt, context)
         end_time = time.time()
 
         # Log the result
@@ -420,6 +429,8 @@ async def run_posey(
              response_data["metadata"]["status"] = "partial_success"
              response_data["metadata"]["contentHtml"] = None # Ensure it's None here too
 
+        timings.report(response_data["metadata"], include=timings_requested(request.headers))
+
         return {
             "success": True, # Indicate API call succeeded, check metadata.status for agent status
             "data": response_data
@@ -429,7 +440,7 @@ async def run_posey(
         logger.error(f"[RUN_POSEY / {request_id}] Error running Posey: {str(e)}")
         logger.error(traceback.format_exc())
         # Log payload for debugging, be mindful of sensitive data/large files
-        logger.info(f"[RUN_POSEY / {request_id}] Payload (first 200 chars): {payload[:200]}...")
+        logger.debug("[RUN_POSEY / %s] Payload (first 200 chars): %s", request_id, LogPayload(payload, limit=200))
         # Return error structure consistent with successful run data shape
         error_data = {
              "answer": f"An internal error occurred: {str(e)}",
@@ -506,27 +517,24 @@ async def run_posey_orchestration(
             logger.critical(f"Request {request_id}: initialized_minions not found in app state. Startup initialization likely failed.")
             raise HTTPException(status_code=500, detail="Internal server error: Orchestrator configuration failed (minions).")
             
-        # Get user preferences
-        query = text("""
-            SELECT preferences FROM users WHERE id = :user_id
-        """)
-        result = await db_session.execute(query, {"user_id": user_id})
-        row = result.fetchone()
-        user_prefs = row[0] if row and row[0] else {}
+        # Get user preferences (cached)
+        cached_prefs = await preferences_cache.get(user_id, session=db_session)
 
         # Create PoseyAgent instance, passing the registry and session
         posey_agent = await PoseyAgent.create(
             db=db_session, 
             registry=registry,
             initialized_minions=initialized_minions,
-            user_preferences=user_prefs
+            user_preferences=dict(cached_prefs.preferences),
+            orchestrator_config=(cached_prefs.orchestrator_config, cached_prefs.orchestrator_config_source)
         )
         
         # Run the orchestration
-        result: AgentExecutionResult = await posey_agent.run_with_messages(
-            messages=messages,
-            context=initial_context
-        )
+        with record_spans("posey_run", request_id=request_id) as timings:
+            result: AgentExecutionResult = await posey_agent.run_with_messages(
+                messages=messages,
+                context=initial_context
+            )
         
         end_time = time.time()
         logger.info(f"Posey orchestration request {request_id} completed internally in {end_time - start_time:.2f} seconds.")
@@ -536,6 +544,7 @@ async def run_posey_orchestration(
              result.metadata = {}
         result.metadata.setdefault("request_id", request_id)
         result.metadata.setdefault("processing_time", end_time - start_time)
+        timings.report(result.metadata, include=timings_requested(fastapi_request.headers))
 
         # Check if the result indicates a pending background task
         if result.metadata and result.metadata.get("status") == "pending" and result.metadata.get("task_id"):
@@ -554,3 +563,39 @@ async def run_posey_orchestration(
     except Exception as e:
         logger.error(f"Request {request_id} failed due to unexpected error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An internal error occurred during orchestration.")
+
+
+@router.post(
+    "/research/stream",
+    summary="Stream a research run",
+    description="Runs the research minion in streaming mode and returns its progress events as NDJSON."
+)
+async def stream_research(
+    fastapi_request: Request,
+    research_request: ResearchRequest
+):
+    """
+    Run the research minion with analysis overlapping the searches, one event per line
+
+    Events are ``plan``, ``source``, ``batch_analyzed``, ``synthesis_started``
+    and a final ``complete`` (carrying the research response) or ``error``.
+    """
+    try:
+        registry: MinionRegistry = fastapi_request.app.state.minion_registry
+    except AttributeError:
+        logger.critical("MinionRegistry not found in app state. Ensure it's initialized correctly.")
+        raise HTTPException(status_code=500, detail="Internal server error: Orchestrator configuration failed.")
+
+    minion = await registry.get_minion(db, "research")
+    if not isinstance(minion, ResearchMinion):
+        raise HTTPException(status_code=503, detail="Research minion is not available")
+
+    context = {**research_request.context, "user_id": fastapi_request.state.user['id']}
+
+    async def events():
+        async for event in minion.stream_research(research_request.query, research_request.objective, research_request.strategy, context):
+            if event["event"] == "complete":
+                event = {**event, "response": event["response"].model_dump(mode="json")}
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -7,6 +7,7 @@ from sqlalchemy import text
 from app.config import logger, db
 from app.middleware.response import standardize_response
 from app.config.defaults import LLM_CONFIG
+from app.utils.preferences_cache import preferences_cache
 import json;
 
 router = APIRouter(
@@ -114,9 +115,11 @@ async def update_user_preferences(
                     "preferences": json.dumps(merged_preferences)
                 }
             )
+            updated = result.fetchone()
             await session.commit()
 
-            updated = result.fetchone()
+            # Write-through so this worker's next chat turn sees the new preferences
+            preferences_cache.set(user_id, updated[1])
             return {
                 "user_id": updated[0],
                 "preferences": updated[1],
@@ -127,6 +130,7 @@ async def update_user_preferences(
     except HTTPException:
         raise
     except Exception as e:
+        preferences_cache.invalidate(user_id)
         logger.error(f"Error updating user preferences: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update user preferences: {str(e)}")
 
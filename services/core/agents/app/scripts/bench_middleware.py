@@ -0,0 +1,117 @@
+"""Micro-benchmark of the middleware stack on a trivial route.
+
+Compares the previous stack (no-op ``@app.middleware("http")`` debug
+middleware plus BaseHTTPMiddleware auth/timing) with the pure ASGI
+middleware in app.middleware. Requests are driven in-process through
+httpx's ASGI transport, so the numbers measure middleware overhead only.
+Session verification is served from a pre-seeded cache entry, so no auth
+service is needed.
+
+Usage:
+    python app/scripts/bench_middleware.py [--requests 5000] [--concurrency 50]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.auth import AuthMiddleware, session_verifier
+from app.middleware.timing import TimingMiddleware
+
+BENCH_TOKEN = "bench-access-token"
+BENCH_USER = {"id": "00000000-0000-0000-0000-000000000000", "email": "bench@posey.ai", "username": "bench", "role": "user"}
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """The previous BaseHTTPMiddleware auth shape, using the same verifier"""
+
+    async def dispatch(self, request: Request, call_next):
+        status_code, payload = await session_verifier.verify({"sAccessToken": request.cookies.get("sAccessToken", "")})
+        if status_code != 200:
+            return JSONResponse(status_code=status_code, content=payload)
+        request.state.user = payload
+        return await call_next(request)
+
+class LegacyTimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = f"{time.perf_counter() - start:.4f}"
+        return response
+
+def build_app(pure_asgi: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"user": request.state.user["id"]}
+
+    if pure_asgi:
+        app.add_middleware(AuthMiddleware)
+        app.add_middleware(TimingMiddleware)
+    else:
+        @app.middleware("http")
+        async def debug_request(request: Request, call_next):
+            response = await call_next(request)
+            return response
+
+        app.add_middleware(LegacyAuthMiddleware)
+        app.add_middleware(LegacyTimingMiddleware)
+    return app
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    """Return requests/sec for ``total`` requests with ``concurrency`` in flight"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={"sAccessToken": BENCH_TOKEN}) as client:
+        # Warm-up
+        for _ in range(50):
+            (await client.get("/ping")).raise_for_status()
+
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping")
+                if response.status_code != 200:
+                    raise RuntimeError(f"Unexpected status {response.status_code}: {response.text}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+async def main(total: int, concurrency: int, rounds: int):
+    # httpx logs every request at INFO, which would dominate the timings of both stacks
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # Serve verification from the session cache so no auth service is needed
+    session_verifier._sessions.set(session_verifier._token_key(BENCH_TOKEN), BENCH_USER, 3600)
+
+    results = {"before (BaseHTTPMiddleware)": [], "after (pure ASGI)": []}
+    for _ in range(rounds):
+        results["before (BaseHTTPMiddleware)"].append(await run(build_app(pure_asgi=False), total, concurrency))
+        results["after (pure ASGI)"].append(await run(build_app(pure_asgi=True), total, concurrency))
+
+    print(f"{total} requests x {rounds} rounds, concurrency {concurrency}")
+    for name, samples in results.items():
+        print(f"  {name:<28} best {max(samples):8.0f} req/s   mean {sum(samples) / len(samples):8.0f} req/s")
+    before = max(results["before (BaseHTTPMiddleware)"])
+    after = max(results["after (pure ASGI)"])
+    print(f"  speedup: {after / before:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.rounds))
@@ -0,0 +1,500 @@
+"""End-to-end benchmark of the Posey orchestrator with stubbed LLMs and local stand-ins.
+
+Each scenario is run through ``PoseyAgent.run`` directly ("agent" mode)
+and through ``POST /orchestrator/posey/run`` in-process over httpx's ASGI
+transport ("http" mode). The real app lifespan starts the service, so
+minions, the registry and the middleware stack are the production ones.
+Only the edges are replaced:
+
+- LLMs: pydantic-ai FunctionModels with configurable latency (bench_stubs.py),
+  or recorded production traffic replayed from a cassette (--cassette)
+- Qdrant: an in-memory client, or a local server with --qdrant-url
+- Auth and voyager: stub services on local ports (bench_stubs.py)
+
+Postgres is not stubbed: point the usual POSTGRES_* settings at a local
+database migrated and seeded like a development stack (minions and their
+LLM configs must exist). The memory minion loads the real embedding model;
+set --embedding-model to a small one to keep setup fast.
+
+Per-stage latencies come from the request's timing tree (app/utils/spans.py).
+Results are written as JSON; pass an earlier file to --compare to flag
+regressions between commits.
+
+With --cassette, agents answer from a cassette recorded with
+CASSETTE_MODE=record (app/utils/cassettes.py) instead of the stub models,
+at the recorded latencies times --latency-scale; voyager traffic in the
+cassette is replayed too. The scenarios still pick the user message, but
+routing follows the recorded content analyses. --cassette-mode record
+runs the scenarios against the real LLMs and writes a new cassette.
+
+Usage:
+    python app/scripts/bench_orchestrator.py [--scenarios chat,memory,search,multi] [--modes agent,http]
+        [--requests 50] [--concurrency 5] [--warmup 3] [--llm-latency-ms 400]
+        [--output bench-results/orchestrator.json] [--compare bench-results/orchestrator-<commit>.json]
+        [--cassette cassettes/production.jsonl [--cassette-mode replay] [--latency-scale 1.0]]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import contextlib
+import platform
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.scripts.bench_stubs import BENCH_TOKEN, BENCH_USER, Latency, StubModels, build_auth_app, build_voyager_app, serve
+
+# Known location, so the router doesn't look one up from the IP (a blocking call to ipapi.co)
+BENCH_LOCATION = {"city": "Portland", "region": "Oregon", "country": "United States", "timezone": "America/Los_Angeles"}
+
+MEMORY_TOPICS = ["travel plans", "work projects", "family", "cooking", "fitness goals", "books", "music", "finances"]
+
+def _target(minion_key: str, **params: Any) -> Dict[str, Any]:
+    return {
+        "target_type": "minion",
+        "target_key": minion_key,
+        "config_params": [{"key": key, "value": value} for key, value in params.items()]
+    }
+
+def _analysis(intent: str, targets: List[Dict[str, Any]] = (), requires_memory: bool = False) -> Dict[str, Any]:
+    """ContentAnalysis arguments the stub content analysis model answers with"""
+    return {
+        "intent": {"primary_intent": intent, "requires_memory": requires_memory},
+        "delegation": {
+            "should_delegate": bool(targets),
+            "delegation_targets": list(targets),
+            "priority": [t["target_key"] for t in targets]
+        },
+        "reasoning": "Benchmark scenario",
+        "confidence": 0.9
+    }
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    prompt: str
+    analysis: Dict[str, Any]
+    history: int = 0 # Prior user/assistant turns sent with the prompt
+    memories: int = 0 # Memories seeded for the benchmark user
+
+SCENARIOS = {
+    "chat": Scenario(
+        "chat",
+        "Chat only: content analysis and synthesis, no delegation",
+        "Tell me a joke about databases.",
+        _analysis("joke_request")
+    ),
+    "memory": Scenario(
+        "memory",
+        "Long history plus memory retrieval against a seeded collection",
+        "What did I tell you about my travel plans?",
+        _analysis("memory_recall", [_target("memory", operation="retrieve", query="travel plans", k=10)], requires_memory=True),
+        history=40,
+        memories=500
+    ),
+    "search": Scenario(
+        "search",
+        "Web search through voyager: memory prefetch, search, scraping and credibility",
+        "What is the latest research on solid state batteries?",
+        _analysis("web_search", [_target("voyager", operation="search", query="latest research on solid state batteries", max_results=5)])
+    ),
+    "multi": Scenario(
+        "multi",
+        "Multi-target plan: memory, voyager and research minions in sequence",
+        "Based on what you know about me, research good hiking trips for this autumn.",
+        _analysis("research", [
+            _target("memory", operation="retrieve", query="fitness goals and travel plans", k=5),
+            _target("voyager", operation="search", query="best autumn hiking trips", max_results=5),
+            _target("research", query="best autumn hiking trips for an intermediate hiker")
+        ], requires_memory=True),
+        history=10,
+        memories=500
+    )
+}
+
+def _messages(scenario: Scenario) -> List[Dict[str, Any]]:
+    messages = []
+    for turn in range(scenario.history):
+        role = "user" if turn % 2 == 0 else "assistant"
+        content = f"Earlier message {turn} about {MEMORY_TOPICS[turn % len(MEMORY_TOPICS)]}. " * 8
+        messages.append({"id": str(uuid4()), "role": role, "content": content, "sender_type": role, "created_at": datetime.now(timezone.utc).isoformat()})
+    messages.append({"id": str(uuid4()), "role": "user", "content": scenario.prompt, "sender_type": "user", "created_at": datetime.now(timezone.utc).isoformat()})
+    return messages
+
+@dataclass
+class Sample:
+    ok: bool
+    seconds: float
+    stages: Dict[str, List[float]] = field(default_factory=dict) # Span name -> durations (ms)
+    target_errors: int = 0
+
+def _stage_durations(tree: Optional[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Durations by span name; LLM spans are split by agent type (``llm:synthesis``)"""
+    durations: Dict[str, List[float]] = defaultdict(list)
+
+    def walk(node: Dict[str, Any]) -> None:
+        name = node["name"]
+        if name == "llm":
+            name = f"llm:{node.get('attributes', {}).get('agent_type', 'unknown')}"
+        durations[name].append(node["duration_ms"])
+        for child in node.get("children", []):
+            walk(child)
+
+    if tree:
+        walk(tree)
+    return durations
+
+def _target_errors(metadata: Dict[str, Any]) -> int:
+    return sum(1 for r in metadata.get("execution_results") or [] if r.get("status") == "error")
+
+def _percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "p50": round(_percentile(ordered, 50), 2),
+        "p95": round(_percentile(ordered, 95), 2),
+        "p99": round(_percentile(ordered, 99), 2),
+        "max": round(ordered[-1], 2)
+    }
+
+class Bench:
+    """Drives the scenarios against a started app"""
+
+    def __init__(self, app: Any, stubs: Optional[StubModels], cassette: Optional[Any] = None):
+        self.app = app
+        self.stubs = stubs
+        self.cassette = cassette
+
+    def llm_calls(self) -> int:
+        if self.stubs is not None:
+            return self.stubs.calls
+        return self.cassette.calls.get("llm", 0) if self.cassette is not None else 0
+
+    async def seed_memories(self, count: int) -> None:
+        """Store ``count`` synthetic memories for the benchmark user, shaped like MemoryMinion.store_memory's"""
+        from qdrant_client.http.models import PointStruct
+        from app.config import db
+        from app.config.settings import settings
+
+        memory_minion = self.app.state.initialized_minions.get("memory")
+        if memory_minion is None or memory_minion.embeddings is None:
+            print("  memory minion unavailable, not seeding memories")
+            return
+        rng = random.Random(count)
+        texts = [
+            f"The user mentioned {rng.choice(MEMORY_TOPICS)} (note {i}): {' '.join(rng.choice(MEMORY_TOPICS) for _ in range(6))}."
+            for i in range(count)
+        ]
+        vectors = await asyncio.to_thread(memory_minion.embeddings.embed_documents, texts)
+        points = []
+        for text, vector in zip(texts, vectors):
+            memory_id = str(uuid4())
+            points.append(PointStruct(id=memory_id, vector=vector, payload={
+                "page_content": text,
+                "metadata": {
+                    "user_id": BENCH_USER["id"],
+                    "agent_id": "memory",
+                    "timestamp": datetime.now().isoformat(),
+                    "memory_type": memory_minion.classify_memory_type(text),
+                    "id": memory_id
+                }
+            }))
+        for start in range(0, len(points), 128):
+            await db.qdrant.upsert(collection_name=settings.QDRANT_COLLECTION_NAME, points=points[start:start + 128], wait=True)
+        print(f"  seeded {count} memories")
+
+    async def run_agent(self, scenario: Scenario) -> Sample:
+        """One request through PoseyAgent.create + run, the way the /run route drives it"""
+        from app.config import db
+        from app.orchestrators.posey import PoseyAgent
+        from app.utils.spans import record_spans, span
+
+        started = time.perf_counter()
+        with record_spans("posey_run") as timings:
+            async with db.get_session() as session:
+                with span("create"):
+                    agent = await PoseyAgent.create(
+                        db=session,
+                        registry=self.app.state.minion_registry,
+                        initialized_minions=self.app.state.initialized_minions,
+                        user_preferences={}
+                    )
+                result = await agent.run(scenario.prompt, {
+                    "user_id": BENCH_USER["id"],
+                    "messages": _messages(scenario),
+                    "preferences": {},
+                    "location": BENCH_LOCATION,
+                    "metadata": {}
+                })
+        seconds = time.perf_counter() - started
+        ok = result.metadata.get("status") != "error"
+        return Sample(ok, seconds, _stage_durations(timings.to_dict()), _target_errors(result.metadata))
+
+    async def run_http(self, client: Any, scenario: Scenario) -> Sample:
+        from app.config.settings import settings
+
+        payload = {"messages": _messages(scenario), "metadata": {"preferences": {"location": BENCH_LOCATION}}}
+        started = time.perf_counter()
+        response = await client.post(
+            "/orchestrator/posey/run",
+            data={"payload": json.dumps(payload)},
+            headers={settings.TIMINGS_DEBUG_HEADER: "1"}
+        )
+        seconds = time.perf_counter() - started
+        try:
+            metadata = response.json().get("data", {}).get("metadata", {})
+        except ValueError:
+            metadata = {}
+        ok = response.status_code == 200 and metadata.get("status") != "error"
+        stages = _stage_durations(metadata.get("timings"))
+        stages["http_request"] = [seconds * 1000]
+        return Sample(ok, seconds, stages, _target_errors(metadata))
+
+    async def run_scenario(self, scenario: Scenario, mode: str, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+        import httpx
+
+        if self.stubs is not None:
+            self.stubs.structured["ContentAnalysis"] = lambda: scenario.analysis
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost", cookies={"sAccessToken": BENCH_TOKEN}, timeout=None) as client:
+            async def one() -> Sample:
+                try:
+                    if mode == "http":
+                        return await self.run_http(client, scenario)
+                    return await self.run_agent(scenario)
+                except Exception as e:
+                    print(f"    request failed: {type(e).__name__}: {e}")
+                    return Sample(False, 0.0)
+
+            for _ in range(warmup):
+                await one()
+
+            samples: List[Sample] = []
+            remaining = requests
+
+            async def worker():
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    samples.append(await one())
+
+            llm_calls = self.llm_calls()
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            wall = time.perf_counter() - started
+
+        stages: Dict[str, List[float]] = defaultdict(list)
+        for sample in samples:
+            for name, durations in sample.stages.items():
+                stages[name].extend(durations)
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for s in samples if not s.ok),
+            "target_errors": sum(s.target_errors for s in samples),
+            "concurrency": concurrency,
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(samples) / wall, 3) if wall else 0.0,
+            "llm_calls_per_request": round((self.llm_calls() - llm_calls) / max(1, len(samples)), 2),
+            "latency_ms": _summary([s.seconds * 1000 for s in samples if s.ok]),
+            "stages_ms": {name: _summary(values) for name, values in sorted(stages.items())}
+        }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def configure_environment(args: argparse.Namespace, auth_port: int, voyager_port: int) -> None:
+    """Point the app at the stand-ins; must run before anything under app.config is imported"""
+    os.environ["AUTH_SERVICE_INTERNAL_URL"] = f"http://127.0.0.1:{auth_port}"
+    os.environ["VOYAGER_DOMAIN"] = "127.0.0.1"
+    os.environ["VOYAGER_PORT"] = str(voyager_port)
+    # Every request comes from one user
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["LOG_LEVEL"] = args.log_level
+    if args.embedding_model:
+        os.environ["EMBEDDING_MODEL"] = args.embedding_model
+    if args.qdrant_url:
+        os.environ["QDRANT_URL"] = args.qdrant_url
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    auth_port, voyager_port = _free_port(), _free_port()
+    configure_environment(args, auth_port, voyager_port)
+
+    from app.config import db
+    from app.main import app
+
+    if not args.qdrant_url:
+        from qdrant_client import AsyncQdrantClient
+        from app.utils.telemetry import TimedQdrantClient
+        # connect_all keeps an already set client
+        db.qdrant_client = TimedQdrantClient(AsyncQdrantClient(location=":memory:"))
+
+    llm = Latency(args.llm_latency_ms / 1000, args.jitter, args.seed)
+    analysis = Latency((args.analysis_latency_ms if args.analysis_latency_ms is not None else args.llm_latency_ms) / 1000, args.jitter, args.seed)
+    stubs = StubModels(llm, latencies={"ContentAnalysis": analysis})
+    cassette = None
+    if args.cassette:
+        from app.utils import cassettes
+        cassette = cassettes.Cassette(args.cassette, args.cassette_mode, args.latency_scale, args.strict)
+        cassettes.install(cassette)
+        stubs = None
+    voyager = build_voyager_app(f"http://127.0.0.1:{voyager_port}", Latency(args.voyager_latency_ms / 1000, args.jitter, args.seed), args.search_results)
+
+    scenarios = [SCENARIOS[name] for name in args.scenarios]
+    modes = args.modes
+    results: Dict[str, Dict[str, Any]] = {}
+    with stubs.installed() if stubs is not None else contextlib.nullcontext():
+        async with serve(build_auth_app(), auth_port), serve(voyager, voyager_port):
+            async with app.router.lifespan_context(app):
+                bench = Bench(app, stubs, cassette)
+                seeded = max((s.memories for s in scenarios), default=0)
+                if seeded:
+                    await bench.seed_memories(seeded)
+                for scenario in scenarios:
+                    results[scenario.name] = {"description": scenario.description}
+                    for mode in modes:
+                        print(f"  {scenario.name} / {mode}: {args.requests} requests, concurrency {args.concurrency}")
+                        results[scenario.name][mode] = await bench.run_scenario(scenario, mode, args.requests, args.concurrency, args.warmup)
+
+    return {
+        "benchmark": "orchestrator",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": {"node": platform.node(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency_ms": args.llm_latency_ms,
+            "analysis_latency_ms": args.analysis_latency_ms,
+            "voyager_latency_ms": args.voyager_latency_ms,
+            "jitter": args.jitter,
+            "search_results": args.search_results,
+            "qdrant": args.qdrant_url or "memory",
+            "embedding_model": os.environ.get("EMBEDDING_MODEL"),
+            "cassette": cassette.stats() if cassette is not None else None
+        },
+        "results": results
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    for name, scenario in report["results"].items():
+        print(f"\n{name}: {scenario['description']}")
+        for mode, result in scenario.items():
+            if mode == "description":
+                continue
+            latency = result["latency_ms"]
+            print(f"  [{mode}] {result['throughput_rps']:.2f} req/s, {result['errors']} errors, {result['target_errors']} target errors, "
+                  f"p50 {latency.get('p50', 0):.0f}ms p95 {latency.get('p95', 0):.0f}ms p99 {latency.get('p99', 0):.0f}ms")
+            for stage, stats in result["stages_ms"].items():
+                print(f"      {stage:<32} n={stats['count']:<5} p50 {stats['p50']:>9.1f}ms  p95 {stats['p95']:>9.1f}ms  p99 {stats['p99']:>9.1f}ms")
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print stage-by-stage changes against ``baseline``; return the regressions beyond ``threshold``"""
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+
+    def change(before: float, after: float) -> float:
+        return (after - before) / before if before else 0.0
+
+    for name, scenario in current["results"].items():
+        for mode, result in scenario.items():
+            previous = baseline.get("results", {}).get(name, {}).get(mode)
+            if mode == "description" or not previous:
+                continue
+            delta = change(previous["throughput_rps"], result["throughput_rps"])
+            print(f"  {name} / {mode}: throughput {delta:+.1%}")
+            if delta < -threshold:
+                regressions.append(f"{name}/{mode} throughput {delta:+.1%}")
+            rows: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = [("request", previous["latency_ms"], result["latency_ms"])]
+            rows += [(stage, previous["stages_ms"][stage], stats) for stage, stats in result["stages_ms"].items() if stage in previous["stages_ms"]]
+            for stage, before, after in rows:
+                if not before.get("count") or not after.get("count"):
+                    continue
+                p50, p95 = change(before["p50"], after["p50"]), change(before["p95"], after["p95"])
+                flag = ""
+                # Ignore sub-millisecond noise
+                if p95 > threshold and after["p95"] - before["p95"] > 1.0:
+                    flag = "  REGRESSION"
+                    regressions.append(f"{name}/{mode} {stage} p95 {p95:+.1%}")
+                print(f"      {stage:<32} p50 {p50:+7.1%}  p95 {p95:+7.1%}{flag}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=["agent", "http"], help="Comma-separated subset of agent,http")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario and mode")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests before each run")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0, help="Latency of every stub model call")
+    parser.add_argument("--analysis-latency-ms", type=float, default=None, help="Latency of content analysis calls (default: --llm-latency-ms)")
+    parser.add_argument("--voyager-latency-ms", type=float, default=200.0, help="Latency of stub voyager searches and page fetches")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency varies by up to this fraction")
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--qdrant-url", default=None, help="Use a local Qdrant server instead of the in-memory client")
+    parser.add_argument("--embedding-model", default=None, help="EMBEDDING_MODEL for the memory minion")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default=None, help="Results file (default: bench-results/orchestrator-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative p95/throughput change counted as a regression")
+    parser.add_argument("--cassette", default=None, help="Replay (or record) LLM and voyager calls with this cassette instead of stub models")
+    parser.add_argument("--cassette-mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Replayed calls wait their recorded latency times this")
+    parser.add_argument("--strict", action="store_true", help="Replay only exact request matches")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS] + [m for m in args.modes if m not in ("agent", "http")]
+    if unknown:
+        parser.error(f"Unknown scenarios or modes: {', '.join(unknown)}")
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    output = args.output or os.path.join("bench-results", f"orchestrator-{(report['commit'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
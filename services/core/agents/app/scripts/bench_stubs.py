@@ -0,0 +1,244 @@
+"""Local stand-ins for the services the orchestrator calls, for benchmarks.
+
+- Stub LLMs: every agent built by ``create_agent`` gets a pydantic-ai
+  FunctionModel that waits a configurable latency and then answers with
+  text, a scripted ContentAnalysis, or schema-valid sample data for other
+  structured results.
+- Stub auth service: ``/auth/session`` accepts any ``sAccessToken`` as the
+  benchmark user.
+- Stub voyager service: ``/voyager/search`` and ``/voyager/run`` return
+  canned results whose URLs point back at its own ``/pages/{n}``, so
+  scraping stays local too.
+
+Run standalone to serve the HTTP stubs for a locally running agents API:
+    python app/scripts/bench_stubs.py [--auth-port 9999] [--voyager-port 7777]
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import contextlib
+from typing import Any, Callable, Dict, List, Optional
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+BENCH_TOKEN = "bench-access-token"
+BENCH_USER = {"id": "00000000-0000-0000-0000-00000000be4c", "email": "bench@posey.ai", "username": "bench", "role": "user"}
+
+class Latency:
+    """Seconds to wait per call: ``base`` give or take ``jitter`` (a fraction of base)"""
+
+    def __init__(self, base: float, jitter: float = 0.0, seed: Optional[int] = None):
+        self.base = base
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if not self.jitter:
+            return self.base
+        return max(0.0, self.base * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+    async def wait(self) -> None:
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+def sample_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Smallest value that validates against a pydantic JSON schema (required fields only)"""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return sample_from_schema(options[0], defs)
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: sample_from_schema(properties[name], defs) for name in schema.get("required", []) if name in properties}
+    if kind == "array":
+        return []
+    if kind == "string":
+        return "benchmark"
+    if kind == "integer":
+        return max(1, schema.get("minimum", 1))
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return False
+    return None
+
+class StubModels:
+    """Builds the FunctionModel for each agent ``create_agent`` instantiates.
+
+    ``structured`` maps a result type to a callable returning the tool
+    arguments to answer with (e.g. the scenario's ContentAnalysis); result
+    types without an entry get ``sample_from_schema`` data. Agents without
+    a result type answer with ``text``. ``latencies`` maps a result type
+    name to the latency for agents with that result type; ``default`` is
+    used for everything else.
+    """
+
+    def __init__(
+        self,
+        default: Latency,
+        latencies: Optional[Dict[str, Latency]] = None,
+        structured: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None,
+        text: str = "This is a benchmark response from a stub model."
+    ):
+        self.default = default
+        self.latencies = latencies or {}
+        self.structured = structured or {}
+        self.text = text
+        self.calls = 0
+
+    def model_for(self, result_type: Optional[type]) -> FunctionModel:
+        name = getattr(result_type, "__name__", None)
+        latency = self.latencies.get(name, self.default) if name else self.default
+        answer = self.structured.get(name)
+
+        async def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+            self.calls += 1
+            await latency.wait()
+            if info.result_tools:
+                tool = info.result_tools[0]
+                args = answer() if answer else sample_from_schema(tool.parameters_json_schema)
+                return ModelResponse(parts=[ToolCallPart(tool_name=tool.name, args=json.dumps(args))])
+            return ModelResponse(parts=[TextPart(self.text)])
+
+        return FunctionModel(respond)
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Make ``create_agent`` build agents on stub models for the duration of the block"""
+        from app.utils import agent as agent_module
+
+        def stub_agent(model: Any, *args, **kwargs) -> Agent:
+            return Agent(self.model_for(kwargs.get("result_type")), *args, **kwargs)
+
+        original = agent_module.Agent
+        agent_module.Agent = stub_agent
+        try:
+            yield self
+        finally:
+            agent_module.Agent = original
+
+def build_auth_app(user: Dict[str, Any] = None) -> FastAPI:
+    """Auth service stand-in: any access token is a session for ``user``"""
+    from app.config.settings import settings
+    user = user or BENCH_USER
+    app = FastAPI()
+
+    @app.get("/auth/session")
+    async def session(request: Request):
+        if not request.cookies.get("sAccessToken"):
+            return {"status": "NO_SESSION"}
+        return {"status": "OK", "user": user}
+
+    @app.get(settings.AUTH_JWKS_PATH)
+    async def jwks():
+        # No keys, so every token is verified (once, then cached) through /auth/session
+        return {"keys": []}
+
+    return app
+
+def build_voyager_app(base_url: str, latency: Latency = None, results: int = 5) -> FastAPI:
+    """Voyager service stand-in; result URLs point at this app's ``/pages/{n}``"""
+    latency = latency or Latency(0.0)
+    app = FastAPI()
+
+    @app.post("/voyager/search")
+    async def search(request: Request):
+        body = await request.json()
+        await latency.wait()
+        query = body.get("query", "")
+        limit = min(int(body.get("limit", results)), results)
+        return {
+            "results": [
+                {
+                    "title": f"Result {i} for {query}",
+                    "url": f"{base_url}/pages/{i}",
+                    "snippet": f"Snippet {i}: a short summary of a page about {query}."
+                }
+                for i in range(limit)
+            ],
+            "metadata": {"query": query, "search_engine": "stub"}
+        }
+
+    @app.post("/voyager/run")
+    async def run(request: Request):
+        body = await request.json()
+        await latency.wait()
+        return {"content": {"url": body.get("url"), "text": "Stub page content. " * 50}, "metadata": {"mode": "stub"}}
+
+    @app.get("/pages/{page}", response_class=HTMLResponse)
+    async def page(page: str):
+        await latency.wait()
+        paragraphs = "".join(f"<p>Paragraph {i} of stub page {page}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>" for i in range(10))
+        return f"<html><head><title>Stub page {page}</title><meta name=\"description\" content=\"Stub page {page}\"></head><body><main>{paragraphs}</main></body></html>"
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+class _StubServer(uvicorn.Server):
+    """uvicorn server that leaves signal handling to the process running it"""
+
+    def capture_signals(self):
+        return contextlib.nullcontext()
+
+@contextlib.asynccontextmanager
+async def serve(app: FastAPI, port: int, host: str = "127.0.0.1"):
+    """Serve ``app`` on the running event loop for the duration of the block"""
+    server = _StubServer(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result() # Raise the startup error
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+async def main(auth_port: int, voyager_port: int, host: str, voyager_latency: float, results: int):
+    voyager = build_voyager_app(f"http://{host}:{voyager_port}", Latency(voyager_latency), results)
+    async with serve(build_auth_app(), auth_port, host) as auth_url, serve(voyager, voyager_port, host) as voyager_url:
+        print(f"Stub auth service on {auth_url} (set AUTH_SERVICE_INTERNAL_URL), user {BENCH_USER['id']}")
+        print(f"Stub voyager service on {voyager_url} (set VOYAGER_DOMAIN/VOYAGER_PORT)")
+        await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the stub auth and voyager services")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--auth-port", type=int, default=9999)
+    parser.add_argument("--voyager-port", type=int, default=7777)
+    parser.add_argument("--voyager-latency-ms", type=float, default=200.0)
+    parser.add_argument("--search-results", type=int, default=5)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.auth_port, args.voyager_port, args.host, args.voyager_latency_ms / 1000, args.search_results))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,497 @@
+"""Load generator for the agents API: finds where the service saturates.
+
+Drives a running agents API over HTTP with a weighted mix of scenarios:
+
+- run: ``POST /orchestrator/posey/run`` with the benchmark prompts
+  (bench_orchestrator.SCENARIOS, history included)
+- conversation: ``POST /conversations/{id}/message``, then the latest
+  page of ``/conversations/{id}/messages`` and ``/conversations/``
+- memory: ``GET /conversations/search?hybrid=true``, full-text search
+  plus semantic search over the user's memories (there is no separate
+  memory router)
+
+Load is applied in steps, either as a closed loop (``--concurrency 1,5,10``:
+that many virtual users issuing requests back to back) or an open loop
+(``--rate 2,5,10``: Poisson arrivals per second, however slow the service
+gets). Each step runs for ``--duration`` seconds after ``--warmup`` seconds
+of unmeasured load. Every step reports throughput, error rate by status,
+latency percentiles and a histogram per route, and the run reports the
+saturation point: the first step where errors exceed ``--max-error-rate``,
+the open loop falls behind its arrival rate, the closed loop stops gaining
+throughput, or p95 grows past ``--latency-factor`` times the first step's.
+
+Point it at a stack with ``--base-url`` (stub auth and voyager from
+bench_stubs.py, LLMs replayed with CASSETTE_MODE=replay), or let it start
+everything: ``--spawn-server`` serves the stubs and runs uvicorn with
+``--workers`` processes (a comma-separated list is swept) and any
+``--server-env`` settings, e.g. pool sizes. ``--sweep KEY=v1,v2`` repeats
+the run for each value of one setting. Postgres and Qdrant are the stack's
+own; the load test user (stub auth's user, ``--user-id``) must exist in the
+users table for the conversation scenarios.
+
+Usage:
+    python app/scripts/loadtest.py --spawn-server --cassette cassettes/production.jsonl
+        [--workers 1,2,4] [--sweep POSTGRES_POOL_SIZE=5,10,20] [--concurrency 1,5,10,20,40]
+        [--rate 1,2,5,10] [--mix run=6,conversation=3,memory=1] [--duration 30] [--warmup 5]
+    python app/scripts/loadtest.py --base-url http://localhost:8000 --concurrency 5,10,20
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+import itertools
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import httpx
+
+from app.config.database import LatencyHistogram
+from app.scripts.bench_stubs import BENCH_TOKEN, BENCH_USER, Latency, build_auth_app, build_voyager_app, serve
+from app.scripts.bench_orchestrator import BENCH_LOCATION, MEMORY_TOPICS, SCENARIOS, _free_port, _git_commit, _messages, _summary
+
+SERVICE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+DEFAULT_MIX = "run=6,conversation=3,memory=1"
+
+class RequestFailed(Exception):
+    """A request in a scenario failed; already recorded against its route"""
+
+@dataclass
+class RouteStats:
+    histogram: LatencyHistogram = field(default_factory=lambda: LatencyHistogram(LATENCY_BUCKETS))
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: int = 0
+
+    def observe(self, seconds: float, status: str, ok: bool) -> None:
+        self.statuses[status] += 1
+        if not ok:
+            self.errors += 1
+            return
+        self.histogram.observe(seconds)
+        self.latencies_ms.append(seconds * 1000)
+
+    def report(self) -> Dict[str, Any]:
+        total = sum(self.statuses.values())
+        return {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "statuses": dict(self.statuses),
+            "latency_ms": _summary(self.latencies_ms),
+            "histogram": self.histogram.snapshot()
+        }
+
+class Recorder:
+    """Results of one load step, per route and per scenario iteration"""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.scenarios: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.dropped = 0
+
+class LoadSession:
+    """HTTP client and shared state for the virtual users"""
+
+    def __init__(self, client: httpx.AsyncClient, seed: int, user_id: str):
+        self.client = client
+        self.user_id = user_id
+        self.rng = random.Random(seed)
+        self.conversations: List[str] = []
+        self.recorder = Recorder()
+
+    async def request(self, route: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """One request, recorded under ``route``; raises RequestFailed on errors and 4xx/5xx"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            self.recorder.routes[route].observe(time.perf_counter() - started, "timeout", False)
+            raise RequestFailed(f"{route}: timeout")
+        except httpx.TransportError as e:
+            self.recorder.routes[route].observe(time.perf_counter() - started, type(e).__name__, False)
+            raise RequestFailed(f"{route}: {type(e).__name__}: {e}")
+        ok = response.status_code < 400
+        self.recorder.routes[route].observe(time.perf_counter() - started, str(response.status_code), ok)
+        if not ok:
+            raise RequestFailed(f"{route}: HTTP {response.status_code}")
+        return response
+
+    async def create_conversations(self, count: int) -> None:
+        for i in range(count):
+            try:
+                response = await self.request("POST /conversations/", "POST", "/conversations/", json={"title": f"Load test {i}"})
+            except RequestFailed as e:
+                print(f"  could not create conversations ({e}); does user {self.user_id} exist?")
+                return
+            self.conversations.append(response.json()["data"]["id"])
+        self.recorder = Recorder()
+
+# --- Scenarios: one iteration of a virtual user ---
+
+async def run_orchestrator(session: LoadSession) -> None:
+    scenario = session.rng.choice(list(SCENARIOS.values()))
+    payload = {"messages": _messages(scenario), "metadata": {"preferences": {"location": BENCH_LOCATION}}}
+    response = await session.request("POST /orchestrator/posey/run", "POST", "/orchestrator/posey/run", data={"payload": json.dumps(payload)})
+    if response.json().get("success") is False:
+        raise RequestFailed("run: success=false")
+
+async def converse(session: LoadSession) -> None:
+    conversation_id = session.rng.choice(session.conversations)
+    topic = session.rng.choice(MEMORY_TOPICS)
+    await session.request(
+        "POST /conversations/{id}/message",
+        "POST",
+        f"/conversations/{conversation_id}/message",
+        json={"content": f"Load test message about {topic}.", "role": "user", "sender_type": "human"}
+    )
+    await session.request("GET /conversations/{id}/messages", "GET", f"/conversations/{conversation_id}/messages", params={"limit": 50})
+    await session.request("GET /conversations/", "GET", "/conversations/", params={"limit": 20})
+
+async def search_memory(session: LoadSession) -> None:
+    query = session.rng.choice(MEMORY_TOPICS)
+    await session.request("GET /conversations/search", "GET", "/conversations/search", params={"q": query, "hybrid": "true"})
+
+LOAD_SCENARIOS: Dict[str, Callable[[LoadSession], Awaitable[None]]] = {
+    "run": run_orchestrator,
+    "conversation": converse,
+    "memory": search_memory
+}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in LOAD_SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', expected one of {', '.join(LOAD_SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+# --- Load models ---
+
+async def iteration(session: LoadSession, mix: Dict[str, float]) -> None:
+    name = session.rng.choices(list(mix), weights=list(mix.values()))[0]
+    started = time.perf_counter()
+    try:
+        await LOAD_SCENARIOS[name](session)
+    except RequestFailed:
+        session.recorder.scenarios[name].observe(time.perf_counter() - started, "error", False)
+    except Exception as e:
+        print(f"    {name} failed: {type(e).__name__}: {e}")
+        session.recorder.scenarios[name].observe(time.perf_counter() - started, type(e).__name__, False)
+    else:
+        session.recorder.scenarios[name].observe(time.perf_counter() - started, "ok", True)
+
+async def closed_loop(session: LoadSession, mix: Dict[str, float], concurrency: int, duration: float) -> float:
+    """``concurrency`` users issuing iterations back to back; returns the elapsed seconds"""
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await iteration(session, mix)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+async def open_loop(session: LoadSession, mix: Dict[str, float], rate: float, duration: float, max_in_flight: int) -> float:
+    """Poisson arrivals at ``rate`` per second regardless of completions; returns the elapsed seconds.
+
+    Arrivals while ``max_in_flight`` iterations are outstanding are dropped
+    (and counted): the service is saturated and queueing more only
+    measures the load generator.
+    """
+    started = time.perf_counter()
+    deadline = started + duration
+    next_arrival = started
+    in_flight: set = set()
+    while True:
+        next_arrival += session.rng.expovariate(rate)
+        if next_arrival >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if len(in_flight) >= max_in_flight:
+            session.recorder.dropped += 1
+            continue
+        task = asyncio.create_task(iteration(session, mix))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return time.perf_counter() - started
+
+# --- Steps and saturation ---
+
+async def run_step(session: LoadSession, args: argparse.Namespace, mix: Dict[str, float], kind: str, load: float) -> Dict[str, Any]:
+    async def apply(duration: float) -> float:
+        if kind == "rate":
+            return await open_loop(session, mix, load, duration, args.max_in_flight)
+        return await closed_loop(session, mix, int(load), duration)
+
+    if args.warmup:
+        await apply(args.warmup)
+    session.recorder = Recorder()
+    elapsed = await apply(args.duration)
+
+    recorder = session.recorder
+    iterations = RouteStats()
+    for stats in recorder.scenarios.values():
+        iterations.latencies_ms.extend(stats.latencies_ms)
+        iterations.errors += stats.errors
+        for status, count in stats.statuses.items():
+            iterations.statuses[status] += count
+    completed = sum(iterations.statuses.values())
+    return {
+        "load": {kind: load},
+        "elapsed_seconds": round(elapsed, 3),
+        "iterations": completed,
+        "errors": iterations.errors,
+        "error_rate": round(iterations.errors / completed, 4) if completed else 0.0,
+        "dropped": recorder.dropped,
+        "throughput_rps": round(completed / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": _summary(sorted(iterations.latencies_ms)),
+        "scenarios": {name: stats.report() for name, stats in sorted(recorder.scenarios.items())},
+        "routes": {route: stats.report() for route, stats in sorted(recorder.routes.items())}
+    }
+
+def find_saturation(steps: List[Dict[str, Any]], kind: str, max_error_rate: float, latency_factor: float) -> Optional[Dict[str, Any]]:
+    """First step showing saturation, with the reasons and the last healthy load"""
+    baseline_p95 = steps[0]["latency_ms"].get("p95") if steps else None
+    previous = None
+    for step in steps:
+        load = step["load"][kind]
+        reasons = []
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error rate {step['error_rate']:.1%}")
+        if step["dropped"]:
+            reasons.append(f"{step['dropped']} arrivals dropped at the in-flight limit")
+        if kind == "rate" and step["throughput_rps"] < 0.9 * load:
+            reasons.append(f"throughput {step['throughput_rps']:.2f}/s behind arrival rate {load:g}/s")
+        if kind == "concurrency" and previous is not None and step["throughput_rps"] < 1.05 * previous["throughput_rps"]:
+            reasons.append(f"throughput flat ({previous['throughput_rps']:.2f} -> {step['throughput_rps']:.2f}/s) as concurrency rose")
+        p95 = step["latency_ms"].get("p95")
+        if baseline_p95 and p95 and p95 > latency_factor * baseline_p95:
+            reasons.append(f"p95 {p95:.0f}ms over {latency_factor:g}x the first step's {baseline_p95:.0f}ms")
+        if reasons:
+            return {
+                kind: load,
+                "last_healthy": previous["load"][kind] if previous is not None else None,
+                "reasons": reasons
+            }
+        previous = step
+    return None
+
+def render_histogram(snapshot: Dict[str, Any], width: int = 40) -> List[str]:
+    """Text bars for a LatencyHistogram snapshot (cumulative buckets)"""
+    counts, previous = [], 0
+    for bound, cumulative in snapshot["buckets"].items():
+        counts.append((bound, cumulative - previous))
+        previous = cumulative
+    peak = max((count for _, count in counts), default=0) or 1
+    lines = []
+    for bound, count in counts:
+        label = "+Inf" if bound == "+Inf" else f"{float(bound) * 1000:g}ms"
+        lines.append(f"        <= {label:>9} {count:>7} {'#' * round(count / peak * width)}")
+    return lines
+
+# --- Targets ---
+
+@contextlib.asynccontextmanager
+async def spawn_server(args: argparse.Namespace, workers: int, env: Dict[str, str], auth_url: str, voyager_port: int):
+    """Run the agents API under uvicorn against the stubs; yields its base URL"""
+    port = _free_port()
+    server_env = dict(os.environ)
+    server_env.update({
+        "AUTH_SERVICE_INTERNAL_URL": auth_url,
+        "VOYAGER_DOMAIN": "127.0.0.1",
+        "VOYAGER_PORT": str(voyager_port),
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": args.log_level
+    })
+    if args.cassette:
+        server_env.update({"CASSETTE_MODE": "replay", "CASSETTE_PATH": os.path.abspath(args.cassette), "CASSETTE_LATENCY_SCALE": str(args.latency_scale)})
+    server_env.update(env)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVICE_ROOT,
+        env=server_env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + args.startup_timeout
+        async with httpx.AsyncClient(base_url=base_url, timeout=5.0) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+                try:
+                    await client.get("/health")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"Server not up after {args.startup_timeout}s")
+                    await asyncio.sleep(1.0)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            await asyncio.to_thread(process.wait, 30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def run_against(base_url: str, args: argparse.Namespace, mix: Dict[str, float]) -> Dict[str, Any]:
+    kind, loads = ("rate", args.rate) if args.rate else ("concurrency", args.concurrency)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, cookies={"sAccessToken": BENCH_TOKEN}, timeout=args.timeout, limits=limits) as client:
+        session = LoadSession(client, args.seed, args.user_id)
+        if "conversation" in mix:
+            await session.create_conversations(args.conversations)
+            if not session.conversations:
+                mix = {name: weight for name, weight in mix.items() if name != "conversation"}
+                print("  conversation scenario disabled")
+        steps = []
+        for load in loads:
+            print(f"    {kind} {load:g}: {args.warmup:g}s warm-up, {args.duration:g}s measured")
+            step = await run_step(session, args, mix, kind, load)
+            steps.append(step)
+            print_step(step, kind, args.histograms)
+    return {
+        "kind": kind,
+        "mix": mix,
+        "steps": steps,
+        "saturation": find_saturation(steps, kind, args.max_error_rate, args.latency_factor)
+    }
+
+def _configurations(args: argparse.Namespace) -> List[Tuple[int, Dict[str, str]]]:
+    """(workers, extra server env) for every run of the sweep"""
+    env = dict(item.split("=", 1) for item in args.server_env)
+    sweeps = [[(key, value) for value in values.split(",")] for key, _, values in (s.partition("=") for s in args.sweep)]
+    configurations = []
+    for workers in args.workers:
+        for combination in itertools.product(*sweeps):
+            configurations.append((workers, {**env, **dict(combination)}))
+    return configurations
+
+async def run_load_test(args: argparse.Namespace, mix: Dict[str, float]) -> Dict[str, Any]:
+    runs = []
+    if not args.spawn_server:
+        print(f"Target {args.base_url}")
+        runs.append({"target": args.base_url, **await run_against(args.base_url, args, mix)})
+    else:
+        auth_port, voyager_port = _free_port(), _free_port()
+        voyager = build_voyager_app(f"http://127.0.0.1:{voyager_port}", Latency(args.voyager_latency_ms / 1000, args.jitter, args.seed), args.search_results)
+        async with serve(build_auth_app({**BENCH_USER, "id": args.user_id}), auth_port) as auth_url, serve(voyager, voyager_port):
+            for workers, env in _configurations(args):
+                print(f"Server: {workers} worker(s) {' '.join(f'{k}={v}' for k, v in env.items())}")
+                async with spawn_server(args, workers, env, auth_url, voyager_port) as base_url:
+                    runs.append({"workers": workers, "env": env, **await run_against(base_url, args, mix)})
+
+    return {
+        "benchmark": "loadtest",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "mix": mix,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "timeout": args.timeout,
+            "cassette": args.cassette,
+            "latency_scale": args.latency_scale,
+            "max_error_rate": args.max_error_rate,
+            "latency_factor": args.latency_factor
+        },
+        "runs": runs
+    }
+
+# --- Reporting ---
+
+def print_step(step: Dict[str, Any], kind: str, histograms: bool) -> None:
+    latency = step["latency_ms"]
+    print(f"      {step['throughput_rps']:.2f} it/s, {step['iterations']} iterations, error rate {step['error_rate']:.1%}"
+          + (f", {step['dropped']} dropped" if step["dropped"] else "")
+          + f", p50 {latency.get('p50', 0):.0f}ms p95 {latency.get('p95', 0):.0f}ms p99 {latency.get('p99', 0):.0f}ms")
+    for route, stats in step["routes"].items():
+        route_latency = stats["latency_ms"]
+        statuses = " ".join(f"{status}:{count}" for status, count in sorted(stats["statuses"].items()))
+        print(f"        {route:<36} n={stats['requests']:<6} err {stats['error_rate']:>6.1%}  p50 {route_latency.get('p50', 0):>8.0f}ms  "
+              f"p95 {route_latency.get('p95', 0):>8.0f}ms  p99 {route_latency.get('p99', 0):>8.0f}ms  [{statuses}]")
+        if histograms:
+            for line in render_histogram(stats["histogram"]):
+                print(line)
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print("\nSaturation:")
+    for run in report["runs"]:
+        label = run.get("target") or f"{run['workers']} worker(s) {' '.join(f'{k}={v}' for k, v in run['env'].items())}"
+        saturation = run["saturation"]
+        kind = run["kind"]
+        if saturation is None:
+            highest = run["steps"][-1]["load"][kind] if run["steps"] else None
+            print(f"  {label}: not saturated up to {kind} {highest:g}")
+            continue
+        healthy = saturation["last_healthy"]
+        print(f"  {label}: saturated at {kind} {saturation[kind]:g}"
+              + (f" (last healthy {healthy:g})" if healthy is not None else " (already at the first step)")
+              + f": {'; '.join(saturation['reasons'])}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the agents API and find its saturation point")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Running agents API (ignored with --spawn-server)")
+    parser.add_argument("--spawn-server", action="store_true", help="Serve the stubs and run the API under uvicorn")
+    parser.add_argument("--workers", type=lambda s: [int(w) for w in s.split(",")], default=[1], help="uvicorn worker counts to sweep")
+    parser.add_argument("--server-env", action="append", default=[], help="KEY=VALUE setting for the spawned server (repeatable)")
+    parser.add_argument("--sweep", action="append", default=[], help="KEY=v1,v2,... setting to sweep on the spawned server (repeatable)")
+    parser.add_argument("--cassette", default=None, help="Replay LLM calls from this cassette in the spawned server")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Replayed calls wait their recorded latency times this")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted scenarios from {','.join(LOAD_SCENARIOS)}")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 5, 10, 20, 40], help="Closed-loop steps")
+    parser.add_argument("--rate", type=lambda s: [float(r) for r in s.split(",")], default=None, help="Open-loop steps in iterations per second (instead of --concurrency)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: drop arrivals beyond this many outstanding iterations")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each step")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per request")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--user-id", default=BENCH_USER["id"], help="User the stub auth service signs every request in as")
+    parser.add_argument("--conversations", type=int, default=20, help="Conversations created for the conversation scenario")
+    parser.add_argument("--voyager-latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate counted as saturation")
+    parser.add_argument("--latency-factor", type=float, default=3.0, help="p95 growth over the first step counted as saturation")
+    parser.add_argument("--histograms", action="store_true", help="Print a latency histogram per route and step")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", default=None, help="Results file (default: bench-results/loadtest-<commit>.json)")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.spawn_server and not args.cassette:
+        print("No --cassette: the spawned server will call the real LLM providers")
+
+    report = asyncio.run(run_load_test(args, mix))
+    print_summary(report)
+
+    output = args.output or os.path.join("bench-results", f"loadtest-{(report['commit'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
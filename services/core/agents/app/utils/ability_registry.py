@@ -5,6 +5,7 @@ from app.abilities.image_ability import ImageAbility
 from app.abilities.memory import MemoryAbility
 from app.abilities.file_processing import FileProcessingAbility
 from app.config import logger
+from app.utils.telemetry import observe_stage
 import asyncio
 
 class AbilityRequest(BaseModel):
@@ -103,7 +104,8 @@ class AbilityRegistry:
             # Execute the ability's main method (assuming 'execute')
             # Ensure the execute method is async
             if hasattr(ability_instance, 'execute') and asyncio.iscoroutinefunction(ability_instance.execute):
-                 result = await ability_instance.execute(request.parameters) # Pass parameters directly
+                 with observe_stage("ability", request.ability_name):
+                     result = await ability_instance.execute(request.parameters) # Pass parameters directly
             else:
                  # Handle synchronous execute or raise error if 'execute' is missing/not async
                  logger.error(f"Ability '{request.ability_name}' does not have a valid async execute method.")
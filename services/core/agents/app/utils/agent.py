@@ -1,11 +1,11 @@
-from typing import TypedDict, List, Dict, Any, TypeVar, Optional, Type
+from typing import TypedDict, List, Dict, Any, TypeVar, Optional, Type, Tuple
 from pydantic import BaseModel
 from pydantic_ai import Agent, RunContext
 from langgraph.graph import Graph
 import json
 from dataclasses import asdict, replace
 import logging
-import pprint
+import time
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
@@ -13,7 +13,10 @@ from app.utils.minion_registry import MinionRegistry
 
 from app.utils.prompt_helpers import getSystemPrompt
 from app.utils.ability_utils import execute_ability
-from app.config import logger
+from app.utils.telemetry import record_llm_run
+from app.utils.spans import span
+from app.utils.cassettes import cassette_model
+from app.config.logging import LogPayload
 from app.config.defaults import LLM_CONFIG, OLLAMA_URL
 from app.config.llm_loader import get_llm_config_from_db, LLMDatabaseConfig
 from app.config.prompts import PromptLoader
@@ -25,6 +28,8 @@ from app.db.models import MinionLLMConfig
 from app.models.analysis import ContentAnalysis
 from pydantic_ai.models.gemini import GeminiModel
 
+logger = logging.getLogger(__name__)
+
 __all__ = ['create_agent', 'run_agent_with_messages']
 
 T = TypeVar('T')
@@ -98,13 +103,16 @@ async def create_agent(
     result_type: Optional[Type[BaseModel]] = None,
     user_preferences: Optional[Dict[str, Any]] = None,
     db_llm_config_orm: Optional[MinionLLMConfig] = None,
-    available_abilities_list: Optional[List[Dict[str, Any]]] = None
+    available_abilities_list: Optional[List[Dict[str, Any]]] = None,
+    resolved_config: Optional[Tuple[Dict[str, Any], str]] = None
 ) -> Agent:
     """Create a PydanticAI agent. 
     
     Uses user preferences for orchestrator types, 
     DB config for minions (falling back to defaults).
-    Accepts pre-fetched available abilities list.
+    Accepts pre-fetched available abilities list, and an already resolved
+    (config, source) pair for orchestrator types, e.g. from the user
+    preferences cache.
     """
 
     # Define orchestrator types that use user preferences
@@ -140,6 +148,9 @@ async def create_agent(
             }
         }
         config_source = f"provided_orm (key: {db_llm_config_orm.config_key})"
+    elif agent_type in orchestrator_types and resolved_config is not None:
+        final_config, config_source = resolved_config
+        logger.info(f"Using pre-resolved configuration for '{agent_type}' (Source: {config_source})")
     elif agent_type in orchestrator_types:
         logger.info(f"Agent type '{agent_type}' identified as orchestrator. Checking user preferences...")
         preferred_provider = user_preferences.get("preferred_provider") if user_preferences else None
@@ -178,7 +189,7 @@ async def create_agent(
             final_config = db_llm_config.model_dump()
             final_config['provider'] = db_llm_config.provider_slug
             final_config['model'] = db_llm_config.model_id
-            final_config['base_url'] = getattr(db_llm_config.llm_model.provider, 'api_base_url', None)
+            final_config['base_url'] = db_llm_config.api_base_url
             final_config['model_params'] = {
                 "temperature": getattr(db_llm_config, 'temperature', 0.7),
                 "max_tokens": getattr(db_llm_config, 'max_tokens', 1000),
@@ -289,7 +300,7 @@ CRITICAL INSTRUCTIONS:
         # Instantiate Agent (Single block, handles all providers initially)
         logger.info(f"Instantiating Agent with identifier '{model_identifier}' and model settings: {model_params}")
         agent = Agent(
-            model_identifier,
+            cassette_model(model_identifier, result_type),
             system_prompt=system_prompt,
             deps_type=Dict[str, Any],
             result_type=result_type,
@@ -297,6 +308,29 @@ CRITICAL INSTRUCTIONS:
         )
         logger.info(f"Initial Agent instance created for type '{agent_type}' with model identifier '{model_identifier}'")
 
+        # Time every run and count its tokens per provider/model, as a metric and a span (run_with_messages goes through this too)
+        untimed_run = agent.run
+
+        async def run_with_metrics(*args, **kwargs):
+            with span("llm", agent_type=agent_type, provider=provider_slug, model=model_id) as llm_span:
+                started = time.perf_counter()
+                try:
+                    result = await untimed_run(*args, **kwargs)
+                except Exception:
+                    record_llm_run(provider_slug, model_id, agent_type, time.perf_counter() - started, outcome="error")
+                    raise
+                usage = result.usage() if hasattr(result, "usage") else None
+                record_llm_run(provider_slug, model_id, agent_type, time.perf_counter() - started, usage)
+                if llm_span is not None and usage is not None:
+                    llm_span.attributes.update(
+                        requests=getattr(usage, "requests", None),
+                        request_tokens=getattr(usage, "request_tokens", None),
+                        response_tokens=getattr(usage, "response_tokens", None)
+                    )
+                return result
+
+        agent.run = run_with_metrics
+
         # Add helper method for message-based communication
         async def run_with_messages(self, messages: List[Dict[str, str]], **kwargs):
             """Run the agent with a list of messages instead of a single prompt
@@ -494,10 +528,7 @@ class DebuggingGeminiModel(GeminiModel):
                 try:
                     schema_to_log = getattr(tool, 'parameters_json_schema', None)
                     if schema_to_log:
-                        logger.info(f"Schema for tool '{getattr(tool, 'name', 'UNKNOWN')}':")
-                        # Use pprint for better readability of complex dicts
-                        pretty_schema = pprint.pformat(schema_to_log, indent=2)
-                        logger.info(pretty_schema)
+                        logger.debug("Schema for tool '%s':\n%s", getattr(tool, 'name', 'UNKNOWN'), LogPayload(schema_to_log, pretty=True))
                     else:
                         logger.info(f"Tool '{getattr(tool, 'name', 'UNKNOWN')}' has no parameters_json_schema.")
                 except Exception as log_e:
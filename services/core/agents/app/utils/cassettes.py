@@ -0,0 +1,335 @@
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from app.config import logger
+from app.config.settings import settings
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+import httpx
+
+MODES = ("off", "record", "replay")
+
+# Headers that describe the wire encoding rather than the body we store (bodies are stored decoded)
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+# Request fields that change on every run and would make every fingerprint unique
+_VOLATILE_KEYS = {"timestamp", "tool_call_id"}
+
+class CassetteMiss(Exception):
+    """Replay has no recording for a call"""
+
+@dataclass
+class Interaction:
+    """One recorded call.
+
+    ``keys`` run from most to least specific (exact request fingerprint
+    first); replay serves the first key that has recordings. ``latency`` is
+    the wall time of the original call in seconds.
+    """
+    kind: str
+    name: str
+    keys: List[str]
+    request: Any
+    response: Any
+    latency: float
+    recorded_at: float = field(default_factory=time.time)
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items()) if k not in _VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def fingerprint(value: Any) -> str:
+    """Stable short hash of a JSON-able request, ignoring timestamps and tool call ids"""
+    text = json.dumps(_normalize(value), sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+class Cassette:
+    """Records calls to LLMs and external services, or replays them offline.
+
+    A cassette is a JSON lines file with one ``Interaction`` per line.
+
+    - ``record``: calls go through to the real model/service; each request,
+      response and latency is appended to the file.
+    - ``replay``: nothing leaves the process. Each call is answered from the
+      file after sleeping ``latency * latency_scale`` (0 disables the wait).
+      Calls are matched on the exact request fingerprint first; unless
+      ``strict``, an unmatched call falls back to recordings of the same
+      kind (same result type, service route, provider) so differently
+      worded traffic still gets production-shaped answers. Recordings
+      sharing a key are served round-robin, so replay is deterministic for
+      a given call order.
+
+    Three call sites are covered: agents built by ``create_agent``
+    (``cassette_model``), httpx clients using ``CassetteTransport`` (voyager
+    service and page scraping) and ``Cassette.through`` (image providers).
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 1.0, strict: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self.calls: Dict[str, int] = {} # Recorded or replayed, by kind (llm, http, image)
+        self._index: Dict[str, List[Interaction]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._pending: List[str] = []
+        self._write_lock = asyncio.Lock()
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        count = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = Interaction(**json.loads(line))
+                for key in interaction.keys:
+                    self._index.setdefault(key, []).append(interaction)
+                count += 1
+        logger.info(f"Loaded {count} recorded interactions from cassette {self.path}")
+
+    # --- Replay ---
+
+    def lookup(self, keys: List[str]) -> Interaction:
+        for key in keys[:1] if self.strict else keys:
+            recordings = self._index.get(key)
+            if recordings:
+                cursor = self._cursors.get(key, 0)
+                self._cursors[key] = cursor + 1
+                return recordings[cursor % len(recordings)]
+        self.misses += 1
+        raise CassetteMiss(f"No recording in {self.path} for {keys[0]}")
+
+    async def replay(self, keys: List[str]) -> Interaction:
+        interaction = self.lookup(keys)
+        delay = interaction.latency * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.replayed += 1
+        self.calls[interaction.kind] = self.calls.get(interaction.kind, 0) + 1
+        return interaction
+
+    # --- Record ---
+
+    async def record(self, interaction: Interaction) -> None:
+        self._pending.append(json.dumps(asdict(interaction), default=str, ensure_ascii=False))
+        self.recorded += 1
+        self.calls[interaction.kind] = self.calls.get(interaction.kind, 0) + 1
+        if len(self._pending) >= settings.CASSETTE_FLUSH_EVERY:
+            await self.flush()
+
+    def _write(self, lines: List[str]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+    async def flush(self) -> None:
+        """Append pending recordings to the file (off the event loop)"""
+        async with self._write_lock:
+            lines, self._pending = self._pending, []
+            if lines:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+
+    async def close(self) -> None:
+        if self.mode == "record":
+            await self.flush()
+        logger.info(f"Cassette {self.path} closed: {self.recorded} recorded, {self.replayed} replayed, {self.misses} misses")
+
+    # --- Generic calls ---
+
+    async def through(self, kind: str, name: str, request: Dict[str, Any], call: Callable[[], Awaitable[Any]]) -> Any:
+        """Record or replay an awaitable whose result is JSON-able:
+        ``await cassette.through("image", "dalle:dall-e-3", {...}, lambda: provider.generate(...))``
+        """
+        keys = [f"{kind}:{name}:{fingerprint(request)}", f"{kind}:{name}"]
+        if self.mode == "replay":
+            return (await self.replay(keys)).response
+
+        started = time.perf_counter()
+        result = await call()
+        if self.mode == "record":
+            await self.record(Interaction(kind, name, keys, _normalize(request), result, time.perf_counter() - started))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "latency_scale": self.latency_scale,
+            "strict": self.strict,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "calls": dict(self.calls)
+        }
+
+# The cassette in use by this worker, if any; set by install() (lifespan, benchmarks, load tests)
+active: Optional[Cassette] = None
+
+def install(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """Make ``cassette`` the active one; returns the previous one"""
+    global active
+    previous, active = active, cassette
+    if cassette is not None:
+        logger.info(f"Cassette {cassette.mode} mode: {cassette.path} (latency scale {cassette.latency_scale})")
+    return previous
+
+def from_settings() -> Optional[Cassette]:
+    """Cassette configured by CASSETTE_MODE/CASSETTE_PATH, or None when off"""
+    if settings.CASSETTE_MODE == "off":
+        return None
+    return Cassette(
+        settings.CASSETTE_PATH,
+        settings.CASSETTE_MODE,
+        settings.CASSETTE_LATENCY_SCALE,
+        settings.CASSETTE_STRICT
+    )
+
+async def through(kind: str, name: str, request: Dict[str, Any], call: Callable[[], Awaitable[Any]]) -> Any:
+    """``Cassette.through`` on the active cassette; just awaits ``call`` when there is none"""
+    if active is None:
+        return await call()
+    return await active.through(kind, name, request, call)
+
+# --- LLM calls ---
+
+def _llm_keys(name: str, messages: List[Any]) -> Tuple[List[str], Any]:
+    from pydantic_ai.messages import ModelMessagesTypeAdapter
+    request = ModelMessagesTypeAdapter.dump_python(messages, mode="json")
+    return [f"llm:{name}:{fingerprint(request)}", f"llm:{name}"], request
+
+def _replay_model(cassette: Cassette, name: str) -> Any:
+    from pydantic_ai.messages import ModelMessagesTypeAdapter, ModelResponse
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    async def respond(messages: List[Any], info: AgentInfo) -> ModelResponse:
+        keys, _ = _llm_keys(name, messages)
+        interaction = await cassette.replay(keys)
+        return ModelMessagesTypeAdapter.validate_python([interaction.response])[0]
+
+    return FunctionModel(respond)
+
+def _recording_model(cassette: Cassette, name: str, model: Any) -> Any:
+    from pydantic_ai.messages import ModelMessagesTypeAdapter
+    from pydantic_ai.models.wrapper import WrapperModel
+
+    class RecordingModel(WrapperModel):
+        async def request(self, messages, *args, **kwargs):
+            started = time.perf_counter()
+            result = await super().request(messages, *args, **kwargs)
+            response = result[0] if isinstance(result, tuple) else result
+            keys, request = _llm_keys(name, messages)
+            await cassette.record(Interaction(
+                "llm",
+                name,
+                keys,
+                request,
+                ModelMessagesTypeAdapter.dump_python([response], mode="json")[0],
+                time.perf_counter() - started
+            ))
+            return result
+
+    return RecordingModel(model)
+
+def cassette_model(model: Any, result_type: Optional[type] = None) -> Any:
+    """The model to build an agent on: ``model`` itself unless a cassette is active.
+
+    Recordings are keyed by the agent's result type (``text`` for plain
+    text agents); streamed runs are not recorded.
+    """
+    if active is None or active.mode == "off":
+        return model
+    name = getattr(result_type, "__name__", None) or "text"
+    if active.mode == "replay":
+        return _replay_model(active, name)
+    return _recording_model(active, name, model)
+
+# --- HTTP calls ---
+
+def _body(content: bytes) -> Union[str, Dict[str, str]]:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode("ascii")}
+
+def _content(body: Union[str, Dict[str, str]]) -> bytes:
+    if isinstance(body, dict):
+        return base64.b64decode(body["base64"])
+    return body.encode("utf-8")
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records or replays through the active cassette.
+
+    Pass it to clients whose traffic should be capturable:
+    ``httpx.AsyncClient(transport=CassetteTransport("voyager"))``. With no
+    active cassette requests go straight to the network, so the transport
+    can stay in place in production.
+    """
+
+    def __init__(self, service: str, **transport_kwargs: Any):
+        self.service = service
+        self._transport = httpx.AsyncHTTPTransport(**transport_kwargs)
+
+    def _keys(self, request: httpx.Request) -> List[str]:
+        method, url = request.method, request.url
+        return [
+            f"http:{self.service}:{method} {url}:{fingerprint(_body(request.content))}",
+            f"http:{self.service}:{method} {url.path}",
+            f"http:{self.service}:{method}"
+        ]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = active
+        if cassette is None or cassette.mode == "off":
+            return await self._transport.handle_async_request(request)
+
+        await request.aread()
+        keys = self._keys(request)
+        if cassette.mode == "replay":
+            recorded = (await cassette.replay(keys)).response
+            return httpx.Response(recorded["status"], headers=recorded["headers"], content=_content(recorded["body"]), request=request)
+
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        # Read through a throwaway Response so the stored body is decoded (gzip/br) like the client sees it
+        decoded = httpx.Response(response.status_code, headers=response.headers, stream=response.stream, request=request)
+        content = await decoded.aread()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        await cassette.record(Interaction(
+            "http",
+            self.service,
+            keys,
+            {"method": request.method, "url": str(request.url), "body": _body(request.content)},
+            {"status": response.status_code, "headers": headers, "body": _body(content)},
+            time.perf_counter() - started
+        ))
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+__all__ = [
+    'Cassette',
+    'CassetteMiss',
+    'CassetteTransport',
+    'Interaction',
+    'cassette_model',
+    'fingerprint',
+    'from_settings',
+    'install',
+    'through'
+]
@@ -0,0 +1,285 @@
+from typing import Dict, Any, List, Optional
+from qdrant_client.http import models
+from app.config import logger, db
+from app.config.settings import settings
+from app.utils.embeddings import get_embeddings
+from app.utils.source_utils import canonicalize_url, get_domain
+import asyncio
+import hashlib
+import time
+import uuid
+
+# Namespace for deterministic point ids: re-indexing a page overwrites its chunks in place
+_POINT_NAMESPACE = uuid.UUID("5b8f3a34-6a2e-4c8e-9d59-2f3c1f0c7a11")
+
+def chunk_text(text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """Split text into overlapping chunks, preferring to break on whitespace"""
+    chunk_size = chunk_size or settings.SCRAPED_CONTENT_CHUNK_SIZE
+    overlap = settings.SCRAPED_CONTENT_CHUNK_OVERLAP if overlap is None else overlap
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_size)
+        if end < len(text):
+            # Back off to the last space so words are not cut in half
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space != -1:
+                end = space
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+def content_hash(text: str) -> str:
+    """Stable hash of page text, used to skip re-embedding unchanged pages"""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+class ScrapedContentIndex:
+    """Semantic index of scraped page text in a dedicated Qdrant collection.
+
+    Each page is stored as embedded chunks whose payload carries the
+    canonical URL, a hash of the page text and the fetch time. Callers look
+    pages up here first and only fetch from the web when nothing fresh
+    enough is indexed. All methods degrade to "not found" when Qdrant or
+    the embedding model is unavailable.
+    """
+
+    def __init__(self, collection_name: str = None):
+        self.collection_name = collection_name or settings.SCRAPED_CONTENT_COLLECTION
+        self._ready = False
+        self._setup_lock = asyncio.Lock()
+
+    async def _ensure_collection(self) -> bool:
+        """Create the collection and payload indexes on first use"""
+        if self._ready:
+            return True
+
+        async with self._setup_lock:
+            if self._ready:
+                return True
+            try:
+                client = db.qdrant
+                collections = await client.get_collections()
+                if not any(c.name == self.collection_name for c in collections.collections):
+                    vector_size = len((await get_embeddings("Sample text"))[0])
+                    await client.create_collection(
+                        collection_name=self.collection_name,
+                        vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+                        on_disk_payload=True
+                    )
+                    logger.info(f"Created Qdrant collection '{self.collection_name}' with vector size {vector_size}")
+
+                for field_name, field_type in (
+                    ("canonical_url", models.PayloadSchemaType.KEYWORD),
+                    ("content_hash", models.PayloadSchemaType.KEYWORD),
+                    ("domain", models.PayloadSchemaType.KEYWORD),
+                    ("fetched_at", models.PayloadSchemaType.FLOAT),
+                ):
+                    try:
+                        await client.create_payload_index(
+                            collection_name=self.collection_name,
+                            field_name=field_name,
+                            field_schema=field_type
+                        )
+                    except Exception as e:
+                        if "already exists" not in str(e):
+                            raise
+
+                self._ready = True
+            except Exception as e:
+                logger.warning(f"Scraped content index unavailable: {e}")
+        return self._ready
+
+    @staticmethod
+    def _url_filter(canonical_url: str) -> models.Filter:
+        return models.Filter(must=[
+            models.FieldCondition(key="canonical_url", match=models.MatchValue(value=canonical_url))
+        ])
+
+    @staticmethod
+    def _freshness_condition(max_age_hours: float) -> models.FieldCondition:
+        return models.FieldCondition(
+            key="fetched_at",
+            range=models.Range(gte=time.time() - max_age_hours * 3600)
+        )
+
+    async def _page_points(self, canonical_url: str) -> List[Any]:
+        points, _ = await db.qdrant.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=self._url_filter(canonical_url),
+            limit=256,
+            with_payload=True,
+            with_vectors=False
+        )
+        return points
+
+    async def get_page(self, url: str, max_age_hours: float = None) -> Optional[Dict[str, Any]]:
+        """Return an indexed page if it was fetched within ``max_age_hours``, else None"""
+        canonical = canonicalize_url(url)
+        if not canonical or not await self._ensure_collection():
+            return None
+
+        max_age_hours = settings.SCRAPED_CONTENT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+        try:
+            points = await self._page_points(canonical)
+            if not points:
+                return None
+
+            payload = points[0].payload or {}
+            if payload.get("fetched_at", 0) < time.time() - max_age_hours * 3600:
+                return None
+
+            first_chunk = next((p.payload for p in points if p.payload.get("chunk_index") == 0), None)
+            if not first_chunk or not first_chunk.get("page_text"):
+                return None
+
+            return {
+                "url": payload.get("url", url),
+                "canonical_url": canonical,
+                "title": payload.get("title", ""),
+                "text": first_chunk["page_text"],
+                "content_hash": payload.get("content_hash"),
+                "fetched_at": payload.get("fetched_at")
+            }
+        except Exception as e:
+            logger.warning(f"Scraped content lookup failed for {url}: {e}")
+            return None
+
+    async def index_pages(self, pages: List[Dict[str, Any]], source: str = "voyager") -> int:
+        """Chunk, embed and store pages ({url, text, title}). Returns the number of pages (re)indexed.
+
+        Pages whose text hash matches what is already stored only get their
+        fetch time refreshed; changed pages have their old chunks replaced.
+        Chunks of all pages are embedded together in batches.
+        """
+        if not pages or not await self._ensure_collection():
+            return 0
+
+        client = db.qdrant
+        fetched_at = time.time()
+        pending = []
+        try:
+            for page in pages:
+                canonical = canonicalize_url(page.get("url"))
+                text = (page.get("text") or "").strip()
+                if not canonical or not text:
+                    continue
+
+                page_hash = content_hash(text)
+                existing = await self._page_points(canonical)
+                if existing and all(p.payload.get("content_hash") == page_hash for p in existing):
+                    await client.set_payload(
+                        collection_name=self.collection_name,
+                        payload={"fetched_at": fetched_at},
+                        points=[p.id for p in existing]
+                    )
+                    continue
+                if existing:
+                    await client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=models.FilterSelector(filter=self._url_filter(canonical))
+                    )
+
+                chunks = chunk_text(text)
+                pending.append((page, canonical, text, page_hash, chunks))
+
+            texts = [chunk for *_, chunks in pending for chunk in chunks]
+            if not texts:
+                return 0
+            vectors = iter(await get_embeddings(texts))
+
+            points = []
+            for page, canonical, text, page_hash, chunks in pending:
+                for index, chunk in enumerate(chunks):
+                    points.append(models.PointStruct(
+                        id=str(uuid.uuid5(_POINT_NAMESPACE, f"{canonical}#{index}")),
+                        vector=next(vectors),
+                        payload={
+                            "canonical_url": canonical,
+                            "url": page.get("url"),
+                            "domain": get_domain(canonical),
+                            "title": page.get("title", ""),
+                            "content_hash": page_hash,
+                            "fetched_at": fetched_at,
+                            "chunk_index": index,
+                            "chunk_count": len(chunks),
+                            "text": chunk,
+                            "source": source,
+                            # Full text lives on the first chunk only, so get_page needs no re-assembly
+                            **({"page_text": text} if index == 0 else {})
+                        }
+                    ))
+
+            await client.upsert(collection_name=self.collection_name, points=points, wait=False)
+            logger.info(f"Indexed {len(pending)} pages ({len(points)} chunks) into '{self.collection_name}'")
+            return len(pending)
+        except Exception as e:
+            logger.warning(f"Failed to index scraped content: {e}")
+            return 0
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 5,
+        max_age_hours: float = None,
+        min_score: float = None
+    ) -> List[Dict[str, Any]]:
+        """Find fresh indexed pages relevant to a query, best first, one entry per page"""
+        if not query or not await self._ensure_collection():
+            return []
+
+        max_age_hours = settings.SCRAPED_CONTENT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+        min_score = settings.SCRAPED_CONTENT_MIN_SCORE if min_score is None else min_score
+        try:
+            query_vector = (await get_embeddings(query))[0]
+            hits = await db.qdrant.search(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                query_filter=models.Filter(must=[self._freshness_condition(max_age_hours)]),
+                # Several chunks usually match per page; over-fetch so grouping still fills the limit
+                limit=limit * 4,
+                score_threshold=min_score,
+                with_payload=True
+            )
+        except Exception as e:
+            logger.warning(f"Scraped content search failed for '{query}': {e}")
+            return []
+
+        pages: Dict[str, Dict[str, Any]] = {}
+        for hit in hits:
+            payload = hit.payload or {}
+            canonical = payload.get("canonical_url")
+            if not canonical:
+                continue
+            page = pages.get(canonical)
+            if page is None:
+                if len(pages) >= limit:
+                    continue
+                page = pages[canonical] = {
+                    "url": payload.get("url") or canonical,
+                    "title": payload.get("title", ""),
+                    "content": "",
+                    "relevance_score": hit.score,
+                    "fetched_at": payload.get("fetched_at"),
+                    "from_index": True,
+                    "_chunks": []
+                }
+            page["_chunks"].append((payload.get("chunk_index", 0), payload.get("text", "")))
+
+        results = []
+        for page in pages.values():
+            page["content"] = " ".join(text for _, text in sorted(page.pop("_chunks")))
+            results.append(page)
+        return results
+
+# Shared instance used by minions
+content_index = ScrapedContentIndex()
+
+__all__ = ['ScrapedContentIndex', 'content_index', 'chunk_text', 'content_hash']
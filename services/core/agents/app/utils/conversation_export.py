@@ -0,0 +1,157 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import logger, db
+from app.models.schemas import Conversation, ConversationMessage
+from app.utils.json_encoder import CustomJSONEncoder
+from app.utils.pagination import keyset_condition, order_by_keyset, encode_cursor
+
+# Rows fetched per round trip from the server-side cursor; also the number of records per yielded chunk
+EXPORT_BATCH_SIZE = 500
+# Conversations per keyset page in bulk exports
+CONVERSATION_PAGE_SIZE = 100
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "jsonl": "application/jsonl",
+    "json": "application/json",
+    "markdown": "text/markdown; charset=utf-8",
+}
+EXPORT_EXTENSIONS = {"ndjson": "ndjson", "jsonl": "jsonl", "json": "json", "markdown": "md"}
+
+_encoder = CustomJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+CONVERSATION_COLUMNS = (
+    Conversation.id,
+    Conversation.user_id,
+    Conversation.title,
+    Conversation.status,
+    Conversation.meta.label('metadata'),
+    Conversation.project_id,
+    Conversation.created_at,
+    Conversation.updated_at
+)
+
+MESSAGE_COLUMNS = (
+    ConversationMessage.id,
+    ConversationMessage.role,
+    ConversationMessage.sender_type,
+    ConversationMessage.content,
+    ConversationMessage.meta.label('metadata'),
+    ConversationMessage.created_at
+)
+
+def markdown_message(role: Optional[str], content: str) -> str:
+    prefix = "🤖 Assistant" if role == "assistant" else "👤 User"
+    return f"### {prefix}\n{content}\n\n"
+
+def markdown_header(conversation: Dict[str, Any]) -> str:
+    return f"# {conversation.get('title') or 'Untitled conversation'}\n\n"
+
+class ConversationExporter:
+    """Writes conversations as NDJSON/JSON-lines, a JSON document or Markdown, chunk by chunk.
+
+    Messages are read through a server-side cursor (``AsyncSession.stream``)
+    in batches of EXPORT_BATCH_SIZE and each batch is encoded and yielded
+    before the next is fetched, so memory use does not depend on how long
+    a conversation is. Bulk exports walk the user's conversations in keyset
+    pages and stream each one's messages the same way.
+    """
+
+    def __init__(self, fmt: str, batch_size: int = EXPORT_BATCH_SIZE):
+        if fmt not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unsupported export format '{fmt}'")
+        self.fmt = fmt
+        self.batch_size = batch_size
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_MEDIA_TYPES[self.fmt]
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}.{EXPORT_EXTENSIONS[self.fmt]}"
+
+    async def _message_batches(self, session: AsyncSession, conversation_id: UUID) -> AsyncIterator[List[Any]]:
+        stmt = (
+            select(*MESSAGE_COLUMNS)
+            .where(ConversationMessage.conversation_id == conversation_id)
+            .order_by(*order_by_keyset(ConversationMessage.created_at, ConversationMessage.id, descending=False))
+            .execution_options(yield_per=self.batch_size)
+        )
+        result = await session.stream(stmt)
+        async for batch in result.mappings().partitions(self.batch_size):
+            yield batch
+
+    async def _conversation(self, session: AsyncSession, conversation: Dict[str, Any], first: bool) -> AsyncIterator[str]:
+        """Chunks for one conversation; ``first`` is False for later conversations of a bulk JSON export"""
+        if self.fmt in ("ndjson", "jsonl"):
+            yield _encoder.encode({"type": "conversation", **conversation}) + "\n"
+            async for batch in self._message_batches(session, conversation["id"]):
+                yield "".join(
+                    _encoder.encode({"type": "message", "conversation_id": conversation["id"], **row}) + "\n"
+                    for row in batch
+                )
+
+        elif self.fmt == "json":
+            yield ("" if first else ",") + '{"conversation":' + _encoder.encode(conversation) + ',"messages":['
+            first_batch = True
+            async for batch in self._message_batches(session, conversation["id"]):
+                yield ("" if first_batch else ",") + ",".join(_encoder.encode(dict(row)) for row in batch)
+                first_batch = False
+            yield "]}"
+
+        else:
+            yield ("" if first else "\n---\n\n") + markdown_header(conversation)
+            async for batch in self._message_batches(session, conversation["id"]):
+                yield "".join(markdown_message(row["role"], row["content"]) for row in batch)
+
+    async def export_conversation(self, conversation_id: UUID) -> AsyncIterator[str]:
+        """Stream one conversation (the caller has already checked access)"""
+        async with db.get_session() as session:
+            conversation = (await session.execute(
+                select(*CONVERSATION_COLUMNS).where(Conversation.id == conversation_id)
+            )).mappings().first()
+            if conversation is None:
+                return
+            async for chunk in self._conversation(session, dict(conversation), first=True):
+                yield chunk
+
+    async def export_user_conversations(self, user_id: Any) -> AsyncIterator[str]:
+        """Stream all of a user's conversations, oldest first"""
+        exported = 0
+        if self.fmt == "json":
+            yield '{"conversations":['
+        async with db.get_session() as session:
+            cursor = None
+            while True:
+                stmt = (
+                    select(*CONVERSATION_COLUMNS)
+                    .where(Conversation.user_id == user_id)
+                    .order_by(*order_by_keyset(Conversation.created_at, Conversation.id, descending=False))
+                    .limit(CONVERSATION_PAGE_SIZE)
+                )
+                if cursor:
+                    stmt = stmt.where(keyset_condition(Conversation.created_at, Conversation.id, cursor, descending=False))
+                page = (await session.execute(stmt)).mappings().all()
+                if not page:
+                    break
+
+                for conversation in page:
+                    async for chunk in self._conversation(session, dict(conversation), first=exported == 0):
+                        yield chunk
+                    exported += 1
+
+                if len(page) < CONVERSATION_PAGE_SIZE:
+                    break
+                cursor = encode_cursor(page[-1]["created_at"], page[-1]["id"])
+        if self.fmt == "json":
+            yield "]}"
+        logger.info(f"Exported {exported} conversations for user {user_id} as {self.fmt}")
+
+__all__ = [
+    'ConversationExporter',
+    'EXPORT_MEDIA_TYPES',
+    'markdown_message',
+    'markdown_header'
+]
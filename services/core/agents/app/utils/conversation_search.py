@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from qdrant_client import models
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import logger, db
+from app.config.settings import settings
+from app.models.schemas import Conversation, ConversationMessage
+from app.utils.embeddings import get_embeddings
+from app.utils.pagination import (
+    encode_cursor,
+    encode_ranked_cursor,
+    keyset_condition,
+    order_by_keyset,
+    ranked_keyset_condition
+)
+
+# Must match the configuration of the generated search_vector column (migration 029)
+CONVERSATION_SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+_regconfig = literal_column(f"'{CONVERSATION_SEARCH_CONFIG}'::regconfig")
+
+def _tsquery(query: str):
+    """Parse user input the way web search boxes do: quoted phrases, OR, -excluded words"""
+    return func.websearch_to_tsquery(_regconfig, query)
+
+async def search_messages(
+    session: AsyncSession,
+    user_id: Any,
+    query: str,
+    limit: int,
+    project_id: Optional[UUID] = None,
+    cursor: Optional[str] = None,
+    sort: str = "rank"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One keyset page of the user's messages matching ``query``, with highlighted snippets.
+
+    ``sort`` is "rank" (ts_rank_cd, best first) or "recent" (newest first).
+    Only the page's rows are highlighted: ts_headline re-parses the whole
+    message, so it runs in an outer query over the limited inner one.
+    Raises ValueError for a cursor that doesn't belong to the sort order.
+    """
+    tsquery = _tsquery(query)
+    rank = func.ts_rank_cd(ConversationMessage.search_vector, tsquery)
+
+    stmt = (
+        select(
+            ConversationMessage.id,
+            ConversationMessage.conversation_id,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.created_at,
+            rank.label("rank"),
+            Conversation.title.label("conversation_title"),
+            Conversation.project_id
+        )
+        .join(Conversation, Conversation.id == ConversationMessage.conversation_id)
+        .where(
+            Conversation.user_id == user_id,
+            ConversationMessage.search_vector.op("@@")(tsquery)
+        )
+        .limit(limit + 1)
+    )
+    if project_id is not None:
+        stmt = stmt.where(Conversation.project_id == project_id)
+
+    if sort == "rank":
+        stmt = stmt.order_by(rank.desc(), ConversationMessage.created_at.desc(), ConversationMessage.id.desc())
+        if cursor:
+            stmt = stmt.where(ranked_keyset_condition(rank, ConversationMessage.created_at, ConversationMessage.id, cursor))
+    else:
+        stmt = stmt.order_by(*order_by_keyset(ConversationMessage.created_at, ConversationMessage.id, descending=True))
+        if cursor:
+            stmt = stmt.where(keyset_condition(ConversationMessage.created_at, ConversationMessage.id, cursor, descending=True))
+
+    page = stmt.subquery()
+    outer = select(
+        page.c.id,
+        page.c.conversation_id,
+        page.c.role,
+        page.c.created_at,
+        page.c.rank,
+        page.c.conversation_title,
+        page.c.project_id,
+        func.ts_headline(_regconfig, page.c.content, tsquery, HEADLINE_OPTIONS).label("highlight")
+    )
+    if sort == "rank":
+        outer = outer.order_by(page.c.rank.desc(), page.c.created_at.desc(), page.c.id.desc())
+    else:
+        outer = outer.order_by(*order_by_keyset(page.c.created_at, page.c.id, descending=True))
+
+    rows = [dict(row) for row in (await session.execute(outer)).mappings().all()]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if sort == "rank":
+        return rows, encode_ranked_cursor(last["rank"], last["created_at"], last["id"])
+    return rows, encode_cursor(last["created_at"], last["id"])
+
+async def search_memories(user_id: Any, query: str, limit: int = None) -> List[Dict[str, Any]]:
+    """Semantically similar entries from the user's memory collection.
+
+    Memories aren't tied to a conversation or project, so no project filter
+    applies. Returns an empty list when Qdrant or the embedding model is
+    unavailable, so callers can treat it as optional.
+    """
+    limit = limit or settings.CONVERSATION_SEARCH_MEMORY_LIMIT
+    try:
+        query_vector = (await get_embeddings(query))[0]
+        hits = await db.qdrant.search(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            query_vector=query_vector,
+            query_filter=models.Filter(must=[
+                models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=str(user_id)))
+            ]),
+            limit=limit,
+            score_threshold=settings.CONVERSATION_SEARCH_MEMORY_MIN_SCORE,
+            with_payload=True
+        )
+    except Exception as e:
+        logger.warning(f"Memory search failed for user {user_id}: {e}")
+        return []
+
+    memories = []
+    for hit in hits:
+        payload = hit.payload or {}
+        metadata = payload.get("metadata") or {}
+        memories.append({
+            "id": str(hit.id),
+            "content": payload.get("page_content", ""),
+            "score": hit.score,
+            "memory_type": metadata.get("memory_type"),
+            "timestamp": metadata.get("timestamp")
+        })
+    return memories
+
+__all__ = [
+    'CONVERSATION_SEARCH_CONFIG',
+    'search_messages',
+    'search_memories'
+]
@@ -0,0 +1,138 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from sqlalchemy import text
+from app.config import logger, db
+from app.config.settings import settings
+import time
+
+class DomainCredibilityCache:
+    """Two-tier cache of per-domain credibility scores.
+
+    Lookups hit an in-process LRU first and fall back to the
+    ``source_credibility`` table, so scores survive restarts and are shared
+    between workers. Entries expire after ``ttl_hours``. Database errors are
+    logged and treated as misses; the cache never fails a search.
+    """
+
+    def __init__(self, ttl_hours: int = None, max_memory_entries: int = None):
+        self.ttl = timedelta(hours=ttl_hours or settings.CREDIBILITY_CACHE_TTL_HOURS)
+        self.max_memory_entries = max_memory_entries or settings.CREDIBILITY_MEMORY_CACHE_SIZE
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _remember(self, domain: str, entry: Dict[str, Any], expires_at: float) -> None:
+        self._memory[domain] = (expires_at, entry)
+        self._memory.move_to_end(domain)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _from_memory(self, domain: str) -> Optional[Dict[str, Any]]:
+        cached = self._memory.get(domain)
+        if not cached:
+            return None
+        expires_at, entry = cached
+        if expires_at <= time.time():
+            self._memory.pop(domain, None)
+            return None
+        self._memory.move_to_end(domain)
+        return entry
+
+    async def get_many(self, domains: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return cached entries for the given domains; missing or expired domains are omitted"""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for domain in dict.fromkeys(d for d in domains if d):
+            entry = self._from_memory(domain)
+            if entry is not None:
+                found[domain] = entry
+            else:
+                missing.append(domain)
+
+        if not missing:
+            return found
+
+        try:
+            async with db.get_session() as session:
+                result = await session.execute(
+                    text("""
+                        SELECT domain, score, reasoning, evaluator, evaluated_at, expires_at
+                        FROM source_credibility
+                        WHERE domain = ANY(:domains) AND expires_at > now()
+                    """),
+                    {"domains": missing}
+                )
+                for row in result.fetchall():
+                    entry = {
+                        "score": float(row.score),
+                        "reasoning": row.reasoning,
+                        "evaluator": row.evaluator,
+                        "evaluated_at": row.evaluated_at.isoformat() if row.evaluated_at else None
+                    }
+                    found[row.domain] = entry
+                    self._remember(row.domain, entry, row.expires_at.timestamp())
+        except Exception as e:
+            logger.warning(f"Credibility cache lookup failed, treating {len(missing)} domains as unknown: {e}")
+
+        return found
+
+    async def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a single domain, if any"""
+        return (await self.get_many([domain])).get(domain)
+
+    async def set_many(self, entries: Dict[str, Dict[str, Any]], evaluator: str = "llm") -> None:
+        """Store domain scores in both tiers. Each entry needs at least a ``score``"""
+        if not entries:
+            return
+
+        now = datetime.now(timezone.utc)
+        expires_at = now + self.ttl
+        rows = []
+        for domain, entry in entries.items():
+            if not domain or not isinstance(entry.get("score"), (int, float)):
+                continue
+            cached = {
+                "score": float(entry["score"]),
+                "reasoning": entry.get("reasoning"),
+                "evaluator": evaluator,
+                "evaluated_at": now.isoformat()
+            }
+            self._remember(domain, cached, expires_at.timestamp())
+            rows.append({
+                "domain": domain,
+                "score": cached["score"],
+                "reasoning": cached["reasoning"],
+                "evaluator": evaluator,
+                "evaluated_at": now,
+                "expires_at": expires_at
+            })
+
+        if not rows:
+            return
+
+        try:
+            async with db.get_session() as session:
+                await session.execute(
+                    text("""
+                        INSERT INTO source_credibility (domain, score, reasoning, evaluator, evaluated_at, expires_at)
+                        VALUES (:domain, :score, :reasoning, :evaluator, :evaluated_at, :expires_at)
+                        ON CONFLICT (domain) DO UPDATE
+                        SET score = EXCLUDED.score,
+                            reasoning = EXCLUDED.reasoning,
+                            evaluator = EXCLUDED.evaluator,
+                            evaluated_at = EXCLUDED.evaluated_at,
+                            expires_at = EXCLUDED.expires_at
+                    """),
+                    rows
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to persist credibility scores for {len(rows)} domains: {e}")
+
+    def clear_memory(self) -> None:
+        """Drop the in-process tier (the database tier is left untouched)"""
+        self._memory.clear()
+
+# Shared instance used by minions
+credibility_cache = DomainCredibilityCache()
+
+__all__ = ['DomainCredibilityCache', 'credibility_cache']
@@ -1,8 +1,7 @@
-from contextlib import contextmanager
 from contextlib import asynccontextmanager
 from app.config import logger
 from app.config.settings import settings
-from app.config.database import Database
+from app.config.database import db
 
 # Use settings object instead of direct imports
 POSTGRES_DB_POSEY = settings.POSTGRES_DB_POSEY
@@ -19,28 +18,11 @@ COUCHBASE_BUCKET = settings.COUCHBASE_BUCKET
 QDRANT_HOST = settings.QDRANT_HOST
 QDRANT_PORT = settings.QDRANT_PORT
 
-# Initialize database
-db = Database()
-
 @asynccontextmanager
 async def get_db():
-    """Get database connection"""
-    try:
-        await db.test_connections()
-        yield db
-    finally:
-        await db.close_all()
-
-# For synchronous connections (if needed)
-@contextmanager
-def get_db_connection():
-    if not db.pg_pool:
-        raise RuntimeError("PostgreSQL connection pool not initialized")
-    conn = db.pg_pool.getconn()
-    try:
-        yield conn
-    finally:
-        db.pg_pool.putconn(conn)
+    """Get database connection (the shared manager; closed at application shutdown, not here)"""
+    await db.test_connections()
+    yield db
 
 # Export commonly used items
 __all__ = ['db', 'get_db', 'logger']
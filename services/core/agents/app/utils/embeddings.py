@@ -1,19 +1,53 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from app.config import logger, settings
+from app.utils.telemetry import observe_embedding_batch
 import asyncio
+import threading
+import time
 
-async def get_embeddings(texts: Union[str, List[str]], model_name: str = None) -> List[List[float]]:
-    """Get embeddings for text using specified model"""
+# Loading a model is far more expensive than embedding with it, so keep one instance per model
+_embedding_instances: Dict[str, HuggingFaceEmbeddings] = {}
+_instances_lock = threading.Lock()
+
+def get_embedding_instance(model_name: str = None) -> HuggingFaceEmbeddings:
+    """Return the shared embeddings instance for a model, loading it on first use"""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    instance = _embedding_instances.get(model_name)
+    if instance is None:
+        with _instances_lock:
+            instance = _embedding_instances.get(model_name)
+            if instance is None:
+                instance = HuggingFaceEmbeddings(model_name=model_name)
+                _embedding_instances[model_name] = instance
+                logger.info(f"Loaded embedding model: {model_name}")
+    return instance
+
+async def get_embeddings(texts: Union[str, List[str]], model_name: str = None, batch_size: int = None) -> List[List[float]]:
+    """Get embeddings for text using specified model
+
+    Texts are embedded in batches of ``batch_size`` (defaults to
+    settings.EMBEDDING_BATCH_SIZE) off the event loop.
+    """
     try:
-        model_name = model_name or settings.EMBEDDING_MODEL
-        # Initialize LangChain's HuggingFaceEmbeddings instance using the provided model name.
-        embedding_instance = HuggingFaceEmbeddings(model_name=model_name)
         # Ensure texts is a list
         if isinstance(texts, str):
             texts = [texts]
-        # Wrap the synchronous call to embed_documents in asyncio.to_thread for async compatibility.
-        embeddings = await asyncio.to_thread(embedding_instance.embed_documents, texts)
+        if not texts:
+            return []
+
+        # Model loading happens in the worker thread too; it can take seconds on first use
+        embedding_instance = await asyncio.to_thread(get_embedding_instance, model_name)
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+
+        model_label = model_name or settings.EMBEDDING_MODEL
+        embeddings: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i:i + batch_size]
+            started = time.perf_counter()
+            # Wrap the synchronous call to embed_documents in asyncio.to_thread for async compatibility.
+            embeddings.extend(await asyncio.to_thread(embedding_instance.embed_documents, batch))
+            observe_embedding_batch(model_label, len(batch), time.perf_counter() - started)
         return embeddings
     except Exception as e:
         logger.error(f"Error generating embeddings: {e}")
@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import text
+from app.config import logger, db
+from app.config.settings import settings
+import asyncio
+import httpx
+import time
+
+# Where a provider's API lives when its llm_providers row has no base_url
+PROVIDER_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "anthropic": "https://api.anthropic.com",
+    "google-gla": "https://generativelanguage.googleapis.com",
+    "gemini": "https://generativelanguage.googleapis.com",
+    "groq": "https://api.groq.com",
+    "mistral": "https://api.mistral.ai",
+    "cohere": "https://api.cohere.com",
+    "deepseek": "https://api.deepseek.com"
+}
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+    detail: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "ok": self.ok,
+            "latency_ms": round(self.latency_ms, 2),
+            "checked_at": self.checked_at,
+            "age_seconds": round(time.time() - self.checked_at, 1)
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.detail:
+            data["detail"] = self.detail
+        return data
+
+@dataclass
+class Probe:
+    name: str
+    check: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    interval: float
+    timeout: float
+
+class HealthProber:
+    """Checks backing services in the background and keeps the latest result of each.
+
+    Every probe runs in its own task on its own schedule and timeout, so a
+    slow backend only delays its own result; /health endpoints read the
+    snapshot and never touch a backend. A check passes unless it raises or
+    times out, and may return details for the snapshot.
+
+    - Liveness: the process answers and the probe loops are still cycling
+      (no result older than HEALTH_STALE_SECONDS, which would mean the loop
+      or the thread pool is wedged). Backends never affect it.
+    - Readiness: startup finished, the embedding model is loaded and warm,
+      and every probe in HEALTH_READINESS_CHECKS last passed. Other failing
+      probes (by default everything but Postgres, Qdrant included) are
+      listed as degraded without taking the pod out of rotation.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, ProbeResult] = {}
+        self.started_at: Optional[float] = None
+        self.embeddings_warm = False
+        self._probes: List[Probe] = []
+        self._tasks: List[asyncio.Task] = []
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # --- Checks ---
+
+    async def _check_postgres(self) -> None:
+        # Use the asyncpg connection pool managed by the Database class, or the engine if it is disabled
+        if db.pg_pool:
+            async with db.get_pg_connection() as conn:
+                await conn.fetchval("SELECT 1")
+        else:
+            async with db.get_session() as session:
+                await session.execute(text("SELECT 1"))
+
+    async def _check_couchbase(self) -> None:
+        if not db.couchbase:
+            raise RuntimeError("Couchbase cluster not initialized")
+        # ping() is sync
+        if not await asyncio.to_thread(db.couchbase.ping):
+            raise RuntimeError("Couchbase ping returned no result")
+
+    async def _check_qdrant(self) -> Dict[str, Any]:
+        # The underlying client, so a missing one is a failed check rather than the property's RuntimeError
+        if not db._qdrant_client:
+            raise RuntimeError("Qdrant client not initialized")
+        response = await db._qdrant_client.get_collections()
+        return {"collections": len(response.collections)}
+
+    async def _check_http(self, url: str) -> Dict[str, Any]:
+        response = await self._client.get(url)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code} from {url}")
+        return {"status": response.status_code}
+
+    async def _check_auth(self) -> Dict[str, Any]:
+        from app.middleware.auth import AUTH_SERVICE_URL
+        return await self._check_http(f"{AUTH_SERVICE_URL}/health")
+
+    async def _check_voyager(self) -> Dict[str, Any]:
+        # Same address VoyagerMinion uses
+        return await self._check_http(f"http://{settings.VOYAGER_DOMAIN or 'voyager'}:{settings.VOYAGER_PORT or 7777}/health")
+
+    async def _check_llm_providers(self) -> Dict[str, Any]:
+        """Reachability of every provider a minion config uses; any HTTP answer below 500 counts"""
+        from app.config.llm_catalog import llm_catalog
+
+        snapshot = await llm_catalog.snapshot()
+        if snapshot is None:
+            raise RuntimeError("LLM config catalog not loaded")
+        urls = {}
+        for config in snapshot.minion_configs.values():
+            provider = config.llm_model.provider if config.llm_model else None
+            if provider is None or not provider.is_active:
+                continue
+            url = provider.api_base_url or PROVIDER_BASE_URLS.get(provider.slug)
+            if url:
+                urls[provider.slug] = url
+
+        async def reach(url: str) -> Any:
+            try:
+                return (await self._check_http(url))["status"]
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+
+        statuses = dict(zip(urls, await asyncio.gather(*(reach(url) for url in urls.values()))))
+        failed = [slug for slug, status in statuses.items() if not isinstance(status, int)]
+        if failed:
+            raise RuntimeError(f"Unreachable: {', '.join(f'{slug} ({statuses[slug]})' for slug in failed)}")
+        return statuses
+
+    async def _check_embeddings(self) -> Dict[str, Any]:
+        """Warm the shared embedding model once (load plus one embedding), then just report it"""
+        if not self.embeddings_warm:
+            from app.utils.embeddings import get_embeddings
+            await get_embeddings("health check warm-up")
+            self.embeddings_warm = True
+            logger.info(f"Embedding model {settings.EMBEDDING_MODEL} warmed")
+        return {"model": settings.EMBEDDING_MODEL}
+
+    # --- Scheduling ---
+
+    async def _run(self, probe: Probe) -> None:
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe.check(), timeout=probe.timeout)
+            result = ProbeResult(True, (time.perf_counter() - started) * 1000, time.time(), detail=detail)
+        except asyncio.TimeoutError:
+            result = ProbeResult(False, (time.perf_counter() - started) * 1000, time.time(), error=f"Timed out after {probe.timeout}s")
+        except Exception as e:
+            result = ProbeResult(False, (time.perf_counter() - started) * 1000, time.time(), error=f"{type(e).__name__}: {e}")
+
+        previous = self.results.get(probe.name)
+        if previous is not None and previous.ok != result.ok:
+            if result.ok:
+                logger.info(f"Health probe {probe.name} recovered ({result.latency_ms:.0f}ms)")
+            else:
+                logger.warning(f"Health probe {probe.name} failing: {result.error}")
+        elif previous is None and not result.ok:
+            logger.warning(f"Health probe {probe.name} failing: {result.error}")
+        self.results[probe.name] = result
+
+    async def _loop(self, probe: Probe) -> None:
+        while True:
+            await self._run(probe)
+            await asyncio.sleep(probe.interval)
+
+    def start(self) -> None:
+        """Start probing; call once startup is complete"""
+        if self._tasks:
+            return
+        interval, timeout = settings.HEALTH_PROBE_INTERVAL_SECONDS, settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._probes = [
+            Probe("postgres", self._check_postgres, interval, timeout),
+            Probe("couchbase", self._check_couchbase, interval, timeout),
+            Probe("qdrant", self._check_qdrant, interval, timeout),
+            Probe("auth", self._check_auth, interval, timeout),
+            Probe("voyager", self._check_voyager, interval, timeout),
+            Probe("llm_providers", self._check_llm_providers, settings.HEALTH_LLM_PROBE_INTERVAL_SECONDS, timeout),
+            # Loading the model can take minutes on a cold cache; after that this is free
+            Probe("embeddings", self._check_embeddings, interval, settings.HEALTH_EMBEDDING_WARM_TIMEOUT_SECONDS)
+        ]
+        self.started_at = time.time()
+        self._tasks = [asyncio.create_task(self._loop(probe), name=f"health-probe-{probe.name}") for probe in self._probes]
+        logger.info(f"Health prober started ({len(self._probes)} probes every {interval}s, readiness needs {settings.HEALTH_READINESS_CHECKS})")
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- Snapshots ---
+
+    def liveness(self) -> Dict[str, Any]:
+        now = time.time()
+        stale = [
+            probe.name for probe in self._probes
+            if probe.name in self.results and now - self.results[probe.name].checked_at > max(settings.HEALTH_STALE_SECONDS, probe.interval + probe.timeout)
+        ]
+        return {"live": not stale, "stale_probes": stale, "uptime_seconds": round(now - self.started_at, 1) if self.started_at else None}
+
+    def readiness(self) -> Dict[str, Any]:
+        reasons = []
+        if self.started_at is None:
+            reasons.append("startup not complete")
+        if not self.embeddings_warm:
+            reasons.append("embedding model not warmed")
+        for name in settings.HEALTH_READINESS_CHECKS:
+            result = self.results.get(name)
+            if result is None:
+                reasons.append(f"{name} not checked yet")
+            elif not result.ok:
+                reasons.append(f"{name}: {result.error}")
+        degraded = [
+            f"{name}: {result.error}" for name, result in sorted(self.results.items())
+            if not result.ok and name not in settings.HEALTH_READINESS_CHECKS
+        ]
+        return {"ready": not reasons, "reasons": reasons, "degraded": degraded}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.liveness(),
+            **self.readiness(),
+            "embeddings_warm": self.embeddings_warm,
+            "checks": {name: result.to_dict() for name, result in sorted(self.results.items())}
+        }
+
+    def is_ok(self, name: str) -> bool:
+        result = self.results.get(name)
+        return result is not None and result.ok
+
+# Shared instance for this worker
+health_prober = HealthProber()
+
+__all__ = ['HealthProber', 'ProbeResult', 'health_prober']
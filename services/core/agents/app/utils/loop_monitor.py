@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import logger
+from app.config.database import LatencyHistogram
+from app.config.settings import settings
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Frames under this directory are "ours"; the innermost one names the call site to fix
+APP_ROOT = str(Path(__file__).resolve().parents[1])
+SERVICE_ROOT = os.path.dirname(APP_ROOT)
+
+@dataclass
+class StallOffender:
+    """Stalls attributed to one call site"""
+    site: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seen: float = 0.0
+    last_stack: List[str] = field(default_factory=list)
+
+def _call_site(stack: traceback.StackSummary) -> str:
+    """Innermost application frame of a stack (innermost frame overall if none is ours)"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_ROOT):
+            return f"{os.path.relpath(frame.filename, SERVICE_ROOT)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+class EventLoopMonitor:
+    """Measures event loop scheduling delay and names the code that blocks it.
+
+    A task on the loop sleeps for ``interval`` seconds at a time and records
+    how late it wakes up. A watchdog thread checks the task's heartbeat, and
+    once the loop has been unresponsive for ``threshold`` seconds it captures
+    the loop thread's stack while the blocking call is still on it. When the
+    loop recovers, the stall's duration is attributed to that call site.
+    Offenders are kept in memory for /health/loop and /metrics.
+    """
+
+    def __init__(self, interval: float = None, threshold: float = None, max_offenders: int = None):
+        self.interval = settings.LOOP_MONITOR_INTERVAL_SECONDS if interval is None else interval
+        self.threshold = settings.LOOP_STALL_THRESHOLD_SECONDS if threshold is None else threshold
+        self.max_offenders = max_offenders or settings.LOOP_MONITOR_MAX_OFFENDERS
+        self.lag = LatencyHistogram(LAG_BUCKETS)
+        self.stalls = 0
+        self.offenders: Dict[str, StallOffender] = {}
+        self._heartbeat = time.monotonic()
+        self._captured: Optional[Tuple[str, List[str]]] = None
+        self._captured_for = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _capture(self, heartbeat: float) -> None:
+        """Watchdog thread: grab the loop thread's stack once per stall"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        if self._heartbeat != heartbeat:
+            # The loop recovered while we were looking; this stack isn't the blocking call
+            return
+        self._captured = (_call_site(stack), stack.format()[-settings.LOOP_MONITOR_STACK_DEPTH:])
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat >= self.threshold and self._captured_for != heartbeat:
+                self._captured_for = heartbeat
+                try:
+                    self._capture(heartbeat)
+                except Exception as e:
+                    logger.debug(f"Failed to capture event loop stack: {e}")
+
+    def _record_stall(self, lag: float) -> None:
+        self.stalls += 1
+        site, stack = self._captured or ("unknown", [])
+        self._captured = None
+
+        offender = self.offenders.get(site)
+        if offender is None:
+            if len(self.offenders) >= self.max_offenders:
+                # Make room by forgetting the offender with the least total stall time
+                del self.offenders[min(self.offenders.values(), key=lambda o: o.total_seconds).site]
+            offender = self.offenders[site] = StallOffender(site)
+        offender.count += 1
+        offender.total_seconds += lag
+        offender.max_seconds = max(offender.max_seconds, lag)
+        offender.last_seen = time.time()
+        if stack:
+            offender.last_stack = stack
+
+        logger.warning(f"Event loop blocked for {lag:.3f}s at {site}" + ("\n" + "".join(stack) if stack else ""))
+
+    async def _tick_forever(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - started - self.interval)
+            self.lag.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._tick_forever())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (interval {self.interval}s, stall threshold {self.threshold}s)")
+
+    async def shutdown(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._watchdog = None
+
+    def top_offenders(self, limit: int = 10) -> List[StallOffender]:
+        return sorted(self.offenders.values(), key=lambda o: o.total_seconds, reverse=True)[:limit]
+
+    def stats(self, limit: int = 10) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "stall_threshold_seconds": self.threshold,
+            "stalls": self.stalls,
+            "lag_seconds": self.lag.snapshot(),
+            "top_offenders": [
+                {
+                    "site": o.site,
+                    "count": o.count,
+                    "total_seconds": round(o.total_seconds, 3),
+                    "max_seconds": round(o.max_seconds, 3),
+                    "last_seen": o.last_seen,
+                    "last_stack": o.last_stack
+                }
+                for o in self.top_offenders(limit)
+            ]
+        }
+
+# Shared instance for this worker
+loop_monitor = EventLoopMonitor()
+
+__all__ = ['EventLoopMonitor', 'StallOffender', 'loop_monitor']
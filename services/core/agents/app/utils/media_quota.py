@@ -0,0 +1,273 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timezone
+from uuid import UUID
+from sqlalchemy import text
+from app.config import logger, db
+from app.config.settings import settings
+import asyncio
+import json
+import time
+
+# Takes up to :requested units of the quota for :day (a UTC date, the same one the worker keys
+# its counters by) and at least :minimum. :day is bound as a date for the comparisons and
+# :day_text is the same day as the ISO string stored in last_reset. Resets the count when
+# last_reset is older than :day, and grants nothing to a worker still on a day the counter has
+# moved past. Never grants past daily_limit unless :minimum asks for it, so concurrent workers
+# can't overshoot between them.
+LEASE_QUOTA_SQL = text("""
+    WITH current AS (
+        SELECT id,
+               COALESCE((media_generation_config->:config_key->>'daily_limit')::int, 0) AS daily_limit,
+               CASE
+                   WHEN media_generation_config->:config_key->>'last_reset' IS NULL
+                     OR (media_generation_config->:config_key->>'last_reset')::date < CAST(:day AS date)
+                   THEN 0
+                   ELSE COALESCE((media_generation_config->:config_key->>'used_today')::int, 0)
+               END AS used
+        FROM agents
+        WHERE id = :agent_id
+          AND COALESCE((media_generation_config->:config_key->>'last_reset')::date <= CAST(:day AS date), true)
+        FOR UPDATE
+    ), granted AS (
+        SELECT id, daily_limit, used, GREATEST(LEAST(:requested, GREATEST(daily_limit - used, 0)), :minimum) AS amount
+        FROM current
+    )
+    UPDATE agents a
+    SET media_generation_config = jsonb_set(
+        COALESCE(a.media_generation_config, '{}'::jsonb),
+        ARRAY[:config_key],
+        COALESCE(a.media_generation_config->:config_key, '{}'::jsonb)
+            || jsonb_build_object('used_today', g.used + g.amount, 'last_reset', CAST(:day_text AS text)),
+        true
+    )
+    FROM granted g
+    WHERE a.id = g.id
+    RETURNING g.amount, g.daily_limit
+""")
+
+# Hands unused leased units back, only if the lease is still from the same day
+RELEASE_QUOTA_SQL = text("""
+    UPDATE agents
+    SET media_generation_config = jsonb_set(
+        media_generation_config,
+        ARRAY[:config_key, 'used_today'],
+        to_jsonb(GREATEST(COALESCE((media_generation_config->:config_key->>'used_today')::int, 0) - :amount, 0))
+    )
+    WHERE id = :agent_id
+      AND media_generation_config->:config_key->>'last_reset' = CAST(:day_text AS text)
+""")
+
+INSERT_HISTORY_SQL = text("""
+    INSERT INTO media_generation_history (agent_id, user_id, media_type, prompt, result_url, metadata)
+    VALUES (:agent_id, :user_id, :media_type, :prompt, :result_url, CAST(:metadata AS jsonb))
+""")
+
+@dataclass
+class _QuotaCounter:
+    """Quota units this worker has leased from the database for one agent, media type and day"""
+    leased: int = 0
+    used: int = 0
+    # When each unit taken by check() and not yet recorded was taken
+    reservations: List[float] = field(default_factory=list)
+    daily_limit: Optional[int] = None
+    exhausted_at: float = 0.0  # When the database last had nothing left to lease
+    last_used: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def available(self) -> int:
+        return self.leased - self.used - len(self.reservations)
+
+class MediaQuotaTracker:
+    """In-process media quota counters backed by leases on the agents table.
+
+    Each worker leases small blocks of an agent's daily quota (the database
+    counter is incremented by the whole block up front) and then serves
+    checks and usage from memory. A worker can only hand out units it has
+    leased, so the quota can't be exceeded across workers; at worst other
+    workers see less quota than is actually unused. A passing check()
+    reserves its unit, so concurrent requests can't all pass on the same
+    one; reservations not recorded within MEDIA_QUOTA_RESERVATION_SECONDS
+    lapse. Unused units are given back when a counter goes idle and at
+    shutdown. Generation history rows are buffered and written in batches.
+
+    Nothing on the generation paths calls check() or record_usage() yet
+    (nor db.check_media_quota or the quota middleware that wrap them);
+    enforcing it needs a daily_limit configured per agent first, since a
+    missing limit counts as 0.
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, str, date], _QuotaCounter] = {}
+        self._history: List[Dict[str, Any]] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    def _counter(self, agent_id: UUID, media_type: str) -> Tuple[Tuple[str, str, date], _QuotaCounter]:
+        key = (str(agent_id), media_type, self._today())
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = _QuotaCounter()
+        counter.last_used = time.time()
+        return key, counter
+
+    async def _lease(self, key: Tuple[str, str, date], counter: _QuotaCounter, overdraw: bool = False) -> None:
+        """Lease another block from the database (caller holds counter.lock)
+
+        With ``overdraw`` a single unit is taken even past daily_limit, for
+        usage that has already happened.
+        """
+        agent_id, media_type, day = key
+        try:
+            async with db.get_session() as session:
+                result = await session.execute(LEASE_QUOTA_SQL, {
+                    "config_key": f"{media_type}_generation",
+                    "agent_id": agent_id,
+                    "day": day,
+                    "day_text": day.isoformat(),
+                    "requested": 1 if overdraw else settings.MEDIA_QUOTA_LEASE_SIZE,
+                    "minimum": 1 if overdraw else 0
+                })
+                row = result.fetchone()
+                await session.commit()
+        except Exception as e:
+            # Conservative: without a lease there is no quota to hand out
+            logger.error(f"Failed to lease {media_type} quota for agent {agent_id}: {e}")
+            return
+
+        if not row or row.amount == 0:
+            counter.exhausted_at = time.time()
+            return
+        counter.leased += row.amount
+        counter.daily_limit = row.daily_limit
+        if not overdraw:
+            counter.exhausted_at = 0.0
+
+    async def check(self, agent_id: UUID, media_type: str) -> bool:
+        """Reserve a unit of quota for a generation that record_usage() will count; False if none is left
+
+        Touches the database only when the local lease is empty.
+        """
+        key, counter = self._counter(agent_id, media_type)
+        if counter.available > 0:
+            counter.reservations.append(time.time())
+            return True
+        if time.time() - counter.exhausted_at < settings.MEDIA_QUOTA_FLUSH_SECONDS:
+            # Quota was used up moments ago; don't ask the database again on every denied request
+            return False
+        async with counter.lock:
+            if counter.available <= 0:
+                await self._lease(key, counter)
+            if counter.available <= 0:
+                return False
+            counter.reservations.append(time.time())
+            return True
+
+    async def record_usage(
+        self,
+        agent_id: UUID,
+        media_type: str,
+        prompt: str,
+        result_url: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        user_id: Optional[UUID] = None
+    ) -> None:
+        """Consume one unit (the oldest reservation, if any) and queue the history row for the next flush"""
+        key, counter = self._counter(agent_id, media_type)
+        if counter.reservations:
+            counter.reservations.pop(0)
+        elif counter.available <= 0:
+            async with counter.lock:
+                if counter.available <= 0:
+                    await self._lease(key, counter)
+                if counter.available <= 0:
+                    # The media was already generated, so the use still counts: write it to the
+                    # daily counter past its limit, so every worker sees the quota as spent
+                    logger.warning(f"Recording {media_type} usage for agent {agent_id} beyond its daily quota")
+                    await self._lease(key, counter, overdraw=True)
+                if counter.available <= 0:
+                    logger.error(f"{media_type} usage for agent {agent_id} counted in this worker only")
+                    counter.leased += 1
+        counter.used += 1
+
+        self._history.append({
+            "agent_id": str(agent_id),
+            "user_id": str(user_id) if user_id else None,
+            "media_type": media_type,
+            "prompt": prompt,
+            "result_url": result_url,
+            "metadata": json.dumps(metadata or {})
+        })
+
+    async def _release(self, key: Tuple[str, str, date], counter: _QuotaCounter) -> None:
+        agent_id, media_type, day = key
+        unused = counter.available
+        if unused <= 0:
+            return
+        try:
+            async with db.get_session() as session:
+                await session.execute(RELEASE_QUOTA_SQL, {
+                    "config_key": f"{media_type}_generation",
+                    "agent_id": agent_id,
+                    "amount": unused,
+                    "day_text": day.isoformat()
+                })
+                await session.commit()
+            counter.leased -= unused
+        except Exception as e:
+            logger.error(f"Failed to release {unused} {media_type} quota units for agent {agent_id}: {e}")
+
+    async def flush(self, release_all: bool = False) -> None:
+        """Write buffered history and give back leases that are idle, stale (previous day) or all of them"""
+        history, self._history = self._history, []
+        if history:
+            try:
+                async with db.get_session() as session:
+                    await session.execute(INSERT_HISTORY_SQL, history)
+                    await session.commit()
+                logger.debug(f"Flushed {len(history)} media generation history rows")
+            except Exception as e:
+                logger.error(f"Failed to flush {len(history)} media history rows, will retry: {e}")
+                self._history = history + self._history
+
+        today = self._today()
+        now = time.time()
+        idle_cutoff = now - settings.MEDIA_QUOTA_IDLE_RELEASE_SECONDS
+        reservation_cutoff = now - settings.MEDIA_QUOTA_RESERVATION_SECONDS
+        for key, counter in list(self._counters.items()):
+            # Checks whose generation never got recorded (failed, abandoned) give their unit back
+            counter.reservations = [t for t in counter.reservations if t >= reservation_cutoff]
+            stale_day = key[2] != today
+            if not (release_all or stale_day or counter.last_used < idle_cutoff) or counter.lock.locked():
+                continue
+            async with counter.lock:
+                await self._release(key, counter)
+                if counter.available <= 0 and not counter.reservations:
+                    self._counters.pop(key, None)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.MEDIA_QUOTA_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Media quota flush failed: {e}", exc_info=True)
+
+    def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def shutdown(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush(release_all=True)
+
+# Shared instance for this worker
+media_quota = MediaQuotaTracker()
+
+__all__ = ['MediaQuotaTracker', 'media_quota']
@@ -23,11 +23,7 @@ def calculate_avg_completion_time(tasks: List[Task]) -> float:
 
 def generate_markdown(conversation, messages) -> str:
     """Generate markdown format for conversation export"""
-    md = f"# {conversation.title}\n\n"
-    md += f"Created: {conversation.created_at}\n\n"
-    
+    parts = [f"# {conversation.title}\n\n", f"Created: {conversation.created_at}\n\n"]
     for msg in messages:
-        md += f"## {msg.sender_user.name} ({msg.created_at})\n"
-        md += f"{msg.content}\n\n"
-    
-    return md 
+        parts.append(f"## {msg.sender_user.name} ({msg.created_at})\n{msg.content}\n\n")
+    return "".join(parts)
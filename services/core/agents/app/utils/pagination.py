@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Any, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import tuple_
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Opaque cursor for the keyset position (created_at, id)"""
+    raw = json.dumps({"t": created_at.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor; raises ValueError for anything that isn't a valid cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["t"]), UUID(data["id"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def encode_ranked_cursor(rank: float, created_at: datetime, row_id: Any) -> str:
+    """Opaque cursor for the keyset position (rank, created_at, id) of a ranked listing"""
+    raw = json.dumps({"r": rank, "t": created_at.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_ranked_cursor(cursor: str) -> Tuple[float, datetime, UUID]:
+    """Inverse of encode_ranked_cursor; raises ValueError for anything that isn't a valid ranked cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(data["r"]), datetime.fromisoformat(data["t"]), UUID(data["id"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def ranked_keyset_condition(rank_column, created_at_column, id_column, cursor: str):
+    """Rows after the cursor position in (rank, created_at, id) descending order"""
+    rank, created_at, row_id = decode_ranked_cursor(cursor)
+    return tuple_(rank_column, created_at_column, id_column) < tuple_(rank, created_at, row_id)
+
+def keyset_condition(created_at_column, id_column, cursor: str, descending: bool):
+    """Rows strictly after the cursor position in (created_at, id) order, as a row-value comparison"""
+    created_at, row_id = decode_cursor(cursor)
+    key = tuple_(created_at_column, id_column)
+    return key < tuple_(created_at, row_id) if descending else key > tuple_(created_at, row_id)
+
+def order_by_keyset(created_at_column, id_column, descending: bool) -> Tuple[Any, Any]:
+    if descending:
+        return created_at_column.desc(), id_column.desc()
+    return created_at_column.asc(), id_column.asc()
+
+def next_cursor(rows: list, limit: int, created_at_key: str = "created_at", id_key: str = "id") -> Tuple[list, Optional[str]]:
+    """Trim a limit + 1 fetch to ``limit`` rows; the cursor is set only when another page exists"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[created_at_key], last[id_key])
+
+__all__ = [
+    'NEXT_CURSOR_HEADER',
+    'encode_cursor',
+    'decode_cursor',
+    'keyset_condition',
+    'encode_ranked_cursor',
+    'decode_ranked_cursor',
+    'ranked_keyset_condition',
+    'order_by_keyset',
+    'next_cursor'
+]
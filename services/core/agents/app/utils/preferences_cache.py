@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import logger, db
+from app.config.defaults import LLM_CONFIG
+from app.config.settings import settings
+from app.utils.ttl_cache import TTLCache
+
+SELECT_PREFERENCES_SQL = text("SELECT preferences FROM users WHERE id = :user_id")
+
+DEFAULT_IMAGE_PROVIDER = "openai"
+DEFAULT_IMAGE_MODEL = "dall-e-3"
+
+def resolve_orchestrator_config(user_preferences: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+    """Orchestrator LLM config for these preferences, and where it came from.
+
+    Uses preferred_provider/preferred_model when both are set, otherwise the
+    fallback config from LLM_CONFIG.
+    """
+    preferred_provider = user_preferences.get("preferred_provider") if user_preferences else None
+    preferred_model = user_preferences.get("preferred_model") if user_preferences else None
+
+    if preferred_provider and preferred_model:
+        default_params = LLM_CONFIG.get('default', {})
+        return {
+            'provider': preferred_provider,
+            'model': preferred_model,
+            'model_params': {
+                'temperature': default_params.get('temperature', 0.7),
+                'max_tokens': default_params.get('max_tokens', 1000),
+                'top_p': default_params.get('top_p', 0.95),
+                'frequency_penalty': default_params.get('frequency_penalty', 0.0),
+                'presence_penalty': default_params.get('presence_penalty', 0.0),
+                **(default_params.get('additional_settings') or {})
+            },
+            'base_url': LLM_CONFIG.get(preferred_provider, {}).get('base_url') or default_params.get('base_url')
+        }, "user_preferences"
+
+    fallback = LLM_CONFIG.get('fallback', LLM_CONFIG['default'])
+    config = fallback.copy()
+    config['model_params'] = {k: v for k, v in config.items() if k not in ['provider', 'model', 'capabilities', 'base_url']}
+    return config, "hardcoded_default"
+
+def resolve_image_config(user_preferences: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Image provider/model for these preferences"""
+    prefs = user_preferences or {}
+    return {
+        "provider": prefs.get("preferred_image_provider", DEFAULT_IMAGE_PROVIDER),
+        "model": prefs.get("preferred_image_model", DEFAULT_IMAGE_MODEL)
+    }
+
+@dataclass(frozen=True)
+class CachedPreferences:
+    """A user's stored preferences plus the configs derived from them.
+
+    Shared between requests: copy ``preferences`` before modifying it.
+    """
+    preferences: Dict[str, Any]
+    orchestrator_config: Dict[str, Any]
+    orchestrator_config_source: str
+    image_config: Dict[str, str]
+    found: bool = True
+
+    @classmethod
+    def build(cls, preferences: Optional[Dict[str, Any]], found: bool = True) -> "CachedPreferences":
+        preferences = preferences if isinstance(preferences, dict) else {}
+        orchestrator_config, source = resolve_orchestrator_config(preferences)
+        return cls(
+            preferences=preferences,
+            orchestrator_config=orchestrator_config,
+            orchestrator_config_source=source,
+            image_config=resolve_image_config(preferences),
+            found=found
+        )
+
+class UserPreferencesCache:
+    """Per-worker cache of user preferences and their resolved model configs.
+
+    Entries live for USER_PREFERENCES_CACHE_TTL_SECONDS. Writes through this
+    worker's preferences endpoint replace the entry immediately; other
+    workers pick the change up once their entry expires.
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.ttl = settings.USER_PREFERENCES_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._entries = TTLCache(max_size or settings.USER_PREFERENCES_CACHE_SIZE)
+
+    async def _load(self, session: AsyncSession, user_id: str) -> CachedPreferences:
+        result = await session.execute(SELECT_PREFERENCES_SQL, {"user_id": user_id})
+        row = result.fetchone()
+        if row is None:
+            return CachedPreferences.build(None, found=False)
+        if row[0] is not None and not isinstance(row[0], dict):
+            logger.warning(f"Preferences for user {user_id} are not a dictionary (type: {type(row[0])}), using empty dict")
+        return CachedPreferences.build(row[0])
+
+    async def get(self, user_id: str, session: Optional[AsyncSession] = None) -> CachedPreferences:
+        """Cached preferences for a user, loaded with ``session`` (or a new one) on a miss.
+
+        Database errors propagate and nothing is cached for them.
+        """
+        user_id = str(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            return entry
+
+        if session is not None:
+            entry = await self._load(session, user_id)
+        else:
+            async with db.get_session() as new_session:
+                entry = await self._load(new_session, user_id)
+        self._entries.set(user_id, entry, self.ttl)
+        return entry
+
+    def set(self, user_id: str, preferences: Optional[Dict[str, Any]]) -> CachedPreferences:
+        """Store freshly written preferences (write-through)"""
+        entry = CachedPreferences.build(preferences)
+        self._entries.set(str(user_id), entry, self.ttl)
+        return entry
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(str(user_id))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+# Shared instance for this worker
+preferences_cache = UserPreferencesCache()
+
+__all__ = [
+    'UserPreferencesCache',
+    'CachedPreferences',
+    'preferences_cache',
+    'resolve_orchestrator_config',
+    'resolve_image_config'
+]
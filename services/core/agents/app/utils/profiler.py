@@ -0,0 +1,225 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from app.config import logger
+from app.config.settings import settings
+from app.utils.loop_monitor import APP_ROOT, SERVICE_ROOT
+import asyncio
+import os
+import sys
+import threading
+import time
+
+MODES = ("wall", "cpu")
+
+STDLIB_ROOT = os.path.dirname(os.__file__)
+
+# Innermost Python frames of threads parked in a blocking call, for CPU mode without /proc
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker")
+}
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this worker"""
+
+@dataclass
+class Profile:
+    """Sampled stacks of one profiling run, in collapsed (folded) form"""
+    mode: str
+    seconds: float
+    interval: float
+    pid: int = field(default_factory=os.getpid)
+    started_at: float = field(default_factory=time.time)
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    sampling_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    backoffs: int = 0
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of wall time the sampler held the GIL (the app is paused meanwhile)"""
+        return self.sampling_seconds / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def collapsed(self) -> str:
+        """``frame;frame;frame count`` lines, as read by flamegraph.pl, speedscope and inferno"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pid": self.pid,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "overhead": round(self.overhead, 4),
+            "backoffs": self.backoffs
+        }
+
+def _label(frame: Any) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(APP_ROOT):
+        filename = os.path.relpath(filename, SERVICE_ROOT)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[-1]
+    elif filename.startswith(STDLIB_ROOT):
+        filename = os.path.relpath(filename, STDLIB_ROOT)
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({filename}:{frame.f_lineno})".replace(";", ":")
+
+def _thread_stack(frame: Any, depth: int) -> List[str]:
+    """Outermost-first labels of a thread's stack"""
+    stack = []
+    while frame is not None and len(stack) < depth:
+        stack.append(_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def _await_chain(task: asyncio.Task, depth: int) -> List[str]:
+    """Where a suspended task is waiting: its coroutine and everything it awaits, outermost first"""
+    chain = []
+    awaitable = task.get_coro()
+    while awaitable is not None and len(chain) < depth:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            # A future, task or other awaitable without frames at the bottom of the chain
+            chain.append(f"<{type(awaitable).__name__}>")
+            break
+        chain.append(_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return chain
+
+def _is_idle(frame: Any) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+def _cpu_ticks() -> Optional[Dict[int, int]]:
+    """CPU time (utime + stime, in clock ticks) per thread ident, or None without /proc"""
+    ticks = {}
+    for thread in threading.enumerate():
+        try:
+            with open(f"/proc/self/task/{thread.native_id}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError, TypeError):
+            return None
+        ticks[thread.ident] = int(fields[11]) + int(fields[12])
+    return ticks
+
+class SamplingProfiler:
+    """Samples the live process's stacks from a background thread.
+
+    - ``wall``: every thread's stack on each tick, plus the await chain of
+      every suspended asyncio task, so time spent waiting on I/O, locks or
+      other tasks shows up under the coroutine that is waiting.
+    - ``cpu``: only threads that used CPU since the previous tick (per
+      /proc; where that's unavailable, threads not parked in a known
+      blocking frame). Kernel thread state is no use here: while the
+      sampler holds the GIL every other Python thread is waiting for it.
+      Tasks are skipped.
+
+    One profile runs at a time per worker. The sampler holds the GIL while
+    it walks stacks, so it tracks that time and doubles its interval
+    whenever it exceeds PROFILER_MAX_OVERHEAD of the elapsed time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current: Optional[Profile] = None
+        self.last: Optional[Profile] = None
+        self._ticks: Optional[Dict[int, int]] = None
+
+    def _on_cpu(self, ident: int, frame: Any, ticks: Optional[Dict[int, int]]) -> bool:
+        if ticks is None or ident not in ticks or self._ticks is None or ident not in self._ticks:
+            return not _is_idle(frame)
+        return ticks[ident] > self._ticks[ident]
+
+    def _sample_once(self, profile: Profile, loop: asyncio.AbstractEventLoop, names: Dict[int, str], own: int) -> None:
+        depth = settings.PROFILER_MAX_DEPTH
+        ticks = _cpu_ticks() if profile.mode == "cpu" else None
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if profile.mode == "cpu" and not self._on_cpu(ident, frame, ticks):
+                continue
+            thread = f"thread:{names.get(ident, ident)}"
+            profile.stacks[";".join([thread] + _thread_stack(frame, depth))] += 1
+
+        if profile.mode == "wall":
+            # all_tasks copes with the loop adding tasks while we iterate
+            for task in asyncio.all_tasks(loop):
+                coro = task.get_coro()
+                if getattr(coro, "cr_running", False):
+                    continue # On the loop thread right now; its stack was sampled above
+                chain = _await_chain(task, depth)
+                if chain:
+                    profile.stacks[";".join(["asyncio-tasks"] + chain)] += 1
+        self._ticks = ticks
+        profile.samples += 1
+
+    def _run(self, profile: Profile, loop: asyncio.AbstractEventLoop, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        interval = profile.interval
+        self._ticks = None
+        started = time.perf_counter()
+        names: Dict[int, str] = {}
+        names_at = 0.0
+        while not stop.wait(interval):
+            tick = time.perf_counter()
+            if tick - names_at > 1.0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                names_at = tick
+            try:
+                self._sample_once(profile, loop, names, own)
+            except Exception as e:
+                logger.debug(f"Profiler sample failed: {e}")
+            profile.sampling_seconds += time.perf_counter() - tick
+            profile.elapsed_seconds = time.perf_counter() - started
+            if profile.overhead > settings.PROFILER_MAX_OVERHEAD and interval < 1.0:
+                interval = min(1.0, interval * 2)
+                profile.backoffs += 1
+        profile.elapsed_seconds = time.perf_counter() - started
+
+    async def profile(self, seconds: float, mode: str = "wall", interval: float = None) -> Profile:
+        """Sample for ``seconds``; raises ProfilerBusy if a profile is already running"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode '{mode}', expected one of {MODES}")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+            interval = max(interval or settings.PROFILER_DEFAULT_INTERVAL_MS / 1000, settings.PROFILER_MIN_INTERVAL_MS / 1000)
+            profile = self.current = Profile(mode, seconds, interval)
+            stop = threading.Event()
+            thread = threading.Thread(target=self._run, args=(profile, asyncio.get_running_loop(), stop), name="sampling-profiler", daemon=True)
+            logger.info(f"Profiling worker {profile.pid} for {seconds}s ({mode}, every {interval * 1000:.0f}ms)")
+            thread.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                # Also on cancellation (client went away): never leave the sampler running
+                stop.set()
+                await asyncio.to_thread(thread.join)
+            logger.info(f"Profile done: {profile.samples} samples, {len(profile.stacks)} stacks, overhead {profile.overhead:.2%}")
+            self.last = profile
+            return profile
+        finally:
+            self.current = None
+            self._lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "running": self.current.summary() if self.current is not None else None,
+            "last": self.last.summary() if self.last is not None else None
+        }
+
+# Shared instance for this worker
+profiler = SamplingProfiler()
+
+__all__ = ['SamplingProfiler', 'Profile', 'ProfilerBusy', 'profiler']
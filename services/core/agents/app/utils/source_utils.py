@@ -0,0 +1,150 @@
+from typing import Dict, Any, List, Optional, Set
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+import hashlib
+import re
+
+# Query parameters that only track the click and never change the page content
+TRACKING_PARAMS = {
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"
+}
+
+# Keys that search adapters and minions use for page text, in order of preference
+SOURCE_TEXT_KEYS = ("content", "text", "snippet", "description", "summary")
+
+def canonicalize_url(url: Optional[str]) -> Optional[str]:
+    """Normalize a URL so the same page reached through different links compares equal"""
+    if not url or not isinstance(url, str):
+        return None
+
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+
+    host = (parsed.hostname or "").lower()
+    if not host:
+        return None
+    if host.startswith("www."):
+        host = host[4:]
+
+    # Drop default ports, keep anything unusual
+    port = parsed.port
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parsed.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS
+    ))
+
+    # Scheme is normalized away: http and https copies of a page are the same source
+    return urlunparse(("https", netloc, path, "", query, ""))
+
+def get_domain(url: Optional[str]) -> Optional[str]:
+    """Return the registrable-looking host of a URL (lowercased, without 'www.')"""
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return None
+    return urlparse(canonical).hostname
+
+def extract_source_text(source: Dict[str, Any]) -> str:
+    """Pull the most useful text field out of a source dict"""
+    for key in SOURCE_TEXT_KEYS:
+        value = source.get(key)
+        if isinstance(value, dict):
+            value = value.get("text")
+        if isinstance(value, str) and value.strip():
+            return value
+    return ""
+
+def content_fingerprint(text: Optional[str], max_chars: int = 2000) -> Optional[str]:
+    """Fingerprint text so mirrored or syndicated copies of the same content collide"""
+    if not text:
+        return None
+    normalized = re.sub(r"[^\w\s]", "", text.lower())
+    normalized = re.sub(r"\s+", " ", normalized).strip()[:max_chars]
+    if len(normalized) < 40:
+        # Too short to tell pages apart (e.g. empty snippets, titles only)
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+def source_quality(source: Dict[str, Any]) -> Optional[float]:
+    """Best-effort quality score for a source, or None if nothing is known about it"""
+    credibility = source.get("credibility")
+    if isinstance(credibility, dict):
+        credibility = credibility.get("score")
+    for value in (credibility, source.get("credibility_score"), source.get("relevance_score"), source.get("score")):
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+class SourceCollector:
+    """Collects sources from concurrent searches, dropping duplicates as they arrive.
+
+    Sources are deduplicated by canonical URL and by content fingerprint. Sources
+    whose quality is unknown count as high quality; known scores below
+    ``min_quality`` are kept as a fallback but do not count towards ``is_full``.
+    """
+
+    def __init__(self, max_sources: int, min_quality: float = 0.0):
+        self.max_sources = max_sources
+        self.min_quality = min_quality
+        self._urls_seen: Set[str] = set()
+        self._fingerprints_seen: Set[str] = set()
+        self._high_quality: List[Dict[str, Any]] = []
+        self._low_quality: List[Dict[str, Any]] = []
+        self.duplicates_dropped = 0
+
+    def add(self, source: Dict[str, Any]) -> bool:
+        """Add a source, returning False if it was a duplicate or unusable"""
+        if not isinstance(source, dict):
+            return False
+
+        canonical = canonicalize_url(source.get("url"))
+        if not canonical:
+            return False
+
+        fingerprint = content_fingerprint(extract_source_text(source))
+        if canonical in self._urls_seen or (fingerprint and fingerprint in self._fingerprints_seen):
+            self.duplicates_dropped += 1
+            return False
+
+        self._urls_seen.add(canonical)
+        if fingerprint:
+            self._fingerprints_seen.add(fingerprint)
+
+        quality = source_quality(source)
+        if quality is None or quality >= self.min_quality:
+            self._high_quality.append(source)
+        else:
+            self._low_quality.append(source)
+        return True
+
+    def add_many(self, sources: List[Dict[str, Any]]) -> int:
+        """Add several sources, returning how many were new"""
+        return sum(1 for source in sources or [] if self.add(source))
+
+    def is_full(self) -> bool:
+        """True once enough distinct high-quality sources have been collected"""
+        return len(self._high_quality) >= self.max_sources
+
+    def results(self) -> List[Dict[str, Any]]:
+        """High-quality sources first, topped up with lower-quality ones, capped at max_sources"""
+        return (self._high_quality + self._low_quality)[:self.max_sources]
+
+__all__ = [
+    'canonicalize_url',
+    'get_domain',
+    'extract_source_text',
+    'content_fingerprint',
+    'source_quality',
+    'SourceCollector'
+]
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import logger
+from app.config.settings import settings
+import random
+import time
+
+@dataclass
+class Span:
+    name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    ended: Optional[float] = None
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.ended or time.perf_counter()) - self.started) * 1000
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 2),
+            "duration_ms": round(self.duration_ms, 2)
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+    def render(self) -> str:
+        """Compact one-line form for logs: ``name 1234ms [child 12ms, ...]``"""
+        text = f"{self.name} {self.duration_ms:.0f}ms"
+        if self.children:
+            text += " [" + ", ".join(child.render() for child in self.children) + "]"
+        return text
+
+# The innermost open span of the current task. Tasks started with asyncio.gather/create_task copy
+# the context, so spans opened in concurrent branches nest under the span that spawned them.
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; a no-op (yields None) outside ``record_spans``"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    current = Span(name, attributes)
+    parent.children.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.ended = time.perf_counter()
+        _current_span.reset(token)
+
+class SpanRecorder:
+    """Root of one request's timing tree"""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.root = Span(name, attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict(self.root.started)
+
+    def report(self, metadata: Dict[str, Any], include: bool) -> None:
+        """Put the tree in response ``metadata`` when ``include``, otherwise log a sample of them.
+
+        Slow requests (over TIMINGS_LOG_SLOW_SECONDS) are always logged.
+        """
+        if include:
+            metadata["timings"] = self.to_dict()
+            return
+        slow = self.root.duration_ms >= settings.TIMINGS_LOG_SLOW_SECONDS * 1000
+        if slow or random.random() < settings.TIMINGS_LOG_SAMPLE_RATE:
+            logger.info(f"Timings{' (slow)' if slow else ''}: {self.root.render()}")
+
+@contextmanager
+def record_spans(name: str, **attributes: Any) -> Iterator[SpanRecorder]:
+    """Collect every span opened inside the block (including in tasks it starts) into one tree"""
+    recorder = SpanRecorder(name, **attributes)
+    token = _current_span.set(recorder.root)
+    try:
+        yield recorder
+    finally:
+        recorder.root.ended = time.perf_counter()
+        _current_span.reset(token)
+
+def timings_requested(headers: Any) -> bool:
+    """True if the request asked for the timing tree in its response"""
+    value = headers.get(settings.TIMINGS_DEBUG_HEADER, "")
+    return value.lower() in ("1", "true", "yes")
+
+__all__ = [
+    'Span',
+    'SpanRecorder',
+    'span',
+    'record_spans',
+    'timings_requested'
+]
@@ -0,0 +1,247 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from app.config import logger, db
+from app.config.settings import settings
+from app.utils.spans import span
+import functools
+import inspect
+import os
+import time
+
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+EXTERNAL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "posey_http_request_duration_seconds",
+    "HTTP request latency by router (first path segment of the matched route)",
+    ["router", "method", "status"],
+    buckets=REQUEST_BUCKETS
+)
+STAGE_DURATION = Histogram(
+    "posey_stage_duration_seconds",
+    "Duration of orchestration stages: content_analysis, minion (name = minion key), ability (name = ability) and synthesis",
+    ["stage", "name", "outcome"],
+    buckets=STAGE_BUCKETS
+)
+LLM_CALL_DURATION = Histogram(
+    "posey_llm_call_duration_seconds",
+    "Duration of agent runs against an LLM, including any tool call round trips",
+    ["provider", "model", "agent_type", "outcome"],
+    buckets=STAGE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "posey_llm_tokens",
+    "Tokens used by agent runs; direction is request or response",
+    ["provider", "model", "direction"]
+)
+LLM_MODEL_REQUESTS = Counter(
+    "posey_llm_model_requests",
+    "Model requests made by agent runs",
+    ["provider", "model"]
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "posey_external_call_duration_seconds",
+    "Latency of calls to backing services (qdrant, voyager)",
+    ["service", "operation", "outcome"],
+    buckets=EXTERNAL_BUCKETS
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "posey_embedding_batch_size",
+    "Number of texts per embedding batch",
+    ["model"],
+    buckets=BATCH_SIZE_BUCKETS
+)
+EMBEDDING_BATCH_DURATION = Histogram(
+    "posey_embedding_batch_duration_seconds",
+    "Time to embed one batch",
+    ["model"],
+    buckets=EXTERNAL_BUCKETS
+)
+
+@contextmanager
+def _observe(histogram: Histogram, **labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - started)
+
+@contextmanager
+def observe_stage(stage: str, name: str = "") -> Iterator[None]:
+    """Time an orchestration stage: ``with observe_stage("minion", minion_key): ...``
+
+    Also opens a span, so the stage shows up in the request's timing tree.
+    """
+    with span(f"{stage}:{name}" if name else stage), _observe(STAGE_DURATION, stage=stage, name=name):
+        yield
+
+def observe_external(service: str, operation: str):
+    """Time a call to a backing service: ``with observe_external("voyager", "search"): ...``"""
+    return _observe(EXTERNAL_CALL_DURATION, service=service, operation=operation)
+
+class TimedQdrantClient:
+    """Proxy for AsyncQdrantClient that times every coroutine method (search, upsert, scroll, ...)"""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def timed(*args, **kwargs):
+            with observe_external("qdrant", name):
+                return await attr(*args, **kwargs)
+        return timed
+
+def record_llm_run(provider: str, model: str, agent_type: str, seconds: float, usage: Any = None, outcome: str = "ok") -> None:
+    """Record one agent run; ``usage`` is the run's pydantic-ai Usage, if it completed"""
+    LLM_CALL_DURATION.labels(provider=provider, model=model, agent_type=agent_type, outcome=outcome).observe(seconds)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(provider=provider, model=model, direction="request").inc(getattr(usage, "request_tokens", None) or 0)
+    LLM_TOKENS.labels(provider=provider, model=model, direction="response").inc(getattr(usage, "response_tokens", None) or 0)
+    LLM_MODEL_REQUESTS.labels(provider=provider, model=model).inc(getattr(usage, "requests", None) or 0)
+
+def observe_embedding_batch(model: str, size: int, seconds: float) -> None:
+    EMBEDDING_BATCH_SIZE.labels(model=model).observe(size)
+    EMBEDDING_BATCH_DURATION.labels(model=model).observe(seconds)
+
+def _histogram_family(name: str, documentation: str, snapshot: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> HistogramMetricFamily:
+    """Prometheus histogram from a LatencyHistogram snapshot"""
+    labels = labels or {}
+    family = HistogramMetricFamily(name, documentation, labels=list(labels))
+    family.add_metric(list(labels.values()), buckets=list(snapshot["buckets"].items()), sum_value=snapshot["sum"])
+    return family
+
+class DatabasePoolCollector:
+    """Reads ``db.pool_stats()`` at scrape time, so pool gauges are never stale"""
+
+    def describe(self):
+        # Registering shouldn't touch the pool
+        return []
+
+    def collect(self):
+        try:
+            stats = db.pool_stats()
+        except Exception as e:
+            logger.warning(f"Failed to read database pool stats for metrics: {e}")
+            return
+
+        gauges = {
+            "size": GaugeMetricFamily("posey_db_pool_size", "Connections currently open in the pool", labels=["pool"]),
+            "checked_out": GaugeMetricFamily("posey_db_pool_checked_out", "Connections currently in use", labels=["pool"]),
+            "capacity": GaugeMetricFamily("posey_db_pool_capacity", "Maximum connections the pool will open", labels=["pool"]),
+            "utilization": GaugeMetricFamily("posey_db_pool_utilization", "Fraction of capacity in use", labels=["pool"])
+        }
+        engine = stats["sqlalchemy"]
+        gauges["size"].add_metric(["sqlalchemy"], engine["size"])
+        gauges["checked_out"].add_metric(["sqlalchemy"], engine["checked_out"])
+        gauges["capacity"].add_metric(["sqlalchemy"], engine["capacity"])
+        gauges["utilization"].add_metric(["sqlalchemy"], engine["utilization"])
+        yield from gauges.values()
+
+        timeouts = CounterMetricFamily("posey_db_pool_checkout_timeouts", "Checkouts that gave up waiting for a connection", labels=["pool"])
+        timeouts.add_metric(["sqlalchemy"], engine["checkout_timeouts"])
+        yield timeouts
+        yield _histogram_family(
+            "posey_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection",
+            engine["checkout_wait_seconds"],
+            {"pool": "sqlalchemy"}
+        )
+
+        raw = stats.get("asyncpg")
+        if raw:
+            yield _histogram_family(
+                "posey_db_raw_pool_checkout_wait_seconds",
+                "Time spent waiting for a raw asyncpg connection",
+                raw["checkout_wait_seconds"],
+                {"pool": "asyncpg"}
+            )
+            for key, family in (("size", "posey_db_raw_pool_size"), ("in_use", "posey_db_raw_pool_in_use"), ("max_size", "posey_db_raw_pool_max_size")):
+                gauge = GaugeMetricFamily(family, f"Raw asyncpg pool {key.replace('_', ' ')}", labels=["pool"])
+                gauge.add_metric(["asyncpg"], raw[key])
+                yield gauge
+
+class EventLoopCollector:
+    """Event loop lag and stalls per call site, read from the loop monitor at scrape time"""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from app.utils.loop_monitor import loop_monitor
+        yield _histogram_family(
+            "posey_event_loop_lag_seconds",
+            "How late the loop monitor's periodic wakeups ran",
+            loop_monitor.lag.snapshot()
+        )
+        stalls = CounterMetricFamily("posey_event_loop_stalls", "Event loop stalls over the threshold, by blocking call site", labels=["site"])
+        stall_seconds = CounterMetricFamily("posey_event_loop_stall_seconds", "Time the event loop was blocked, by call site", labels=["site"])
+        for offender in loop_monitor.top_offenders(settings.LOOP_MONITOR_MAX_OFFENDERS):
+            stalls.add_metric([offender.site], offender.count)
+            stall_seconds.add_metric([offender.site], offender.total_seconds)
+        yield stalls
+        yield stall_seconds
+
+_pool_collector = DatabasePoolCollector()
+_loop_collector = EventLoopCollector()
+REGISTRY.register(_pool_collector)
+REGISTRY.register(_loop_collector)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition body and content type for the /metrics endpoint.
+
+    Under a multi-process server with PROMETHEUS_MULTIPROC_DIR set, metrics
+    from all workers are merged; pool stats are always the scraped worker's.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_pool_collector)
+        registry.register(_loop_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Router label for a request: the first segment of the matched route's path template"""
+    route = scope.get("route")
+    path: Optional[str] = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    return path.strip("/").split("/", 1)[0] or "root"
+
+__all__ = [
+    'HTTP_REQUEST_DURATION',
+    'STAGE_DURATION',
+    'LLM_CALL_DURATION',
+    'LLM_TOKENS',
+    'EXTERNAL_CALL_DURATION',
+    'EMBEDDING_BATCH_SIZE',
+    'observe_stage',
+    'observe_external',
+    'TimedQdrantClient',
+    'record_llm_run',
+    'observe_embedding_batch',
+    'render_metrics',
+    'route_label'
+]
@@ -0,0 +1,54 @@
+import unittest
+from app.utils.content_index import chunk_text, content_hash
+
+WORDS = " ".join(f"word{i:03d}" for i in range(200))
+
+class TestChunkText(unittest.TestCase):
+    def test_empty_text(self):
+        self.assertEqual(chunk_text("", 100, 10), [])
+        self.assertEqual(chunk_text("   \n ", 100, 10), [])
+        self.assertEqual(chunk_text(None, 100, 10), [])
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(chunk_text("  A short page.  ", 100, 10), ["A short page."])
+
+    def test_chunks_respect_size_and_end_on_whitespace(self):
+        chunks = chunk_text(WORDS, 100, 20)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 100)
+            self.assertIn(chunk, WORDS)
+        # Every chunk but the last ends on a whole word
+        for chunk in chunks[:-1]:
+            self.assertRegex(chunk, r"word\d{3}$")
+            self.assertIn(chunk + " ", WORDS)
+
+    def test_chunks_cover_the_text_with_overlap(self):
+        chunks = chunk_text(WORDS, 100, 20)
+        self.assertTrue(WORDS.startswith(chunks[0]))
+        self.assertTrue(WORDS.endswith(chunks[-1]))
+        position = 0
+        for chunk in chunks:
+            start = WORDS.index(chunk, max(position - 20, 0))
+            # Each chunk starts within the previous one (overlap), never after a gap
+            self.assertLessEqual(start, position)
+            position = start + len(chunk)
+        self.assertEqual(position, len(WORDS))
+
+    def test_text_without_spaces_still_terminates(self):
+        chunks = chunk_text("x" * 250, 100, 30)
+        self.assertEqual([len(c) for c in chunks], [100, 100, 100, 40])
+
+    def test_overlap_larger_than_chunk_still_advances(self):
+        chunks = chunk_text("y" * 50, 10, 20)
+        self.assertLessEqual(len(chunks), 50)
+        self.assertEqual(chunks[-1], "y" * len(chunks[-1]))
+
+class TestContentHash(unittest.TestCase):
+    def test_stable_and_content_sensitive(self):
+        self.assertEqual(content_hash("page text"), content_hash("page text"))
+        self.assertNotEqual(content_hash("page text"), content_hash("page text!"))
+        self.assertEqual(content_hash(None), content_hash(""))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+from app.config.settings import settings
+from app.utils.media_quota import INSERT_HISTORY_SQL, LEASE_QUOTA_SQL, RELEASE_QUOTA_SQL, MediaQuotaTracker
+
+# Types asyncpg accepts for the parameters Postgres infers from each statement
+LEASE_PARAM_TYPES = {"config_key": str, "agent_id": str, "day": date, "day_text": str, "requested": int, "minimum": int}
+RELEASE_PARAM_TYPES = {"config_key": str, "agent_id": str, "amount": int, "day_text": str}
+
+def check_param_types(params, types):
+    assert set(params) == set(types), f"unexpected parameters {sorted(params)}"
+    for name, expected in types.items():
+        assert isinstance(params[name], expected), f"{name}={params[name]!r} is not a {expected.__name__}"
+
+class FakeQuotaDB:
+    """Stands in for the agents table: applies the lease/release statements to one daily counter"""
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self.used = 0
+        self.leases = []
+        self.releases = []
+        self.history = []
+
+    async def execute(self, statement, params):
+        # Let other tasks run, as a real round trip would
+        await asyncio.sleep(0)
+        if statement is LEASE_QUOTA_SQL:
+            check_param_types(params, LEASE_PARAM_TYPES)
+            self.leases.append(params)
+            amount = max(min(params["requested"], max(self.daily_limit - self.used, 0)), params["minimum"])
+            self.used += amount
+            return SimpleNamespace(fetchone=lambda: SimpleNamespace(amount=amount, daily_limit=self.daily_limit))
+        if statement is RELEASE_QUOTA_SQL:
+            check_param_types(params, RELEASE_PARAM_TYPES)
+            self.releases.append(params)
+            self.used = max(self.used - params["amount"], 0)
+        elif statement is INSERT_HISTORY_SQL:
+            self.history.extend(params)
+
+    async def commit(self):
+        pass
+
+    @asynccontextmanager
+    async def get_session(self):
+        yield self
+
+class MediaQuotaTestCase(unittest.IsolatedAsyncioTestCase):
+    daily_limit = 3
+
+    def setUp(self):
+        self.db = FakeQuotaDB(self.daily_limit)
+        patcher = patch("app.utils.media_quota.db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        lease_size = patch.object(settings, "MEDIA_QUOTA_LEASE_SIZE", 5)
+        lease_size.start()
+        self.addCleanup(lease_size.stop)
+        self.tracker = MediaQuotaTracker()
+        self.agent_id = uuid4()
+
+class TestQuotaChecks(MediaQuotaTestCase):
+    async def test_concurrent_checks_cannot_share_a_unit(self):
+        results = await asyncio.gather(*(self.tracker.check(self.agent_id, "image") for _ in range(5)))
+        self.assertEqual(sorted(results), [False, False, True, True, True])
+        self.assertEqual(self.db.used, 3)
+
+    async def test_recording_consumes_the_reservation(self):
+        for _ in range(3):
+            self.assertTrue(await self.tracker.check(self.agent_id, "image"))
+            await self.tracker.record_usage(self.agent_id, "image", "a cat")
+        self.assertFalse(await self.tracker.check(self.agent_id, "image"))
+        # Nothing was overdrawn
+        self.assertEqual([lease["minimum"] for lease in self.db.leases], [0, 0])
+        self.assertEqual(self.db.used, 3)
+
+    async def test_lease_uses_the_workers_utc_day(self):
+        await self.tracker.check(self.agent_id, "image")
+        lease = self.db.leases[0]
+        self.assertEqual(lease["day"], MediaQuotaTracker._today())
+        self.assertEqual(lease["day_text"], lease["day"].isoformat())
+        self.assertEqual(lease["config_key"], "image_generation")
+        self.assertEqual(lease["agent_id"], str(self.agent_id))
+
+    async def test_bound_parameter_types(self):
+        """The date comparisons get a real date, last_reset gets its ISO string"""
+        self.assertTrue(await self.tracker.check(self.agent_id, "image"))
+        await self.tracker.flush(release_all=True)
+        self.assertEqual(len(self.db.leases), 1)
+        self.assertEqual(len(self.db.releases), 1)
+        self.assertIs(type(self.db.leases[0]["day"]), date)
+        self.assertNotIn("day", self.db.releases[0])
+        self.assertEqual(self.db.releases[0]["day_text"], self.db.leases[0]["day_text"])
+
+class TestQuotaUsage(MediaQuotaTestCase):
+    daily_limit = 1
+
+    async def test_usage_past_the_limit_is_written_to_the_database(self):
+        await self.tracker.record_usage(self.agent_id, "image", "first")
+        await self.tracker.record_usage(self.agent_id, "image", "second")
+        self.assertEqual(self.db.used, 2)
+        self.assertEqual(self.db.leases[-1]["minimum"], 1)
+        # Another worker sees nothing left
+        self.assertFalse(await MediaQuotaTracker().check(self.agent_id, "image"))
+
+    async def test_unrecorded_reservations_lapse(self):
+        self.assertTrue(await self.tracker.check(self.agent_id, "image"))
+        with patch.object(settings, "MEDIA_QUOTA_RESERVATION_SECONDS", -1):
+            await self.tracker.flush(release_all=True)
+        # The lapsed unit went back to the database
+        self.assertEqual(self.db.used, 0)
+        self.assertTrue(await MediaQuotaTracker().check(self.agent_id, "image"))
+
+class TestQuotaFlush(MediaQuotaTestCase):
+    daily_limit = 10
+
+    async def test_shutdown_releases_unused_units_and_writes_history(self):
+        self.assertTrue(await self.tracker.check(self.agent_id, "image"))
+        await self.tracker.record_usage(self.agent_id, "image", "a cat", result_url="https://cdn.example/cat.png")
+        self.assertEqual(self.db.used, 5)
+
+        await self.tracker.shutdown()
+        self.assertEqual(self.db.used, 1)
+        self.assertEqual(len(self.db.history), 1)
+        self.assertEqual(self.db.history[0]["prompt"], "a cat")
+        self.assertEqual(self.db.history[0]["agent_id"], str(self.agent_id))
+
+    async def test_pending_reservations_are_kept_on_flush(self):
+        self.assertTrue(await self.tracker.check(self.agent_id, "image"))
+        await self.tracker.flush(release_all=True)
+        # Everything but the reserved unit went back
+        self.assertEqual(self.db.used, 1)
+        await self.tracker.record_usage(self.agent_id, "image", "a cat")
+        self.assertEqual(self.db.used, 1)
+        self.assertEqual(len(self.db.leases), 1)
+
+if __name__ == '__main__':
+    unittest.main()
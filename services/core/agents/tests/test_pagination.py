@@ -0,0 +1,101 @@
+import unittest
+from datetime import datetime, timezone
+from uuid import uuid4
+from sqlalchemy import Column, DateTime, Float, MetaData, Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID
+from app.utils.pagination import (
+    decode_cursor,
+    decode_ranked_cursor,
+    encode_cursor,
+    encode_ranked_cursor,
+    keyset_condition,
+    next_cursor,
+    order_by_keyset,
+    ranked_keyset_condition
+)
+
+messages = Table(
+    "conversation_messages", MetaData(),
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("created_at", DateTime(timezone=True)),
+    Column("rank", Float)
+)
+
+def compile_sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+class TestCursors(unittest.TestCase):
+    def setUp(self):
+        self.created_at = datetime(2025, 3, 14, 15, 9, 26, 535897, tzinfo=timezone.utc)
+        self.row_id = uuid4()
+
+    def test_round_trip(self):
+        cursor = encode_cursor(self.created_at, self.row_id)
+        self.assertEqual(decode_cursor(cursor), (self.created_at, self.row_id))
+        # Safe in a query string and a header as is
+        self.assertNotIn("=", cursor)
+        self.assertRegex(cursor, r"^[A-Za-z0-9_-]+$")
+
+    def test_ranked_round_trip(self):
+        cursor = encode_ranked_cursor(0.0625, self.created_at, self.row_id)
+        self.assertEqual(decode_ranked_cursor(cursor), (0.0625, self.created_at, self.row_id))
+
+    def test_invalid_cursors_raise_value_error(self):
+        plain = encode_cursor(self.created_at, self.row_id)
+        for cursor in ["", "not-a-cursor", plain[:-4], encode_cursor(self.created_at, "not-a-uuid")]:
+            with self.assertRaises(ValueError, msg=cursor):
+                decode_cursor(cursor)
+        # A plain cursor has no rank
+        with self.assertRaises(ValueError):
+            decode_ranked_cursor(plain)
+
+class TestNextCursor(unittest.TestCase):
+    def rows(self, count):
+        return [
+            {"id": uuid4(), "created_at": datetime(2025, 1, 1, 0, 0, second, tzinfo=timezone.utc)}
+            for second in range(count)
+        ]
+
+    def test_no_cursor_on_the_last_page(self):
+        rows = self.rows(3)
+        self.assertEqual(next_cursor(rows, 3), (rows, None))
+        self.assertEqual(next_cursor([], 3), ([], None))
+
+    def test_trims_the_extra_row_and_points_at_the_last_kept_one(self):
+        rows = self.rows(4)
+        page, cursor = next_cursor(rows, 3)
+        self.assertEqual(page, rows[:3])
+        self.assertEqual(decode_cursor(cursor), (rows[2]["created_at"], rows[2]["id"]))
+
+class TestKeysetConditions(unittest.TestCase):
+    def setUp(self):
+        self.cursor = encode_cursor(datetime(2025, 1, 1, tzinfo=timezone.utc), uuid4())
+
+    def test_row_value_comparison_by_direction(self):
+        descending = compile_sql(keyset_condition(messages.c.created_at, messages.c.id, self.cursor, descending=True))
+        ascending = compile_sql(keyset_condition(messages.c.created_at, messages.c.id, self.cursor, descending=False))
+        self.assertIn("(conversation_messages.created_at, conversation_messages.id) <", descending)
+        self.assertIn("(conversation_messages.created_at, conversation_messages.id) >", ascending)
+
+    def test_ranked_condition(self):
+        cursor = encode_ranked_cursor(0.5, datetime(2025, 1, 1, tzinfo=timezone.utc), uuid4())
+        sql = compile_sql(ranked_keyset_condition(messages.c.rank, messages.c.created_at, messages.c.id, cursor))
+        self.assertIn("(conversation_messages.rank, conversation_messages.created_at, conversation_messages.id) <", sql)
+
+    def test_invalid_cursor_is_rejected_before_querying(self):
+        with self.assertRaises(ValueError):
+            keyset_condition(messages.c.created_at, messages.c.id, "garbage", descending=True)
+
+    def test_order_matches_direction(self):
+        self.assertEqual(
+            [compile_sql(c) for c in order_by_keyset(messages.c.created_at, messages.c.id, descending=True)],
+            ["conversation_messages.created_at DESC", "conversation_messages.id DESC"]
+        )
+        self.assertEqual(
+            [compile_sql(c) for c in order_by_keyset(messages.c.created_at, messages.c.id, descending=False)],
+            ["conversation_messages.created_at ASC", "conversation_messages.id ASC"]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import patch
+from app.middleware.rate_limit import InMemoryRateLimitStore, RateLimitMiddleware, RateLimitPolicy, RateLimitStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class TestInMemoryRateLimitStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("app.middleware.rate_limit.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_burst_then_refill(self):
+        store = InMemoryRateLimitStore()
+        for _ in range(3):
+            allowed, _ = await store.take("k", rate=1.0, capacity=3)
+            self.assertTrue(allowed)
+        allowed, retry_after = await store.take("k", rate=1.0, capacity=3)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1.0)
+
+        self.clock.now += 0.5
+        allowed, retry_after = await store.take("k", rate=1.0, capacity=3)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.5)
+
+        self.clock.now += 0.5
+        allowed, _ = await store.take("k", rate=1.0, capacity=3)
+        self.assertTrue(allowed)
+
+    async def test_refill_is_capped_at_capacity(self):
+        store = InMemoryRateLimitStore()
+        await store.take("k", rate=1.0, capacity=2)
+        self.clock.now += 3600
+        results = [(await store.take("k", rate=1.0, capacity=2))[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    async def test_keys_are_independent_and_evicted_lru(self):
+        store = InMemoryRateLimitStore(max_keys=2)
+        self.assertTrue((await store.take("a", rate=0.1, capacity=1))[0])
+        self.assertTrue((await store.take("b", rate=0.1, capacity=1))[0])
+        self.assertFalse((await store.take("a", rate=0.1, capacity=1))[0])
+        # "b" is now least recently used and makes room for "c"
+        await store.take("c", rate=0.1, capacity=1)
+        self.assertTrue((await store.take("b", rate=0.1, capacity=1))[0])
+
+    async def test_refund(self):
+        store = InMemoryRateLimitStore()
+        await store.take("k", rate=0.1, capacity=1)
+        await store.refund("k", capacity=1)
+        self.assertTrue((await store.take("k", rate=0.1, capacity=1))[0])
+        # Never past capacity, and unknown keys are ignored
+        await store.refund("k", capacity=1)
+        await store.refund("k", capacity=1)
+        await store.refund("missing", capacity=1)
+        results = [(await store.take("k", rate=0.1, capacity=1))[0] for _ in range(2)]
+        self.assertEqual(results, [True, False])
+
+    def test_store_is_abstract(self):
+        with self.assertRaises(TypeError):
+            RateLimitStore()
+
+class TestRateLimitPolicy(unittest.TestCase):
+    def test_from_dict_defaults(self):
+        policy = RateLimitPolicy.from_dict({"name": "p", "requests_per_minute": 30, "methods": ["post"]})
+        self.assertEqual(policy.burst, 5)
+        self.assertEqual(policy.rate, 0.5)
+        self.assertEqual(policy.methods, ("POST",))
+
+    def test_from_dict_rejects_rates_that_never_refill(self):
+        for rpm in [0, -5]:
+            with self.assertRaises(ValueError, msg=rpm):
+                RateLimitPolicy.from_dict({"name": "p", "requests_per_minute": rpm, "burst": 1})
+        with self.assertRaises(ValueError):
+            RateLimitPolicy.from_dict({"name": "p", "requests_per_minute": 60, "burst": -1})
+
+class TestRateLimitMiddleware(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch("app.middleware.rate_limit.time.monotonic", FakeClock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    async def downstream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def request(self, middleware, path="/conversations", user_id="u1", client="10.0.0.1"):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "headers": [],
+            "client": (client, 1234),
+            "state": {"user": {"id": user_id}} if user_id else {}
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware(scope, receive, send)
+        start = messages[0]
+        return start["status"], dict(start["headers"])
+
+    async def test_rejects_with_retry_after(self):
+        middleware = RateLimitMiddleware(
+            self.downstream,
+            policies=[RateLimitPolicy("default", requests_per_minute=60, burst=2)],
+            store=InMemoryRateLimitStore()
+        )
+        statuses = [(await self.request(middleware))[0] for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        _, headers = await self.request(middleware)
+        self.assertEqual(headers[b"retry-after"], b"1")
+        # Another user has a bucket of their own
+        self.assertEqual((await self.request(middleware, user_id="u2"))[0], 200)
+
+    async def test_anonymous_requests_are_keyed_by_ip(self):
+        middleware = RateLimitMiddleware(
+            self.downstream,
+            policies=[RateLimitPolicy("default", requests_per_minute=60, burst=1)],
+            store=InMemoryRateLimitStore()
+        )
+        self.assertEqual((await self.request(middleware, user_id=None))[0], 200)
+        self.assertEqual((await self.request(middleware, user_id=None))[0], 429)
+        self.assertEqual((await self.request(middleware, user_id=None, client="10.0.0.2"))[0], 200)
+
+    async def test_policies_match_by_prefix(self):
+        middleware = RateLimitMiddleware(
+            self.downstream,
+            policies=[RateLimitPolicy("uploads", requests_per_minute=60, burst=1, path_prefix="/files")],
+            store=InMemoryRateLimitStore()
+        )
+        for _ in range(3):
+            self.assertEqual((await self.request(middleware, path="/conversations"))[0], 200)
+        self.assertEqual((await self.request(middleware, path="/files/upload"))[0], 200)
+        self.assertEqual((await self.request(middleware, path="/files/upload"))[0], 429)
+
+    async def test_denied_request_refunds_earlier_policies(self):
+        store = InMemoryRateLimitStore()
+        route_wide = RateLimitPolicy("route", requests_per_minute=60, burst=1, key="route", path_prefix="/orchestrator")
+        per_user = RateLimitPolicy("user", requests_per_minute=60, burst=3)
+        middleware = RateLimitMiddleware(self.downstream, policies=[per_user, route_wide], store=store)
+
+        self.assertEqual((await self.request(middleware, path="/orchestrator/run"))[0], 200)
+        self.assertEqual((await self.request(middleware, path="/orchestrator/run"))[0], 429)
+        self.assertEqual((await self.request(middleware, path="/orchestrator/run"))[0], 429)
+        # The two rejected requests didn't spend the user's tokens: two are still left
+        self.assertEqual((await self.request(middleware))[0], 200)
+        self.assertEqual((await self.request(middleware))[0], 200)
+        self.assertEqual((await self.request(middleware))[0], 429)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+from app.minions.research import ResearchMinion, ResearchStrategy
+
+def sources(prefix, count):
+    return [{"url": f"https://{prefix}.example/{i}", "relevance_score": 0.9} for i in range(count)]
+
+class TestGatherInformation(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Only the gathering code path is exercised; BaseMinion setup (agents, prompts) isn't needed
+        self.minion = ResearchMinion.__new__(ResearchMinion)
+        self.plan = patch.object(
+            ResearchMinion, "plan_research",
+            AsyncMock(return_value={"search_queries": ["timeout", "fast", "slow"]})
+        )
+        self.plan.start()
+        self.addCleanup(self.plan.stop)
+
+    async def search(self, query, strategy):
+        if query == "timeout":
+            raise TimeoutError("search provider timed out")
+        if query == "slow":
+            await asyncio.sleep(0.05)
+        return sources(query, 2)
+
+    async def test_failed_search_does_not_end_gathering(self):
+        strategy = ResearchStrategy(max_sources=10, gather_timeout=5, use_content_index=False)
+        with patch.object(ResearchMinion, "_search_sources", side_effect=self.search):
+            results = await self.minion.gather_information("q", strategy)
+        self.assertEqual(
+            sorted(s["url"] for s in results),
+            sorted(s["url"] for s in sources("fast", 2) + sources("slow", 2))
+        )
+
+    async def test_deadline_keeps_partial_results(self):
+        async def search(query, strategy):
+            if query == "slow":
+                await asyncio.sleep(10)
+            return await self.search(query, strategy)
+
+        strategy = ResearchStrategy(max_sources=10, gather_timeout=0.2, use_content_index=False)
+        with patch.object(ResearchMinion, "_search_sources", side_effect=search):
+            results = await self.minion.gather_information("q", strategy)
+        self.assertEqual([s["url"] for s in results], [s["url"] for s in sources("fast", 2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from app.utils.source_utils import SourceCollector, canonicalize_url, content_fingerprint
+
+LONG_TEXT = "Solar panels convert sunlight into electricity using photovoltaic cells made of silicon."
+
+class TestCanonicalizeUrl(unittest.TestCase):
+    def test_same_page_through_different_links(self):
+        """Scheme, www, default ports, trailing slashes and tracking params don't matter"""
+        expected = canonicalize_url("https://example.com/articles/solar")
+        for url in [
+            "http://example.com/articles/solar",
+            "https://www.example.com/articles/solar/",
+            "https://EXAMPLE.com:443/articles//solar",
+            "example.com/articles/solar?utm_source=newsletter&fbclid=abc",
+            "https://example.com/articles/solar#comments"
+        ]:
+            self.assertEqual(canonicalize_url(url), expected, url)
+
+    def test_query_is_sorted_and_kept(self):
+        self.assertEqual(
+            canonicalize_url("https://example.com/search?q=solar&page=2"),
+            canonicalize_url("https://example.com/search?page=2&q=solar")
+        )
+        self.assertNotEqual(
+            canonicalize_url("https://example.com/search?page=2"),
+            canonicalize_url("https://example.com/search?page=3")
+        )
+
+    def test_unusual_port_is_kept(self):
+        self.assertEqual(canonicalize_url("http://example.com:8080/a"), "https://example.com:8080/a")
+
+    def test_unusable_urls(self):
+        for url in [None, "", "   ", 42, "http://"]:
+            self.assertIsNone(canonicalize_url(url), url)
+
+class TestContentFingerprint(unittest.TestCase):
+    def test_ignores_case_punctuation_and_whitespace(self):
+        self.assertEqual(
+            content_fingerprint(LONG_TEXT),
+            content_fingerprint("  " + LONG_TEXT.upper().replace(" ", "   ").replace(".", "!") + " ")
+        )
+
+    def test_short_text_has_no_fingerprint(self):
+        self.assertIsNone(content_fingerprint("Solar panels"))
+        self.assertIsNone(content_fingerprint(None))
+
+class TestSourceCollector(unittest.TestCase):
+    def test_drops_duplicate_urls_and_content(self):
+        collector = SourceCollector(max_sources=10)
+        self.assertTrue(collector.add({"url": "https://example.com/a", "content": LONG_TEXT}))
+        self.assertFalse(collector.add({"url": "http://www.example.com/a/?utm_medium=email"}))
+        # A mirror of the same text on another site
+        self.assertFalse(collector.add({"url": "https://mirror.org/copy", "snippet": LONG_TEXT}))
+        self.assertTrue(collector.add({"url": "https://example.com/b"}))
+        self.assertEqual(collector.duplicates_dropped, 2)
+        self.assertEqual([s["url"] for s in collector.results()], ["https://example.com/a", "https://example.com/b"])
+
+    def test_rejects_unusable_sources(self):
+        collector = SourceCollector(max_sources=10)
+        self.assertFalse(collector.add("https://example.com"))
+        self.assertFalse(collector.add({"title": "No URL"}))
+        self.assertEqual(collector.duplicates_dropped, 0)
+
+    def test_low_quality_sources_fill_gaps_only(self):
+        collector = SourceCollector(max_sources=2, min_quality=0.5)
+        collector.add({"url": "https://low.example/1", "credibility": {"score": 0.2}})
+        collector.add({"url": "https://high.example/1", "relevance_score": 0.9})
+        self.assertFalse(collector.is_full())
+        # Unknown quality counts as high quality
+        collector.add({"url": "https://unknown.example/1"})
+        self.assertTrue(collector.is_full())
+        self.assertEqual(
+            [s["url"] for s in collector.results()],
+            ["https://high.example/1", "https://unknown.example/1"]
+        )
+
+    def test_results_topped_up_with_low_quality(self):
+        collector = SourceCollector(max_sources=3, min_quality=0.5)
+        added = collector.add_many([
+            {"url": "https://a.example", "score": 0.1},
+            {"url": "https://b.example", "score": 0.8},
+            {"url": "https://a.example/"}
+        ])
+        self.assertEqual(added, 2)
+        self.assertEqual([s["url"] for s in collector.results()], ["https://b.example", "https://a.example"])
+
+if __name__ == '__main__':
+    unittest.main()
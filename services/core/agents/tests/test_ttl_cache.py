@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import patch
+from app.utils.ttl_cache import TTLCache
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("app.utils.ttl_cache.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_individually(self):
+        cache = TTLCache(max_size=10)
+        cache.set("short", "a", ttl=5)
+        cache.set("long", "b", ttl=60)
+        self.now += 5
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.get("long"), "b")
+        # Expired entries are dropped on read
+        self.assertEqual(len(cache), 1)
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache = TTLCache(max_size=10)
+        cache.set("k", "v", ttl=0)
+        cache.set("j", "v", ttl=-3)
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+
+    def test_set_replaces_value_and_expiry(self):
+        cache = TTLCache(max_size=10)
+        cache.set("k", "old", ttl=5)
+        cache.set("k", "new", ttl=60)
+        self.now += 30
+        self.assertEqual(cache.get("k"), "new")
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(max_size=10)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.pop("a")
+        cache.pop("missing")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+from browser_use import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+SESSION_IDLE_SECONDS = int(os.getenv("VOYAGER_SESSION_IDLE_SECONDS", "300"))
+MAX_SESSIONS = int(os.getenv("VOYAGER_MAX_SESSIONS", "8"))
+BROWSER_HEADLESS = os.getenv("VOYAGER_BROWSER_HEADLESS", "true").lower() != "false"
+MAX_LLM_CLIENTS = 16
+
+DEFAULT_LLM_CONFIG = {
+    "model": "gpt-4",  # Default to GPT-4 for reliable web interaction
+    "temperature": 0.7,
+}
+
+class SessionConfigConflict(Exception):
+    """An existing session was asked for with a different browser_config"""
+
+@dataclass
+class BrowserSession:
+    """A browser context (tabs, cookies, current page) owned by one client session"""
+    session_id: str
+    context: BrowserContext
+    browser_config: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    current_url: Optional[str] = None
+    steps_run: int = 0
+    # Callers holding the session; eviction and the reaper leave it alone while > 0
+    in_use: int = 0
+    # Steps of one session run one at a time; different sessions run in parallel
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class BrowserSessionPool:
+    """Keeps one warm browser and a browser context per session id.
+
+    Contexts are reused across /voyager/use calls that pass the same
+    session id, so multi-step interactions keep their page state.
+    Contexts idle for longer than SESSION_IDLE_SECONDS are closed by the
+    reaper, and the least recently used idle context is evicted once
+    MAX_SESSIONS is reached.
+    """
+
+    def __init__(self):
+        self._browser: Optional[Browser] = None
+        self._browser_lock = asyncio.Lock()
+        self._sessions: Dict[str, BrowserSession] = {}
+        self._sessions_lock = asyncio.Lock()
+        # Session ids whose context is being created; the event is set once it is published (or failed)
+        self._opening: Dict[str, asyncio.Event] = {}
+        self._llm_clients: Dict[str, ChatOpenAI] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def get_browser(self) -> Browser:
+        """Return the shared browser, launching it on first use"""
+        if self._browser is None:
+            async with self._browser_lock:
+                if self._browser is None:
+                    started = time.time()
+                    self._browser = Browser(config=BrowserConfig(headless=BROWSER_HEADLESS))
+                    logger.info(f"Shared browser started in {time.time() - started:.2f}s")
+        return self._browser
+
+    @asynccontextmanager
+    async def acquire(self, session_id: Optional[str] = None, browser_config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[BrowserSession, bool]]:
+        """Hold the session for ``session_id`` (a new id if none given), creating it when needed
+
+        Yields the session and whether it already existed. The session is
+        pinned before it is handed out, so it can't be evicted or reaped
+        until the ``async with`` block exits. ``browser_config`` applies when
+        the session is created; asking for an existing session with a
+        different one raises SessionConfigConflict.
+        """
+        session, reused = await self._pin(session_id or uuid.uuid4().hex, browser_config or {})
+        try:
+            yield session, reused
+        finally:
+            async with self._sessions_lock:
+                session.in_use -= 1
+                session.last_used = time.time()
+
+    async def _pin(self, session_id: str, browser_config: Dict[str, Any]) -> Tuple[BrowserSession, bool]:
+        """Pin an existing session, or reserve the id and open a new one outside the pool lock
+
+        Launching the browser and creating a context can take seconds, so only
+        the bookkeeping happens under _sessions_lock; other sessions can be
+        acquired and released meanwhile.
+        """
+        while True:
+            async with self._sessions_lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    if browser_config and browser_config != session.browser_config:
+                        raise SessionConfigConflict(
+                            f"Browser session {session_id} is already open with a different browser_config"
+                        )
+                    session.in_use += 1
+                    session.last_used = time.time()
+                    return session, True
+                opening = self._opening.get(session_id)
+                if opening is None:
+                    self._opening[session_id] = asyncio.Event()
+                    evicted = self._pop_eviction_candidate()
+                    break
+            # Another call is opening this session; pin it once it is published, or retry if that failed
+            await opening.wait()
+
+        try:
+            if evicted is not None:
+                await self._close(evicted)
+            browser = await self.get_browser()
+            context = await browser.new_context(config=BrowserContextConfig(**browser_config))
+            async with self._sessions_lock:
+                session = BrowserSession(session_id=session_id, context=context, browser_config=browser_config, in_use=1)
+                self._sessions[session_id] = session
+                logger.info(f"Opened browser session {session_id} ({len(self._sessions)} active)")
+            return session, False
+        finally:
+            self._opening.pop(session_id).set()
+
+    def _pop_eviction_candidate(self) -> Optional[BrowserSession]:
+        """Remove the least recently used idle session when at capacity (caller holds _sessions_lock)
+
+        Sessions still being opened count towards MAX_SESSIONS. The caller
+        closes the returned session after releasing the lock.
+        """
+        if len(self._sessions) + len(self._opening) <= MAX_SESSIONS:
+            return None
+        idle = [s for s in self._sessions.values() if not s.in_use]
+        if not idle:
+            logger.warning(f"All {len(self._sessions)} browser sessions are busy, exceeding MAX_SESSIONS")
+            return None
+        oldest = min(idle, key=lambda s: s.last_used)
+        return self._sessions.pop(oldest.session_id)
+
+    async def release(self, session_id: str) -> None:
+        """Close and forget a session"""
+        async with self._sessions_lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            await self._close(session)
+
+    async def _close(self, session: BrowserSession) -> None:
+        try:
+            await session.context.close()
+            logger.info(f"Closed browser session {session.session_id} after {session.steps_run} runs")
+        except Exception as e:
+            logger.warning(f"Error closing browser session {session.session_id}: {e}")
+
+    async def reap_idle(self) -> int:
+        """Close sessions idle for longer than SESSION_IDLE_SECONDS; returns how many were closed"""
+        cutoff = time.time() - SESSION_IDLE_SECONDS
+        async with self._sessions_lock:
+            expired = [
+                self._sessions.pop(sid) for sid, s in list(self._sessions.items())
+                if s.last_used < cutoff and not s.in_use
+            ]
+        for session in expired:
+            await self._close(session)
+        return len(expired)
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(max(5, SESSION_IDLE_SECONDS // 4))
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                logger.error(f"Browser session reaper failed: {e}", exc_info=True)
+
+    def get_llm(self, llm_config: Optional[Dict[str, Any]] = None) -> ChatOpenAI:
+        """Return a cached LLM client for this configuration"""
+        config = llm_config or {**DEFAULT_LLM_CONFIG, "api_key": os.getenv("OPENAI_API_KEY")}
+        key = json.dumps(config, sort_keys=True, default=str)
+        llm = self._llm_clients.get(key)
+        if llm is None:
+            if len(self._llm_clients) >= MAX_LLM_CLIENTS:
+                self._llm_clients.pop(next(iter(self._llm_clients)))
+            llm = ChatOpenAI(**config)
+            self._llm_clients[key] = llm
+        return llm
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "browser_running": self._browser is not None,
+            "active_sessions": len(self._sessions),
+            "busy_sessions": sum(1 for s in self._sessions.values() if s.in_use),
+            "opening_sessions": len(self._opening),
+            "oldest_idle_seconds": max((now - s.last_used for s in self._sessions.values()), default=0),
+            "llm_clients": len(self._llm_clients),
+        }
+
+    async def start(self, warm: bool = True) -> None:
+        """Start the idle reaper and optionally launch the browser ahead of the first request"""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_forever())
+        if warm:
+            try:
+                await self.get_browser()
+            except Exception as e:
+                logger.error(f"Failed to pre-start browser, will retry on first use: {e}")
+
+    async def shutdown(self) -> None:
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        async with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            await self._close(session)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing shared browser: {e}")
+            self._browser = None
+
+browser_pool = BrowserSessionPool()
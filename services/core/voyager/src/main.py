@@ -1,13 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from dotenv import load_dotenv
-from routers import api_router
 
+# Load before importing routers: browser session limits are read from the environment at import time
 load_dotenv()
 
+from routers import api_router
+from browser_sessions import browser_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the shared browser so the first /voyager/use call doesn't pay the launch
+    await browser_pool.start(warm=True)
+    yield
+    await browser_pool.shutdown()
+
 app = FastAPI(
     title="Posey Voyager",
     description="Web Navigation and Data Collection Service for Posey AI",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.include_router(api_router)
@@ -5,8 +5,10 @@ import os
 from crawl4ai import AsyncWebCrawler
 from browser_use import Agent
 from datetime import datetime
+import json
 import logging
-from langchain_openai import ChatOpenAI  # For default LLM
+
+from browser_sessions import SessionConfigConflict, browser_pool
 
 # Import search adapters (use absolute import from src)
 from search_adapters import BaseSearchAdapter, GoogleAdapter, BraveAdapter
@@ -39,6 +41,8 @@ class InteractRequest(BaseModel):
     browser_config: Optional[Dict[str, Any]] = None
     task: Optional[str] = None  # Optional task description
     llm_config: Optional[Dict[str, Any]] = None  # Optional LLM configuration
+    session_id: Optional[str] = None  # Reuse the browser context of an earlier call
+    keep_session: bool = True  # Keep the browser context open for follow-up calls
 
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
@@ -155,50 +159,93 @@ async def run_scrape(request: ScrapeRequest, background_tasks: BackgroundTasks):
         logger.error(f"Crawl4AI error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _build_browser_task(task: str, url: str, steps: List[Dict[str, Any]], navigate: bool) -> str:
+    """Describe the requested interaction as a browser-use task"""
+    lines = [task]
+    if navigate:
+        lines.append(f"Start by opening {url}.")
+    else:
+        lines.append(f"The browser is already on {url}; continue from the current page state.")
+    if steps:
+        lines.append("Perform these steps in order:")
+        lines.extend(f"{i}. {json.dumps(step)}" for i, step in enumerate(steps, start=1))
+    return "\n".join(lines)
+
 @router.post("/use", response_model=InteractResponse)
 async def run_interactive_browser(request: InteractRequest, background_tasks: BackgroundTasks):
-    """Execute interactive browser automation using browser-use"""
+    """Execute interactive browser automation using browser-use
+
+    Calls that pass the ``session_id`` returned by a previous call continue in
+    the same browser context (tabs, cookies, current page) instead of
+    starting a new browser and re-navigating. ``browser_config`` is only
+    applied when a session is created; sending a different one with an
+    existing ``session_id`` is rejected with 409.
+    """
+    session = None
     try:
         # Set default task if none provided
         task = request.task or "Navigate and interact with the webpage according to the provided steps"
-        
-        # Configure LLM - use provided config or default to OpenAI
-        if request.llm_config:
-            llm = ChatOpenAI(**request.llm_config)
-        else:
-            llm = ChatOpenAI(
-                model="gpt-4",  # Default to GPT-4 for reliable web interaction
-                temperature=0.7,
-                api_key=os.getenv("OPENAI_API_KEY")
-            )
-
-        voyager = Agent(
-            task=task,
-            llm=llm
-        )
-        
-        result = await voyager.interact(
-            url=request.url,
-            steps=request.interaction_steps,
-            config=request.browser_config or {}
-        )
+
+        async with browser_pool.acquire(request.session_id, request.browser_config) as (session, reused):
+            async with session.lock:
+                navigate = session.current_url != request.url
+                voyager = Agent(
+                    task=_build_browser_task(task, request.url, request.interaction_steps, navigate),
+                    llm=browser_pool.get_llm(request.llm_config),
+                    browser=await browser_pool.get_browser(),
+                    browser_context=session.context
+                )
+
+                history = await voyager.run()
+                session.steps_run += 1
+                visited = [u for u in history.urls() if u]
+                session.current_url = visited[-1] if visited else request.url
+
+        steps_results = [
+            {"step": i, "action": action}
+            for i, action in enumerate(history.model_actions(), start=1)
+        ]
+
+        if not request.keep_session:
+            await browser_pool.release(session.session_id)
 
         return InteractResponse(
-            content=result.get("content", {}),
-            interaction_results=result.get("steps_results", []),
+            content={
+                "text": history.final_result(),
+                "url": session.current_url,
+                "errors": [e for e in history.errors() if e]
+            },
+            interaction_results=steps_results,
             metadata={
                 "timestamp": datetime.utcnow().isoformat(),
                 "mode": "browser-use",
                 "url": request.url,
                 "task": task,
-                "steps_completed": len(result.get("steps_results", []))
+                "session_id": session.session_id if request.keep_session else None,
+                "session_reused": reused,
+                "steps_completed": len(steps_results)
             }
         )
+    except SessionConfigConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Browser-use error: {e}")
+        # A failed run may leave the page in an unknown state; don't hand it to the next call
+        if session is not None:
+            await browser_pool.release(session.session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.delete("/use/{session_id}")
+async def close_browser_session(session_id: str):
+    """Close a browser session before it expires"""
+    await browser_pool.release(session_id)
+    return {"status": "closed", "session_id": session_id}
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "browser_sessions": browser_pool.stats()
+    }